@@ -0,0 +1,321 @@
+"""
+Batch-API mode for offline LLM evaluations: many rollouts advance together.
+
+    python batch_rollout.py --missions 1 2 3 --players 3 --games 50 --dir runs/batch
+    python batch_rollout.py --local --policy heuristic --games 20 --dir runs/batch-local
+
+Every game runs rollout.run_rollout in its own thread, but only one thread runs at a time
+(the engine, solver and caches are module-level state). Whenever a game needs the model,
+for a move or for a setup question asked through rollout.mock_input, it parks the request
+and yields. Once every unfinished game is parked, the requests are written to one Batch
+API input file, which is submitted and polled until its output arrives; each game then
+resumes with its answer. Lines that came back with an error are retried by llm_client like
+any failed call, so they simply join the next batch.
+
+Games are the "llm" agent of a tournament.py directory: the same seed sets and deal pool,
+one results.jsonl line per finished game, and a rerun only plays what is missing. Batch
+input and output files are kept under <dir>/batches. --local answers the batch files with
+fake_openai.FakeOpenAI instead of the OpenAI Batch API, so the whole loop runs offline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from deal_pool import open_pool
+from llm_client import LLMClient
+from tournament import Tournament, report
+import mock_missions
+
+
+ENDPOINT = "/v1/chat/completions"
+FINISHED = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchLineError(RuntimeError):
+    """A request that came back from a batch without an answer; llm_client retries by status_code."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _namespace(value):
+    """Parsed JSON with attribute access, the shape of an SDK response."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+def parse_output_line(entry):
+    """The chat completion in one batch output line, or BatchLineError."""
+    if entry.get("error"):
+        raise BatchLineError(entry["error"].get("message", "batch request failed"), entry.get("status_code"))
+    response = entry["response"]
+    if response["status_code"] != 200:
+        message = (response.get("body") or {}).get("error", {}).get("message", "batch request failed")
+        raise BatchLineError(message, response["status_code"])
+    return _namespace(response["body"])
+
+
+class OpenAIBatchBackend:
+    """The OpenAI Batch API: upload the input file, create a batch, fetch the output files."""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+
+            self._client = openai.OpenAI(base_url=os.getenv("CREW_LLM_BASE_URL") or None)
+        return self._client
+
+    def submit(self, path):
+        with open(path, "rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        return self.client.batches.create(input_file_id=upload.id, endpoint=ENDPOINT, completion_window="24h").id
+
+    def poll(self, batch_id):
+        """(status, output text or None); the text includes the error file's lines."""
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status not in FINISHED:
+            return batch.status, None
+        text = ""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text += self.client.files.content(file_id).text
+        return batch.status, text
+
+
+class LocalBatchBackend:
+    """Answers submitted batch files with a fake_openai.FakeOpenAI after `delay` polls."""
+
+    def __init__(self, fake=None, delay=1):
+        from fake_openai import FakeOpenAI
+
+        self.fake = fake or FakeOpenAI()
+        self.delay = delay
+        self.batches = {}
+
+    def submit(self, path):
+        batch_id = f"batch_local_{len(self.batches) + 1}"
+        self.batches[batch_id] = {"path": path, "polls": 0}
+        return batch_id
+
+    def poll(self, batch_id):
+        from fake_openai import process_batch
+
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] <= self.delay:
+            return "in_progress", None
+        with open(batch["path"]) as f:
+            return "completed", process_batch(self.fake, f.read())
+
+
+class BatchRunner:
+    """
+    Runs games as cooperative threads and sends their model calls in batches.
+
+    `create` is the LLMClient transport: it parks the calling game's request and hands the
+    baton (the lock a game holds while it runs) to the next game.
+    """
+
+    def __init__(self, backend, directory, poll_interval=30.0, sleep=time.sleep, progress=None):
+        self.backend = backend
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+        self.progress = progress
+        self.baton = threading.Lock()
+        self.changed = threading.Condition()
+        self.pending = {}  # custom_id -> request body, one per parked game
+        self.answers = {}  # custom_id -> batch output line
+        self.live = 0
+        self.failure = None  # The exception that stopped the batch loop, if any
+        self.stats = {"batches": 0, "requests": 0, "failed_lines": 0, "seconds_waiting": 0.0}
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, **kwargs):
+        kwargs.pop("timeout", None)  # Per-request timeouts do not apply to batches
+        with self.changed:
+            custom_id = f"request-{self.stats['requests']}"
+            self.stats["requests"] += 1
+            self.pending[custom_id] = kwargs
+            self.changed.notify_all()
+        self.baton.release()
+        try:
+            with self.changed:
+                self.changed.wait_for(lambda: custom_id in self.answers or self.failure is not None)
+                if custom_id not in self.answers:
+                    self.pending.pop(custom_id, None)
+                    raise RuntimeError(f"The batch for {custom_id} was never answered: {self.failure!r}")
+                entry = self.answers.pop(custom_id)
+        finally:
+            self.baton.acquire()
+        return parse_output_line(entry)
+
+    def play(self, games, play):
+        """
+        Call play(*game) for every game, batching their model calls; returns the results in order.
+
+        Once every game has stopped, the first exception a game or a batch submission raised is
+        raised again here.
+        """
+        results = [None] * len(games)
+        errors = []
+
+        def run(index, game):
+            with self.baton:
+                try:
+                    results[index] = play(*game)
+                except BaseException as error:  # Raised from play() once every thread is done
+                    errors.append(error)
+                finally:
+                    with self.changed:
+                        self.live -= 1
+                        self.changed.notify_all()
+
+        self.live = len(games)
+        self.failure = None
+        threads = [threading.Thread(target=run, args=(index, game), daemon=True) for index, game in enumerate(games)]
+        for thread in threads:
+            thread.start()
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: self.live == 0 or len(self.pending) == self.live)
+                if self.live == 0:
+                    break
+                if self.failure is not None:
+                    self.changed.wait_for(lambda: self.live == 0)  # Parked games give up one by one
+                    break
+                requests, self.pending = self.pending, {}
+            try:
+                answers = self.flush(requests)
+            except BaseException as error:
+                answers = {}
+                with self.changed:
+                    self.failure = error
+                    errors.insert(0, error)
+                    self.changed.notify_all()
+            with self.changed:
+                self.answers.update(answers)
+                self.changed.notify_all()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def flush(self, requests):
+        """Submit one batch and wait for it; returns {custom_id: output line} covering every request."""
+        self.stats["batches"] += 1
+        stem = os.path.join(self.directory, f"batch-{self.stats['batches']:04d}")
+        with open(f"{stem}.jsonl", "w") as f:
+            for custom_id, body in requests.items():
+                f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}) + "\n")
+        start = time.perf_counter()
+        batch_id = self.backend.submit(f"{stem}.jsonl")
+        while True:
+            status, text = self.backend.poll(batch_id)
+            if status in FINISHED:
+                break
+            self.sleep(self.poll_interval)
+        self.stats["seconds_waiting"] += time.perf_counter() - start
+        with open(f"{stem}.output.jsonl", "w") as f:
+            f.write(text or "")
+
+        answers = {}
+        for line in (text or "").splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                answers[entry["custom_id"]] = entry
+        for custom_id in requests:
+            if custom_id not in answers:
+                # Expired or failed batches leave requests unanswered; 408 makes llm_client resend them
+                answers[custom_id] = {"error": {"message": f"No answer in batch {batch_id} ({status})"}, "status_code": 408}
+        failed = sum(1 for entry in answers.values() if entry.get("error") or entry["response"]["status_code"] != 200)
+        self.stats["failed_lines"] += failed
+        if self.progress:
+            self.progress(f"batch {self.stats['batches']}: {len(requests)} requests, {failed} failed, "
+                          f"{time.perf_counter() - start:.1f}s ({status})")
+        return answers
+
+
+def run_batch(tournament, backend, poll_interval=30.0, max_retries=3, progress=None):
+    """
+    Play the tournament's unplayed "llm" games through `backend`, recording each as it ends.
+
+    Returns (runner stats, client stats).
+    """
+    import rollout  # Imported lazily: it builds an OpenAI client at import time
+
+    pool = open_pool(tournament.pool_path) if tournament.pool_path else None
+    games = [(players, mission, seed) for agent, mission, players in tournament.cells() if agent == "llm"
+             for seed in tournament._unplayed(agent, mission, players)]
+    runner = BatchRunner(backend, os.path.join(tournament.directory, "batches"), poll_interval, progress=progress)
+    client = LLMClient(model=rollout.llm.model, create=runner.create, max_retries=max_retries, sleep=lambda seconds: None)
+
+    def play(num_players, num_mission, seed):
+        start = time.perf_counter()
+        deal = pool.deal(seed % len(pool)) if pool else None
+        outcome = rollout.run_rollout(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal)
+        if outcome.get("error"):
+            outcome.update(attempts=None, distress_token_usage=None, score=None)
+        result = {"agent": "llm", "mission": num_mission, "players": num_players, "seed": seed, **outcome,
+                  "seconds": round(time.perf_counter() - start, 4)}
+        tournament.record([result])  # Under the baton, so records never interleave
+        return result
+
+    shared_client, speculate = rollout.llm, rollout.SPECULATE_DEPTH
+    rollout.llm = client
+    rollout.SPECULATE_DEPTH = 0  # Speculative calls would come from threads that do not hold the baton
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.play(games, play)
+    finally:
+        rollout.llm, rollout.SPECULATE_DEPTH = shared_client, speculate
+    return runner.stats, client.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+    parser.add_argument("--players", type=int, nargs="+", default=[3])
+    parser.add_argument("--games", type=int, default=20, help="Deals per (mission, player count)")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--dir", default="tournament", help="Tournament directory (seeds, results, batch files)")
+    parser.add_argument("--pool", default=None, help="Deal pool file (deal_pool.py)")
+    parser.add_argument("--poll", type=float, default=30.0, help="Seconds between batch status checks")
+    parser.add_argument("--max-retries", type=int, default=3, help="Batches a failed request may be resent in")
+    parser.add_argument("--local", action="store_true", help="Answer batches with fake_openai instead of the Batch API")
+    parser.add_argument("--policy", default="heuristic", help="fake_openai policy for --local")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.dir, ["llm"], args.missions, args.players, args.games, args.base_seed, args.pool)
+    if args.local:
+        from fake_openai import FakeOpenAI
+
+        backend = LocalBatchBackend(FakeOpenAI(policy=args.policy, seed=args.base_seed), delay=0)
+    else:
+        backend = OpenAIBatchBackend()
+    stdout = sys.stdout
+    runner_stats, client_stats = run_batch(tournament, backend, 0.0 if args.local else args.poll, args.max_retries,
+                                           progress=lambda line: print(line, file=stdout, flush=True))
+    print(report(tournament))
+    print(f"\n{runner_stats['requests']} requests in {runner_stats['batches']} batches "
+          f"({runner_stats['failed_lines']} failed lines, {runner_stats['seconds_waiting']:.0f}s waiting); "
+          f"{client_stats['prompt_tokens']} prompt + {client_stats['completion_tokens']} completion tokens")
+
+
+if __name__ == "__main__":
+    main()
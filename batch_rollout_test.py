@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from batch_rollout import BatchRunner, LocalBatchBackend
+from fake_openai import FakeOpenAI
+from llm_client import LLMClient
+from tournament import Tournament
+
+
+def ask(client, questions):
+    return [client.chat([{"role": "user", "content": "Question: Do you want to send a distress signal? (yes/no): "}])
+            .choices[0].message.content for _ in range(questions)]
+
+
+def test_parked_requests_go_out_together(tmp_path):
+    backend = LocalBatchBackend(FakeOpenAI(seed=0), delay=2)
+    polls = []
+    runner = BatchRunner(backend, tmp_path, poll_interval=5.0, sleep=polls.append)
+    client = LLMClient(create=runner.create, sleep=lambda seconds: None)
+
+    results = runner.play([(client, 1), (client, 3), (client, 2)], ask)
+    assert results == [["no"], ["no"] * 3, ["no"] * 2]
+    assert runner.stats["batches"] == 3 and runner.stats["requests"] == 6
+    sizes = [sum(1 for _ in open(tmp_path / f"batch-{n:04d}.jsonl")) for n in (1, 2, 3)]
+    assert sizes == [3, 2, 1]  # Every unfinished game had a request in each batch
+    request = json.loads(open(tmp_path / "batch-0001.jsonl").readline())
+    assert request["method"] == "POST" and request["url"] == "/v1/chat/completions" and "messages" in request["body"]
+    assert polls == [5.0, 5.0] * 3
+
+
+def test_failed_lines_join_the_next_batch(tmp_path):
+    runner = BatchRunner(LocalBatchBackend(FakeOpenAI(error_rate=0.5, seed=1), delay=0), tmp_path)
+    client = LLMClient(create=runner.create, max_retries=20, sleep=lambda seconds: None)
+
+    results = runner.play([(client, 2)] * 4, ask)
+    assert results == [["no", "no"]] * 4
+    assert runner.stats["failed_lines"] > 0
+    assert runner.stats["requests"] == 8 + runner.stats["failed_lines"]
+    assert client.stats["retries"] == runner.stats["failed_lines"]
+
+
+def test_errors_reach_the_caller(tmp_path):
+    runner = BatchRunner(LocalBatchBackend(FakeOpenAI(seed=0), delay=0), tmp_path)
+    client = LLMClient(create=runner.create, sleep=lambda seconds: None)
+
+    def play(client, questions):
+        if questions == 0:
+            raise ValueError("bad game")
+        return ask(client, questions)
+
+    with pytest.raises(ValueError, match="bad game"):
+        runner.play([(client, 2), (client, 0), (client, 1)], play)
+
+    def broken(requests):
+        raise OSError("submit failed")
+
+    runner.flush = broken
+    with pytest.raises(OSError, match="submit failed"):
+        runner.play([(client, 2), (client, 1)], ask)  # The parked games are released, not left waiting
+
+
+def test_batch_rollouts_fill_a_tournament(tmp_path):
+    pytest.importorskip("dotenv")
+    from batch_rollout import run_batch
+
+    tournament = Tournament(tmp_path, ["llm"], [1], [3], games=3)
+    runner_stats, _ = run_batch(tournament, LocalBatchBackend(FakeOpenAI(seed=0), delay=0), poll_interval=0.0)
+    assert len(tournament.results) == 3
+    assert all(result["error"] is None for result in tournament.results.values())
+    assert runner_stats["batches"] < runner_stats["requests"]
+
+    # Rerunning plays nothing
+    assert run_batch(tournament, LocalBatchBackend(), poll_interval=0.0)[0]["requests"] == 0
@@ -0,0 +1,217 @@
+from crew_sim import DECK, trick_size
+
+
+JARVIS_HIDDEN = 'J'  # Pseudo-holder for JARVIS's face-down cards in 2-player games
+CLUE_TYPES = ('highest', 'lowest', 'only')
+
+
+class BeliefTracker:
+    """
+    One player's incremental card-tracking belief over the hidden cards.
+
+    For every hidden holder (the other seats, plus JARVIS's face-down pile with 2 players)
+    it keeps the set of cards that holder might still have and its exact card count.
+    Each played card or radio clue updates only the handful of affected cards, so keeping
+    the tracker in sync costs O(1) per move:
+      * a player who does not follow the lead suit is void in it (play() enforces follow-suit),
+      * a radio clue pins the card to that hand, and 'highest'/'lowest'/'only' rule out the
+        higher/lower/other cards of that color (_check_radio_card rejects 'middle' cards),
+      * JARVIS's face-up cards are public and each reveal shrinks the face-down pile.
+    """
+
+    def __init__(self, game, player_id):
+        self.player_id = player_id
+        self.reset(game)
+
+    def reset(self, game):
+        """Rebuild from scratch, e.g. for a new attempt after is_over() re-dealt the cards."""
+        self.num_players = game.num_players
+        self._attempt = getattr(game, "attempts", 1)
+        self._clues = {}
+
+        seen = set(game.hands[self.player_id])
+        if game.num_players == 2:
+            seen.update(game.hands[2])
+        seen.update(card for _, card in game.played_cards)
+
+        self.counts = {pid: len(hand) for pid, hand in game.hands.items()
+                       if pid != self.player_id and not (game.num_players == 2 and pid == 2)}
+        if game.num_players == 2:
+            self.counts[JARVIS_HIDDEN] = sum(1 for down in game.jarvis_dictionary.values() if down != '')
+        self.voids = {pid: set() for pid in self.counts}
+        self.fixed = {}
+        self.unseen = {card for card in DECK if card not in seen}
+        self.possible = {pid: set(self.unseen) for pid in self.counts}
+        self.holders = {card: set(self.counts) for card in self.unseen}
+
+        # Voids shown earlier in this attempt; the played cards themselves are already seen
+        size = trick_size(self.num_players)
+        for index, (pid, card) in enumerate(game.played_cards):
+            self._note_void(pid, card, game.played_cards[index - index % size][1][0])
+        self._cursor = len(game.played_cards)
+        self.sync(game)
+
+    def sync(self, game):
+        """Fold in every move made since the last call (restarts trigger a full reset)."""
+        if len(game.played_cards) < self._cursor or getattr(game, "attempts", 1) != self._attempt:
+            self.reset(game)
+            return
+
+        size = trick_size(self.num_players)
+        history = game.played_cards
+        for index in range(self._cursor, len(history)):
+            lead_suit = history[index - index % size][1][0]
+            pid, card = history[index]
+            self.observe_play(pid, card, lead_suit)
+        self._cursor = len(history)
+
+        for pid, clue in game.radio_clues.items():
+            if self._clues.get(pid) != clue:
+                self._clues[pid] = clue
+                self.observe_radio(pid, *clue)
+
+        if self.num_players == 2:
+            for card in game.hands[2]:
+                if card in self.unseen:
+                    self._reveal(card)
+
+    def observe_play(self, player, card, lead_suit):
+        """A card was played; if it is off the lead suit the player is now void in that suit."""
+        if card in self.unseen:
+            # An unseen card played from JARVIS's seat was revealed and played since the last sync
+            holder = JARVIS_HIDDEN if self.num_players == 2 and player == 2 else player
+            if holder in self.counts:
+                self.counts[holder] -= 1
+            self._remove(card)
+        self._note_void(player, card, lead_suit)
+
+    def _note_void(self, player, card, lead_suit):
+        if card[0] != lead_suit and player in self.voids and lead_suit not in self.voids[player]:
+            self.voids[player].add(lead_suit)
+            for other in [c for c in self.possible[player] if c[0] == lead_suit]:
+                self._exclude(player, other)
+
+    def observe_radio(self, player, card, clue_type):
+        """Apply a radio clue. Deadzone clues are never checked against the hand, so they are ignored."""
+        if player not in self.counts or clue_type not in CLUE_TYPES:
+            return
+        card = card.upper()
+        if card in self.unseen:
+            self._pin(card, player)
+        rank = int(card[1:])
+        for other in [c for c in self.possible[player] if c[0] == card[0] and c != card]:
+            other_rank = int(other[1:])
+            if clue_type == 'only' or (clue_type == 'highest' and other_rank > rank) or (clue_type == 'lowest' and other_rank < rank):
+                self._exclude(player, other)
+
+    def _reveal(self, card):
+        """JARVIS turned a face-down card face up."""
+        self.counts[JARVIS_HIDDEN] -= 1
+        self._remove(card)
+
+    def _pin(self, card, player):
+        self.fixed[card] = player
+        for holder in list(self.holders[card]):
+            if holder != player:
+                self._exclude(holder, card)
+
+    def _exclude(self, holder, card):
+        self.possible[holder].discard(card)
+        self.holders[card].discard(holder)
+
+    def _remove(self, card):
+        self.unseen.discard(card)
+        self.fixed.pop(card, None)
+        for holder in self.holders.pop(card, ()):
+            self.possible[holder].discard(card)
+
+    def certain(self):
+        """{card: holder} for every hidden card whose location is already determined."""
+        return {card: next(iter(holders)) for card, holders in self.holders.items() if len(holders) == 1}
+
+    def sample(self, rng, max_greedy_tries=20):
+        """
+        Deal the unseen cards to their holders consistently with every constraint.
+
+        Returns {card: holder} with each holder receiving exactly counts[holder] cards, or
+        None if the constraints cannot be met (for instance after a mislabelled radio claim).
+        A cheap most-constrained-first greedy pass almost always succeeds; otherwise cards
+        are placed one at a time, keeping only choices that pass a Hall's-condition check.
+        """
+        cards = sorted(self.unseen)
+        for _ in range(max_greedy_tries):
+            rng.shuffle(cards)
+            cards.sort(key=lambda c: len(self.holders[c]))
+            remaining = dict(self.counts)
+            assignment = {}
+            for card in cards:
+                choices = [holder for holder in self.counts if remaining[holder] > 0 and holder in self.holders[card]]
+                if not choices:
+                    break
+                holder = rng.choice(choices) if len(choices) > 1 else choices[0]
+                assignment[card] = holder
+                remaining[holder] -= 1
+            else:
+                return assignment
+        return self._sample_checked(rng)
+
+    def _sample_checked(self, rng):
+        seats = list(self.counts)
+        bit = {holder: 1 << i for i, holder in enumerate(seats)}
+        full = (1 << len(seats)) - 1
+        masks = {card: sum(bit[holder] for holder in self.holders[card]) for card in self.unseen}
+        pending = {}
+        for mask in masks.values():
+            pending[mask] = pending.get(mask, 0) + 1
+        capacity = dict(self.counts)
+
+        def feasible():
+            # Hall's condition: cards confined to any holder subset must fit in that subset
+            for subset in range(1, full + 1):
+                room = sum(capacity[holder] for holder in seats if bit[holder] & subset)
+                needed = sum(count for mask, count in pending.items() if mask & ~subset == 0)
+                if needed > room:
+                    return False
+            return True
+
+        if not feasible():
+            return None
+        cards = sorted(self.unseen)
+        rng.shuffle(cards)
+        assignment = {}
+        for card in cards:
+            mask = masks[card]
+            pending[mask] -= 1
+            choices = [holder for holder in seats if capacity[holder] > 0 and holder in self.holders[card]]
+            rng.shuffle(choices)
+            for holder in choices:
+                capacity[holder] -= 1
+                if feasible():
+                    assignment[card] = holder
+                    break
+                capacity[holder] += 1
+            else:
+                return None
+        return assignment
+
+    def summary(self):
+        """Plain-text 'unseen cards' summary for LLM prompts."""
+        lines = ["Unseen cards (not in your hand, not face-up, not yet played):"]
+        for color in "PYGBR":
+            ranks = sorted(int(card[1:]) for card in self.unseen if card[0] == color)
+            lines.append(f"  {color}: {' '.join(map(str, ranks)) if ranks else '-'}")
+        for holder in self.counts:
+            name = "JARVIS face-down" if holder == JARVIS_HIDDEN else f"Player {holder + 1}"
+            facts = [f"{self.counts[holder]} cards"]
+            if holder in self.voids and self.voids[holder]:
+                facts.append(f"void in {', '.join(sorted(self.voids[holder]))}")
+            pinned = sorted(card for card, owner in self.fixed.items() if owner == holder)
+            if pinned:
+                facts.append(f"holds {', '.join(pinned)}")
+            excluded = sorted(card for card in self.unseen
+                              if holder not in self.holders[card] and card[0] not in self.voids.get(holder, ())
+                              and self.fixed.get(card) is None)
+            if excluded:
+                facts.append(f"cannot hold {', '.join(excluded)}")
+            lines.append(f"  {name}: {'; '.join(facts)}")
+        return "\n".join(lines)
@@ -0,0 +1,341 @@
+from unittest.mock import patch
+import contextlib
+import io
+import os
+import random
+
+import pytest
+
+from crew_sim import DECK, SimGame, legal_moves
+from belief import BeliefTracker
+from canonical import canonicalize, canonicalize_view, invert, relabel_move
+from endgame import EndgameSolver
+from heuristic import HeuristicAgent, allowed_tasks
+from ismcts import ISMCTSAgent, InformationSet, JARVIS_HIDDEN, endgame_vote
+from simulate import SetupResponder, play_game, play_sim_game, run
+from the_crew_game import TheCrewGame, quiet
+from game_config import GameplayError
+
+
+def make_game(num_players, num_mission, seed):
+    random.seed(seed)
+    with patch('builtins.input', side_effect=SetupResponder()), contextlib.redirect_stdout(io.StringIO()):
+        return TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed)
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5])
+@pytest.mark.parametrize("num_mission", [8, 9, 10])
+def test_sim_deal_matches_engine(num_players, num_mission):
+    game = make_game(num_players, num_mission, seed=7)
+    sim = SimGame.from_seed(num_players, num_mission, seed=7)
+
+    assert sim.task_ordering == game.task_ordering
+    assert sim.assigned_tasks == game.assigned_tasks
+    assert sim.turn_order == game.turn_order
+    assert {pid: sorted(hand) for pid, hand in sim.hands.items()} == {pid: sorted(hand) for pid, hand in game.hands.items()}
+
+
+def test_sim_follows_engine_through_random_game():
+    game = make_game(4, 2, seed=3)
+    sim = SimGame.from_game(game)
+    rng = random.Random(3)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not sim.is_over():
+            pid = sim.whose_turn()
+            assert pid == game.whose_turn()
+            move = rng.choice(legal_moves(sim, pid))
+            sim.play(move, player_id=pid)
+            game.play(move, player_id=pid)
+            assert sim.completed_tasks == game.completed_tasks
+            assert sim.failed == game.failed
+
+
+def test_sim_enforces_follow_suit():
+    sim = SimGame.from_seed(4, 1, seed=0)
+    leader = sim.whose_turn()
+    lead = next(c for c in sim.hands[leader] if not c.startswith("R"))
+    sim.play(lead, player_id=leader)
+
+    follower = sim.whose_turn()
+    hand = sim.hands[follower]
+    off_suit = next((c for c in hand if c[0] != lead[0]), None)
+    if any(c[0] == lead[0] for c in hand) and off_suit:
+        with pytest.raises(GameplayError):
+            sim.play(off_suit, player_id=follower)
+
+
+def test_information_set_respects_voids_and_radio_clues():
+    # Player 0 observes; player 1 showed out of yellow and radioed that B7 is their highest blue
+    remaining = [c for c in DECK if c not in ('Y1', 'P1', 'Y4')]
+    hand_1 = ['B7'] + [c for c in remaining if c[0] in 'PG'][:11]
+    hand_0 = [c for c in remaining if c not in hand_1][:13]
+    hand_2 = [c for c in remaining if c not in hand_1 and c not in hand_0]
+    hands = {0: hand_0, 1: hand_1, 2: hand_2}
+    sim = SimGame(3, 1, hands, [hand_2[0]], {hand_2[0]: 0}, [0, 1, 2])
+    sim.played_cards = [(0, 'Y1'), (1, 'P1'), (2, 'Y4')]
+    sim.radio_clues[1] = ('B7', 'highest')
+
+    info_set = InformationSet(sim, 0)
+    rng = random.Random(0)
+    for _ in range(20):
+        deal = info_set.sample(rng)
+        assert 'B7' in deal.hands[1]
+        assert not {'B8', 'B9'} & set(deal.hands[1])
+        assert not any(c[0] == 'Y' for c in deal.hands[1])
+        assert deal.hands[0] == hands[0]
+        assert len(deal.hands[1]) == len(deal.hands[2]) == 12
+
+
+def test_information_set_keeps_jarvis_face_up_cards():
+    game = make_game(2, 3, seed=5)
+    info_set = InformationSet(game, game.turn_order[0])
+    assert info_set.belief.counts[JARVIS_HIDDEN] == 7
+
+    sim = info_set.sample(random.Random(1))
+    assert sorted(sim.hands[2]) == sorted(game.hands[2])
+    assert set(sim.jarvis_dictionary) == set(game.jarvis_dictionary)
+    assert not set(sim.jarvis_dictionary.values()) & set(game.hands[game.turn_order[0]])
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 5])
+def test_belief_tracker_incremental_matches_rebuild(num_players):
+    game = SimGame.from_seed(num_players, 10, seed=4)
+    rng = random.Random(4)
+    trackers = {pid: BeliefTracker(game, pid) for pid in game.turn_order}
+
+    while not game.is_over():
+        pid = game.whose_turn()
+        game.play(rng.choice(legal_moves(game, pid)), player_id=pid)
+        trackers[game.whose_turn()].sync(game)
+
+    for pid, tracker in trackers.items():
+        tracker.sync(game)
+        fresh = BeliefTracker(game, pid)
+        assert tracker.counts == fresh.counts
+        assert tracker.possible == fresh.possible
+        for holder, cards in tracker.possible.items():
+            truth = {c for c in game.jarvis_dictionary.values() if c} if holder == JARVIS_HIDDEN else set(game.hands[holder])
+            assert truth <= cards
+            assert len(truth) == tracker.counts[holder]
+
+
+def test_belief_tracker_radio_clue_and_summary():
+    game = SimGame.from_seed(3, 1, seed=2)
+    speaker = game.turn_order[1]
+    blues = sorted((c for c in game.hands[speaker] if c[0] == 'B'), key=lambda c: int(c[1:]))
+    if len(blues) < 2:
+        pytest.skip("speaker needs two blue cards in this deal")
+    tracker = BeliefTracker(game, game.turn_order[0])
+    game.radio_clues[speaker] = (blues[0], 'lowest')
+    tracker.sync(game)
+
+    assert tracker.fixed[blues[0]] == speaker
+    lower = {c for c in tracker.unseen if c[0] == 'B' and int(c[1:]) < int(blues[0][1:])}
+    assert not lower & tracker.possible[speaker]
+    assert f"holds {blues[0]}" in tracker.summary()
+
+
+def test_ismcts_agent_completes_simple_mission():
+    agent = ISMCTSAgent(iterations=100, seed=0)
+    result = play_game(agent, num_players=3, num_mission=1, seed=0)
+    assert result["success"] is True
+
+
+def test_allowed_tasks_follow_mission_ordering():
+    sim = SimGame.from_seed(3, 9, seed=0)  # numbered 1, numbered 2, then two simple tasks
+    first, second, *simple = sim.task_ordering
+    assert allowed_tasks(sim) == (first,)
+    sim.completed_tasks = [first, second]
+    assert set(allowed_tasks(sim)) == set(simple)
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5])
+def test_heuristic_agent_plays_legal_moves_on_both_engines(num_players):
+    agent = HeuristicAgent()
+    for seed in range(5):
+        crew = play_game(agent, num_players, num_mission=8, seed=seed)
+        sim = play_sim_game(agent, num_players, num_mission=8, seed=seed)
+        assert crew["success"] == sim["success"]
+        assert crew["tricks"] == sim["tricks"]
+
+
+def test_heuristic_agent_beats_random_on_first_mission():
+    wins = sum(play_sim_game(HeuristicAgent(), 3, 1, seed)["success"] for seed in range(100))
+    assert wins >= 60
+
+
+def test_ismcts_heuristic_playout():
+    agent = ISMCTSAgent(iterations=50, seed=0, playout="heuristic")
+    result = play_sim_game(agent, num_players=3, num_mission=1, seed=0)
+    assert result["success"] is True
+
+
+def endgame_position(num_players, num_mission, seed, cards=3):
+    """A seeded deal cut down to `cards` cards per seat, keeping every task card in hand."""
+    sim = SimGame.from_seed(num_players, num_mission, seed)
+    for hand in sim.hands.values():
+        hand.sort(key=lambda c: c not in sim.tasks)
+        del hand[cards:]
+    if num_players == 2:
+        sim.jarvis_dictionary = {card: '' for card in sim.hands[2]}
+    return sim
+
+
+def test_endgame_solver_line_wins_when_replayed():
+    solver = EndgameSolver(max_cards=3)
+    solved = 0
+    for seed in range(20):
+        sim = endgame_position(3, 2, seed)
+        assert solver.applies(sim)
+        line = solver.solve(sim)
+        if line is None:
+            continue
+        solved += 1
+        for pid, move in line:
+            sim.play(move, player_id=pid)
+        assert sim.success()
+    assert solved > 0
+
+
+def test_endgame_solver_proves_lost_position():
+    sim = endgame_position(4, 1, seed=0)
+    # Mission 1's task is lost once its card has left play
+    task = sim.task_ordering[0]
+    for hand in sim.hands.values():
+        if task in hand:
+            hand.remove(task)
+            hand.append(next(c for c in DECK if all(c not in h for h in sim.hands.values()) and c != task))
+    assert EndgameSolver(max_cards=3).solve(sim) is None
+
+
+def test_endgame_vote_sees_only_the_players_view():
+    solver = EndgameSolver(max_cards=3)
+    for seed in range(10):
+        sim = endgame_position(4, 2, seed)
+        pid = sim.whose_turn()
+        others = [p for p in range(4) if p != pid]
+        hands = {p: list(hand) for p, hand in sim.hands.items()}
+        hands[others[0]], hands[others[1]] = hands[others[1]], hands[others[0]]
+        swapped = SimGame.from_game(sim, hands=hands)
+        moves = legal_moves(sim, pid)
+        votes = [endgame_vote(solver, InformationSet(game, pid), moves, random.Random(seed), 8) for game in (sim, swapped)]
+        assert votes[0] == votes[1] and votes[0] in moves
+
+
+def test_endgame_cache_is_bounded_and_persistent(tmp_path):
+    path = str(tmp_path / "endgame.pkl")
+    solver = EndgameSolver(max_cards=3, cache_size=50, cache_path=path)
+    solver.solve(endgame_position(4, 2, seed=1))
+    assert len(solver.cache) <= 50
+    solver.save()
+
+    warm = EndgameSolver(max_cards=3, cache_size=50, cache_path=path)
+    assert list(warm.cache) == list(solver.cache)
+
+
+def save_entries(path, worker):
+    solver = EndgameSolver(cache_path=path)
+    for index in range(20):
+        solver.cache[(worker, index)] = None
+        solver.save()
+    return worker
+
+
+def test_concurrent_endgame_saves_merge(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+
+    path = str(tmp_path / "endgame.pkl")
+    with ProcessPoolExecutor(4) as pool:
+        assert sorted(pool.map(save_entries, [path] * 4, range(4))) == [0, 1, 2, 3]
+    assert set(EndgameSolver(cache_path=path).cache) == {(worker, index) for worker in range(4) for index in range(20)}
+    assert sorted(os.listdir(tmp_path)) == ["endgame.pkl"]
+
+
+def permute_colors(sim, mapping):
+    """Copy of sim with every card's color renamed through mapping."""
+    swap = lambda card: mapping.get(card[0], card[0]) + card[1:]
+    hands = {pid: [swap(c) for c in hand] for pid, hand in sim.hands.items()}
+    tasks = [swap(t) for t in sim.task_ordering]
+    assigned = {swap(t): p for t, p in sim.assigned_tasks.items()}
+    permuted = SimGame(sim.num_players, 2, hands, tasks, assigned, sim.turn_order)
+    permuted.trick = [(p, swap(c)) for p, c in sim.trick]
+    return permuted
+
+
+def test_canonical_key_ignores_color_permutation_and_played_ranks():
+    sim = endgame_position(4, 2, seed=3)
+    permuted = permute_colors(sim, {'P': 'G', 'G': 'B', 'B': 'P'})
+    key, forward = canonicalize(sim)
+    permuted_key, permuted_forward = canonicalize(permuted)
+    assert key == permuted_key
+
+    # Ranks of the remaining cards are compressed to 1..k per color
+    for color in "PYGBR":
+        ranks = sorted(int(c[1:]) for c in forward.values() if c[0] == color)
+        assert ranks == list(range(1, len(ranks) + 1))
+
+    move = legal_moves(sim, sim.whose_turn())[0]
+    assert relabel_move(relabel_move(move, forward), invert(forward)) == move
+
+
+def test_endgame_cache_hit_translates_line_to_permuted_position():
+    solver = EndgameSolver(max_cards=3)
+    for seed in range(20):
+        sim = endgame_position(3, 2, seed)
+        if solver.solve(sim) is not None:
+            break
+    permuted = permute_colors(sim, {'P': 'Y', 'Y': 'P'})
+    hits = solver.hits
+    line = solver.solve(permuted)
+    assert solver.hits > hits
+    for pid, move in line:
+        permuted.play(move, player_id=pid)
+    assert permuted.success()
+
+
+def test_canonical_view_hides_other_hands():
+    game = make_game(4, 2, seed=9)
+    key, _ = canonicalize_view(game, 0)
+    other = SimGame.from_game(game)
+    # Swapping two unseen cards between other players does not change player 0's view
+    a, b = other.hands[1][0], other.hands[2][0]
+    other.hands[1][0], other.hands[2][0] = b, a
+    assert canonicalize_view(other, 0)[0] == key
+
+
+def test_engine_keeps_no_process_wide_state(capsys):
+    state = random.getstate()
+    with patch('builtins.input', side_effect=AssertionError("builtins.input was used")):
+        game = TheCrewGame(num_players=5, num_mission=8, seed=7, input_fn=SetupResponder(), print_fn=quiet)
+        game.failed = True
+        game.is_over()  # A restart asks the setup questions again and redeals
+    assert random.getstate() == state
+    assert capsys.readouterr().out == ""
+    assert game.attempts == 2
+    first = make_game(5, 8, seed=7)
+    assert TheCrewGame(num_players=5, num_mission=8, seed=7, input_fn=SetupResponder(), print_fn=quiet).hands == first.hands
+
+
+@pytest.mark.parametrize("engine", ["crew", "sim"])
+def test_thread_pool_matches_serial_run(engine):
+    serial = run("heuristic", [1, 8], 4, games=6, engine=engine)
+    assert run("heuristic", [1, 8], 4, games=6, workers=3, engine=engine, executor="thread") == serial
+
+
+def test_games_share_static_tables():
+    def build():
+        return TheCrewGame(num_players=4, num_mission=10, seed=3, input_fn=SetupResponder(), print_fn=quiet)
+
+    game, again = build(), build()
+    assert not hasattr(game, "__dict__")
+    cards = {id(card) for card in DECK}
+    assert all(id(card) in cards for hand in game.hands.values() for card in hand)
+    assert all(id(task) in cards for task in game.tasks)
+    assert game.task_types is again.task_types and game.condition is again.condition
+
+    # Restarts redeal from the seed and the attempt, so equal games stay equal
+    for g in (game, again):
+        g.failed = True
+        g.is_over()
+    assert game.hands == again.hands and game.attempts == 2
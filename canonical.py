@@ -0,0 +1,173 @@
+"""
+Canonical forms of positions up to color relabelling and rank compression.
+
+The colors P, Y, G and B are interchangeable except where tasks, clues, voids or the
+current trick pin them, and only the relative order of the cards still in play matters
+(once B3 is gone, B4 behaves like B3 did). canonicalize() and canonicalize_view() map a
+position to a hashable representative key together with the forward card mapping
+(original card -> canonical card); invert it to translate cached moves back.
+"""
+import itertools
+import re
+
+from crew_sim import DECK, trick_size
+from the_crew_game import TheCrewGame
+
+
+COLORS = TheCrewGame.COLORS
+HIDDEN_JARVIS = 9  # Location code for JARVIS's face-down cards
+TRICK = 10  # Location code offset for cards in the current trick
+CLUE_CODES = {'highest': 0, 'lowest': 1, 'only': 2, 'deadzone': 3}
+CARD_PATTERN = re.compile(r"\b([PYGBRpygbr])(\d)\b")
+
+
+def invert(forward):
+    return {canonical: original for original, canonical in forward.items()}
+
+
+def relabel_move(move, mapping):
+    """Rewrite every card code in a move string (e.g. 'radio highest B7') through mapping."""
+    def swap(match):
+        card = match.group(0).upper()
+        return mapping.get(card, match.group(0))
+    return CARD_PATTERN.sub(swap, move)
+
+
+def _canonical(live, describe, color_facts, build_key):
+    """
+    Pick the representative among all relabellings.
+
+    Colors are ordered by a signature (color-level facts plus a description of every live
+    card in rank order); only colors whose signatures tie need their permutations compared.
+    """
+    by_color = {}
+    for card in live:
+        by_color.setdefault(card[0], []).append(card)
+    for cards in by_color.values():
+        cards.sort(key=lambda card: int(card[1:]))
+
+    signatures = {color: (color_facts(color), tuple(map(describe, by_color.get(color, ())))) for color in COLORS}
+    ordered = sorted(COLORS, key=signatures.get)
+    groups = [list(group) for _, group in itertools.groupby(ordered, key=signatures.get)]
+    rockets = {card: f"R{rank}" for rank, card in enumerate(by_color.get('R', ()), 1)}
+
+    best = None
+    for arrangement in itertools.product(*(itertools.permutations(group) for group in groups)):
+        color_map = {'R': 'R'}
+        forward = dict(rockets)
+        for new_color, original in zip(COLORS, (color for group in arrangement for color in group)):
+            color_map[original] = new_color
+            for rank, card in enumerate(by_color.get(original, ()), 1):
+                forward[card] = f"{new_color}{rank}"
+        key = build_key(forward, color_map)
+        if best is None or key < best[0]:
+            best = (key, forward)
+    return best
+
+
+def _task_entries(game, forward):
+    return tuple((forward.get(task, ''), game.task_token_map[task], game.assigned_tasks[task], task in game.completed_tasks)
+                 for task in game.task_ordering)
+
+
+def canonicalize(game):
+    """
+    Canonical key of a perfect-information position (SimGame or TheCrewGame) plus the forward card mapping.
+
+    Covers everything that decides how the rest of the attempt can play out: hands,
+    JARVIS's face-up/face-down pairs, the current trick, turn order and task progress.
+    """
+    live = [card for hand in game.hands.values() for card in hand] + [card for _, card in game.trick]
+    jarvis_pairs = ()
+    if game.num_players == 2:
+        jarvis_pairs = [(up, down) for up, down in game.jarvis_dictionary.items()]
+        live += [down for _, down in jarvis_pairs if down != '']
+
+    location = {}
+    for pid, hand in game.hands.items():
+        for card in hand:
+            location[card] = pid
+    for index, (_, card) in enumerate(game.trick):
+        location[card] = TRICK + index
+    for _, down in jarvis_pairs:
+        if down != '':
+            location[down] = HIDDEN_JARVIS
+    task_index = {task: index for index, task in enumerate(game.task_ordering)}
+
+    def describe(card):
+        index = task_index.get(card, -1)
+        return (location[card], index, game.assigned_tasks[card] if index >= 0 else -1)
+
+    def build_key(forward, color_map):
+        return (
+            game.num_players,
+            tuple(tuple(sorted(forward[card] for card in game.hands[pid])) for pid in sorted(game.hands)),
+            tuple(sorted((forward[up], forward[down] if down != '' else '') for up, down in jarvis_pairs)),
+            tuple((pid, forward[card]) for pid, card in game.trick),
+            tuple(game.turn_order),
+            _task_entries(game, forward),
+        )
+
+    return _canonical(live, describe, lambda color: (), build_key)
+
+
+def canonicalize_view(game, player_id):
+    """
+    Canonical key of what player_id can see, for caching decisions such as LLM answers.
+
+    Live cards are those not played in an earlier trick; hidden ones are only described
+    as unseen. Voids shown by each player and radio clues are part of the key.
+    """
+    earlier = len(game.played_cards) - len(game.trick)
+    played = {card for _, card in game.played_cards[:earlier]}
+    live = [card for card in DECK if card not in played]
+
+    location = {card: 2 for card in live}  # Unseen unless we learn otherwise below
+    for card in game.hands[player_id]:
+        location[card] = 0
+    if game.num_players == 2 and player_id != 2:
+        for card in game.hands[2]:
+            location[card] = 1
+    for index, (_, card) in enumerate(game.trick):
+        location[card] = TRICK + index
+    task_index = {task: index for index, task in enumerate(game.task_ordering)}
+    clues = {}
+    for pid, (card, clue_type) in game.radio_clues.items():
+        clues[card.upper()] = (pid, CLUE_CODES.get(clue_type, 3))
+
+    voids = {}
+    size = trick_size(game.num_players)
+    for index, (pid, card) in enumerate(game.played_cards):
+        lead_suit = game.played_cards[index - index % size][1][0]
+        if card[0] != lead_suit:
+            voids.setdefault(lead_suit, set()).add(pid)
+
+    def describe(card):
+        index = task_index.get(card, -1)
+        return (location[card], index, game.assigned_tasks[card] if index >= 0 else -1) + clues.get(card, (-1, -1))
+
+    def color_facts(color):
+        return tuple(sorted(voids.get(color, ())))
+
+    def build_key(forward, color_map):
+        jarvis = ()
+        if game.num_players == 2:
+            jarvis = (tuple(sorted(forward[card] for card in game.hands[2])),
+                      sum(1 for down in game.jarvis_dictionary.values() if down != ''))
+        return (
+            game.num_players,
+            player_id,
+            tuple(sorted(forward[card] for card in game.hands[player_id])),
+            jarvis,
+            tuple((pid, forward[card]) for pid, card in game.trick),
+            tuple(game.turn_order),
+            tuple(len(game.hands[pid]) for pid in sorted(game.hands)),
+            _task_entries(game, forward),
+            tuple(sorted((pid, relabel_move(card, forward), clue_type) for pid, (card, clue_type) in game.radio_clues.items())),
+            tuple(sorted((color_map[color], tuple(sorted(pids))) for color, pids in voids.items())),
+            tuple(game.radio_used),
+            game.deadzone,
+            game.disruption,
+        )
+
+    return _canonical(live, describe, color_facts, build_key)
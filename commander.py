@@ -0,0 +1,176 @@
+"""
+Commander's decision and distribution by simulation instead of a chain of yes/no prompts.
+
+Missions with commanders_decision or commanders_distribution settle the task assignment
+through one input() per player and task (a model call each in rollout.py). The
+CommanderOptimizer instead scores every assignment those prompts can produce:
+
+- commanders_decision: all tasks to one player other than the commander;
+- commanders_distribution: tasks spread as evenly as the engine allows (every seat in
+  turn_order, JARVIS included, gets tasks_per_player or at most `extra` of them one more).
+
+Each candidate is played out on the same deals sampled from the commander's point of view
+(ismcts.InformationSet: own hand known, the rest dealt at random) with the heuristic
+playout policy, and finished by the endgame solver once hands are small enough, so the
+solver's memo is shared by every candidate. Candidates are compared by successive halving:
+all of them on a few deals, the better half on twice as many, and so on until one is left,
+every deal is used or the time budget runs out. CommanderInput then gives the yes/no and
+player answers that make TheCrewGame end up with the chosen assignment.
+"""
+import itertools
+import random
+import re
+import time
+from typing import Dict, NamedTuple
+
+from crew_sim import legal_moves
+from endgame import EndgameSolver
+from heuristic import HeuristicAgent
+from ismcts import InformationSet
+
+
+class Plan(NamedTuple):
+    assignment: Dict[str, int]  # task -> player
+    success: float  # Simulated success rate on the deals it was played on
+    candidates: int
+    playouts: int
+
+
+def commander_of(game):
+    return next(pid for pid, hand in game.hands.items() if 'R4' in hand)
+
+
+def candidate_assignments(game):
+    """Every assignment the commander's prompts can end with, as task -> player dicts."""
+    tasks = list(game.tasks)
+    commander = commander_of(game)
+    if "commanders_decision" in game.condition:
+        return [{task: pid for task in tasks} for pid in game.turn_order if pid != commander]
+    tasks_per_player, extra = divmod(len(tasks), game.num_players)
+    candidates = []
+    for players in itertools.product(game.turn_order, repeat=len(tasks)):
+        counts = [players.count(pid) for pid in game.turn_order]
+        if max(counts) <= tasks_per_player + 1 and sum(count > tasks_per_player for count in counts) <= extra:
+            candidates.append(dict(zip(tasks, players)))
+    return candidates
+
+
+class CommanderOptimizer:
+    """
+    Picks the commander's assignment by successive halving over sampled deals.
+
+    deals: most deals a candidate is played on; time_limit: seconds per setup (None: no
+    limit); solver: an EndgameSolver for the last tricks (by default the last three; the
+    exact search grows quickly with the number of players).
+    """
+
+    def __init__(self, deals=32, time_limit=2.0, solver=None, epsilon=0.1, seed=0):
+        self.deals = deals
+        self.time_limit = time_limit
+        self.solver = solver if solver is not None else EndgameSolver(max_cards=3)
+        self.epsilon = epsilon
+        self.seed = seed
+        self.agent = HeuristicAgent(use_radio=False)
+        self.cache = {}  # (commander's view, tasks, condition) -> Plan
+        self.stats = {"setups": 0, "cache_hits": 0, "playouts": 0, "timeouts": 0}
+
+    def best(self, game):
+        """The Plan for a game whose commander is about to assign the tasks."""
+        commander = commander_of(game)
+        key = (tuple(sorted(game.hands[commander])), tuple(game.tasks), tuple(game.turn_order), tuple(game.condition))
+        if key in self.cache:
+            self.stats["cache_hits"] += 1
+            return self.cache[key]
+        self.stats["setups"] += 1
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        rng = random.Random(self.seed)
+        info_set = InformationSet(game, commander)
+        deals = [info_set.sample(rng) for _ in range(self.deals)]
+
+        candidates = candidate_assignments(game)
+        wins = [0] * len(candidates)
+        trials = [0] * len(candidates)
+        alive = list(range(len(candidates)))
+        timed_out = False
+        while len(alive) > 1 and not timed_out and trials[alive[0]] < len(deals):
+            # Sized so the last round plays every deal: few candidates get many deals from the start
+            more = min(len(deals), max(4, 2 * trials[alive[0]], len(deals) >> ((len(alive) - 1).bit_length() - 1)))
+            for index in alive:
+                if deadline is not None and time.perf_counter() > deadline:
+                    timed_out = True
+                    break
+                for deal_index in range(trials[index], more):
+                    wins[index] += self._playout(deals[deal_index], candidates[index], deal_index)
+                trials[index] = more
+            # Candidates the budget did not reach this round are compared on their earlier deals
+            alive = [index for index in alive if trials[index]] or alive
+            alive.sort(key=lambda index: -wins[index] / max(1, trials[index]))
+            if not timed_out:
+                alive = alive[:max(1, len(alive) // 2)]
+        self.stats["timeouts"] += timed_out
+        winner = alive[0]
+        playouts = sum(trials)
+        plan = Plan(candidates[winner], wins[winner] / max(1, trials[winner]), len(candidates), playouts)
+        self.stats["playouts"] += playouts
+        self.cache[key] = plan
+        return plan
+
+    def _playout(self, deal, assignment, deal_index):
+        """1 if the candidate completes the mission on this deal, else 0."""
+        sim = deal.copy()
+        sim.assigned_tasks = dict(assignment)
+        rng = random.Random(f"{self.seed}:{deal_index}")  # The same playout randomness for every candidate
+        while not sim.is_over():
+            if self.solver.applies(sim):
+                return int(self.solver.solve(sim) is not None)
+            pid = sim.whose_turn()
+            if rng.random() < self.epsilon:
+                move = rng.choice(legal_moves(sim, pid))
+            else:
+                move = self.agent.choose_move(sim, pid)
+            sim.play(move, player_id=pid)
+        return int(sim.success())
+
+
+class CommanderInput:
+    """
+    A TheCrewGame input_fn that answers the commander's prompts with CommanderOptimizer's plan.
+
+    Every other question goes to `fallback`. The plan is made at the first commander prompt
+    of each attempt; TheCrewGame calls bind() with itself, which is how the optimizer sees it.
+    """
+
+    def __init__(self, optimizer, fallback):
+        self.optimizer = optimizer
+        self.fallback = fallback
+        self.game = None
+        self.plan = None
+        self.attempt = None
+
+    def bind(self, game):
+        self.game = game
+        if hasattr(self.fallback, "bind"):
+            self.fallback.bind(game)
+
+    def __call__(self, prompt):
+        text = prompt.lower()
+        conditions = getattr(self.game, "condition", ())
+        if self.game is None or not ("commanders_decision" in conditions or "commanders_distribution" in conditions):
+            return self.fallback(prompt)
+        asked = re.search(r"player (\d+), do you want to take on all tasks", text)
+        volunteer = re.search(r"player (\d+), do you want task (\w+)\?", text)
+        give = re.search(r"commander, (?:who do you want to give task|which player do you want to assign task) (\w+) to", text)
+        take = re.search(r"commander, do you want to take on task (\w+)\?", text)
+        if not (asked or volunteer or give or take):
+            return self.fallback(prompt)
+        if self.attempt != self.game.attempts:
+            self.plan = self.optimizer.best(self.game)
+            self.attempt = self.game.attempts
+        assignment = self.plan.assignment
+        if asked:
+            return "yes" if int(asked.group(1)) - 1 == next(iter(assignment.values())) else "no"
+        if volunteer:
+            return "yes" if assignment[volunteer.group(2).upper()] == int(volunteer.group(1)) - 1 else "no"
+        if give:
+            return str(assignment[give.group(1).upper()] + 1)
+        return "yes" if assignment[take.group(1).upper()] == commander_of(self.game) else "no"
@@ -0,0 +1,41 @@
+import pytest
+
+from commander import CommanderInput, CommanderOptimizer, candidate_assignments
+from simulate import SetupResponder
+from the_crew_game import TheCrewGame, quiet
+
+
+@pytest.mark.parametrize("num_mission, num_players, count", [
+    (8, 2, 2), (8, 4, 3), (9, 2, 54), (9, 3, 36), (9, 4, 24), (9, 5, 120),
+])
+def test_candidates_are_every_reachable_assignment(num_mission, num_players, count):
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=1, input_fn=SetupResponder(), print_fn=quiet)
+    candidates = candidate_assignments(game)
+    assert len(candidates) == count == len({tuple(sorted(candidate.items())) for candidate in candidates})
+    assert game.assigned_tasks in candidates  # SetupResponder's answers reach one of them
+
+
+@pytest.mark.parametrize("num_mission", [8, 9])
+@pytest.mark.parametrize("num_players", [2, 3, 4])
+def test_prompts_are_answered_with_the_plan(num_mission, num_players):
+    optimizer = CommanderOptimizer(deals=4, time_limit=None)
+    responder = CommanderInput(optimizer, SetupResponder())
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=3, input_fn=responder, print_fn=quiet)
+    assert game.assigned_tasks == responder.plan.assignment
+    assert 0 <= responder.plan.success <= 1 and responder.plan.playouts >= 4
+
+    # The same setup is planned once
+    assert optimizer.best(game) is responder.plan and optimizer.stats["cache_hits"] == 1
+
+
+def test_other_questions_go_to_the_fallback():
+    questions = []
+
+    def fallback(prompt):
+        questions.append(prompt)
+        return "no"
+
+    responder = CommanderInput(CommanderOptimizer(deals=4), fallback)
+    TheCrewGame(num_players=3, num_mission=1, seed=0, input_fn=responder, print_fn=quiet)
+    assert questions == ["Do you want to send a distress signal? (yes/no): "]
+    assert responder.plan is None
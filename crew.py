@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+crew: one command for the simulator, the LLM driver and the offline tools.
+
+    python crew.py simulate --agent heuristic --engine sim --games 1000 --workers 8
+    python crew.py rollout --players 3 --mission 2 --seed 42
+    python crew.py replay data/heuristic --game 12
+    python crew.py solve deal --players 4 --mission 8 --seed 12
+    python crew.py sweep work sweeps/heuristic --processes 16
+    python crew.py serve --port 8765
+    python crew.py bench --runs 20 --budget-ms 150
+
+Every subcommand is the command line of one module (simulate.py, rollout.py, replay.py,
+deal_index.py, sweep.py, server.py), imported only once the subcommand is known: only
+`rollout` loads rollout.py and with it llm_client, dotenv and the API settings. Short simulation jobs are launched
+thousands of times by schedulers, so the offline subcommands are kept to a cold start of
+tens of milliseconds (heavy modules such as multiprocessing, zipfile and NumPy are imported
+where they are used). `bench` measures that cold start in fresh interpreters, checks that
+no LLM or NumPy module was imported, and exits non-zero past --budget-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+COMMANDS = {
+    "simulate": ("simulate", "Play bots through the engine and report success rates"),
+    "rollout": ("rollout", "Play one mission with the model in every seat (needs the API settings)"),
+    "replay": ("replay", "Replay a recorded game or a differential case with the engine's commentary"),
+    "solve": ("deal_index", "Solve deals with full information: one seed, or a deal pool's index"),
+    "sweep": ("sweep", "Shard a large simulation over machines sharing a directory"),
+    "serve": ("server", "Host game sessions over HTTP for agents in other processes"),
+    "bench": (None, "Measure the cold start of the offline subcommands"),
+}
+OFFLINE = ("simulate", "replay", "solve", "sweep", "serve")
+HEAVY = ("rollout", "llm_client", "openai", "httpx", "dotenv", "numpy")  # Must not load offline
+BENCH_JOBS = {
+    "python": ["-c", "pass"],  # The interpreter alone, for reference
+    "simulate --help": ["simulate", "--help"],
+    "replay --help": ["replay", "--help"],
+    "solve --help": ["solve", "--help"],
+    "simulate (1 game)": ["simulate", "--agent", "heuristic", "--engine", "sim", "--games", "1", "--missions", "1"],
+}
+
+
+def load(command):
+    """The module behind a subcommand."""
+    return __import__(COMMANDS[command][0])
+
+
+def heavy_modules(command):
+    """HEAVY modules a fresh interpreter has imported after loading the subcommand's module."""
+    script = f"import sys, crew; crew.load({command!r}); print(' '.join(sorted(set(crew.HEAVY) & set(sys.modules))))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    return output.split()
+
+
+def cold_start(arguments, runs):
+    """Wall-clock seconds of `runs` fresh interpreters running crew.py with these arguments."""
+    command = [sys.executable] + (arguments if arguments[0] == "-c" else [os.path.abspath(__file__)] + arguments)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench(runs=10, budget_ms=None):
+    """Print the cold-start table; returns the exit status."""
+    status = 0
+    print(f"{'Command':<20} {'Min ms':>7} {'Median ms':>10}  Heavy modules")
+    for name, arguments in BENCH_JOBS.items():
+        times = cold_start(arguments, runs)
+        command = arguments[0] if arguments[0] in COMMANDS else None
+        heavy = heavy_modules(command) if command else []
+        median = statistics.median(times) * 1000
+        over = budget_ms is not None and command is not None and median > budget_ms
+        status |= bool(heavy) or over
+        print(f"{name:<20} {min(times) * 1000:>7.0f} {median:>10.0f}  {', '.join(heavy) or '-'}{'  over budget' if over else ''}")
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="crew", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(f"  {name:<9} {text}" for name, (_, text) in COMMANDS.items()))
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER, help="Passed on to the subcommand (try `crew <command> --help`)")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        options = argparse.ArgumentParser(prog="crew bench", description=COMMANDS["bench"][1])
+        options.add_argument("--runs", type=int, default=10, help="Fresh interpreters per command")
+        options.add_argument("--budget-ms", type=float, default=None, help="Fail when an offline median is slower")
+        options = options.parse_args(args.arguments)
+        return bench(options.runs, options.budget_ms)
+    sys.argv = [f"crew {args.command}"] + args.arguments
+    return load(args.command).main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
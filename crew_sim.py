@@ -0,0 +1,340 @@
+import random
+
+from game_config import GameplayError
+from the_crew_game import DECK, MISSIONS, TheCrewGame
+TASK_TYPES = ("simple", "numbered", "arrow", "omega")
+
+
+def legal_moves(game, player_id):
+    """Return the cards player_id may play right now (radio moves are not included).
+
+    Works for both TheCrewGame and SimGame since it only reads hands and the current trick.
+    """
+    hand = game.hands[player_id]
+    if game.trick:
+        lead_suit = game.trick[0][1][0]
+        follow = [card for card in hand if card[0] == lead_suit]
+        if follow:
+            return follow
+    return list(hand)
+
+
+def trick_size(num_players):
+    """Number of cards in a complete trick (JARVIS plays as a third seat with 2 players)."""
+    return 3 if num_players == 2 else num_players
+
+
+def deal(num_players, num_mission, seed):
+    """
+    Draw task cards and hands for a seed.
+
+    Reproduces what TheCrewGame(seed=seed) does with its own generator: task cards are
+    drawn first, then the generator is reseeded and the deck shuffled in _deal_cards.
+    Returns (tasks, hands, jarvis_hands) with jarvis_hands None unless num_players == 2.
+    """
+    rng = random.Random(seed)
+    all_cards = list(DECK)
+    tasks = []
+    for task_type in MISSIONS[num_mission].tasks:
+        if task_type in TASK_TYPES:
+            card = rng.choice(all_cards)
+            tasks.append(card)
+            all_cards.remove(card)
+
+    deck = list(DECK)
+    random.Random(seed).shuffle(deck)
+    return (tasks,) + split_deck(deck, num_players)
+
+
+def split_deck(deck, num_players):
+    """Split a shuffled deck into hands exactly like TheCrewGame._deal_cards."""
+    if num_players == 2:
+        jarvis_deck = [card for card in deck if card != 'R4']
+        jarvis_hands = {'face_up': jarvis_deck[:7], 'face_down': jarvis_deck[7:14]}
+        hands = {i: [] for i in range(2)}
+        for i, card in enumerate(['R4'] + jarvis_deck[14:]):
+            hands[i % 2].append(card)
+        return hands, jarvis_hands
+    hands = {i: [] for i in range(num_players)}
+    for i, card in enumerate(deck):
+        hands[i % num_players].append(card)
+    return hands, None
+
+
+def commander_assignment(num_players, condition, tasks, turn_order, commander, assigned_tasks):
+    """
+    Task assignment TheCrewGame ends up with when simulate.SetupResponder answers the commander's prompts.
+
+    With commanders_decision nobody volunteers and the commander gives every task to the
+    lowest-numbered other player. With commanders_distribution every player volunteers
+    and the commander gives each task to the first eligible volunteer in turn order.
+    """
+    assigned_tasks = dict(assigned_tasks)
+    if "commanders_decision" in condition:
+        target = next(pid for pid in range(num_players) if pid != commander)
+        return {task: target for task in tasks}
+
+    tasks_per_player = len(tasks) // num_players
+    extra_tasks = len(tasks) % num_players
+    player_task_count = {pid: 0 for pid in turn_order}
+    for task in tasks:
+        volunteers = [pid for pid in turn_order
+                      if player_task_count[pid] < tasks_per_player or (player_task_count[pid] == tasks_per_player and extra_tasks > 0)]
+        eligible = [pid for pid in volunteers if player_task_count[pid] < tasks_per_player + (1 if extra_tasks > 0 else 0)]
+        if eligible:
+            target = eligible[0]
+            player_task_count[target] += 1
+            if player_task_count[target] > tasks_per_player:
+                extra_tasks -= 1
+        else:
+            # The commander declines and names the lowest-numbered other player
+            target = next(pid for pid in range(num_players) if pid != commander)
+            player_task_count[target] += 1
+        assigned_tasks[task] = target
+    return assigned_tasks
+
+
+class SimGame:
+    """
+    Fast, quiet, single-attempt version of TheCrewGame for bots and batch simulation.
+
+    The attribute names and the trick/task rules mirror TheCrewGame.play and
+    TheCrewGame._process_trick, so agents can read either object. SimGame never prompts,
+    never prints and never restarts: a failed attempt simply ends the game.
+    """
+
+    def __init__(self, num_players, num_mission, hands, tasks, assigned_tasks, turn_order,
+                 jarvis_dictionary=None, condition=None):
+        mission = MISSIONS[num_mission]
+        self.num_players = num_players
+        self.num_mission = num_mission
+        self.hands = hands
+        self.tasks = list(tasks)
+        self.task_ordering = list(tasks)
+        self.task_token_map = {task: token for task, token in zip(self.task_ordering, mission.tokens)}
+        self.assigned_tasks = dict(assigned_tasks)
+        self.turn_order = list(turn_order)
+        self.jarvis_dictionary = jarvis_dictionary
+        self.condition = mission.condition if condition is None else condition
+        self.deadzone = "deadzone" in self.condition
+        self.disruption = "disruption" in self.condition
+        self.completed_tasks = []
+        self.trick = []
+        self.previous_trick = []
+        self.played_cards = []
+        self.radio_used = [False] * num_players
+        self.radio_clues = {}
+        self.failed = False
+        self.failure = None  # Why the attempt failed, in TheCrewGame's words
+        self.turn = 1
+
+    @classmethod
+    def from_seed(cls, num_players=4, num_mission=8, seed=0):
+        """Deal a fresh game the way TheCrewGame would with the same seed and default setup answers."""
+        return cls.from_cards(num_players, num_mission, *deal(num_players, num_mission, seed))
+
+    @classmethod
+    def from_deal(cls, num_mission, pool_deal):
+        """Build the game TheCrewGame(deal=pool_deal) starts with (see deal_pool.py)."""
+        tasks = pool_deal.tasks(len(MISSIONS[num_mission].tasks))
+        return cls.from_cards(pool_deal.num_players, num_mission, tasks, *pool_deal.hands())
+
+    @classmethod
+    def from_cards(cls, num_players, num_mission, tasks, hands, jarvis_hands):
+        """Set up turn order and task assignment for dealt cards as TheCrewGame does with default setup answers."""
+        jarvis_dictionary = None
+        if jarvis_hands:
+            hands[2] = list(jarvis_hands['face_up'])
+            jarvis_dictionary = dict(zip(jarvis_hands['face_up'], jarvis_hands['face_down']))
+        r4_holder = next(pid for pid, hand in hands.items() if 'R4' in hand)
+        if num_players == 2:
+            turn_order = [r4_holder, 2, (r4_holder + 1) % 2]
+        else:
+            turn_order = [(r4_holder + i) % num_players for i in range(num_players)]
+        assigned_tasks = {task: turn_order[i % num_players] for i, task in enumerate(tasks)}
+        condition = MISSIONS[num_mission].condition
+        if "commanders_decision" in condition or "commanders_distribution" in condition:
+            assigned_tasks = commander_assignment(num_players, condition, tasks, turn_order, r4_holder, assigned_tasks)
+        return cls(num_players, num_mission, hands, tasks, assigned_tasks, turn_order, jarvis_dictionary)
+
+    @classmethod
+    def from_game(cls, game, hands=None, jarvis_dictionary=None):
+        """
+        Snapshot a TheCrewGame (or SimGame) position.
+
+        hands/jarvis_dictionary replace the true hidden information, which is how
+        determinized bots plug in a sampled deal.
+        """
+        sim = cls.__new__(cls)
+        sim.num_players = game.num_players
+        sim.num_mission = getattr(game, "num_mission", None)
+        sim.hands = {pid: list(hand) for pid, hand in (hands if hands is not None else game.hands).items()}
+        sim.tasks = list(game.tasks)
+        sim.task_ordering = list(game.task_ordering)
+        sim.task_token_map = game.task_token_map
+        sim.assigned_tasks = game.assigned_tasks
+        sim.turn_order = list(game.turn_order)
+        if jarvis_dictionary is None and game.num_players == 2:
+            jarvis_dictionary = game.jarvis_dictionary
+        sim.jarvis_dictionary = dict(jarvis_dictionary) if jarvis_dictionary is not None else None
+        sim.condition = game.condition
+        sim.deadzone = game.deadzone
+        sim.disruption = game.disruption
+        sim.completed_tasks = list(game.completed_tasks)
+        sim.trick = list(game.trick)
+        sim.previous_trick = list(game.previous_trick)
+        sim.played_cards = list(game.played_cards)
+        sim.radio_used = list(game.radio_used)
+        sim.radio_clues = dict(game.radio_clues)
+        sim.failed = game.failed
+        sim.failure = getattr(game, "failure", None)
+        sim.turn = game.turn
+        return sim
+
+    def copy(self):
+        return SimGame.from_game(self)
+
+    @property
+    def valid_players(self):
+        return tuple(range(self.num_players))
+
+    def whose_turn(self):
+        return self.turn_order[0]
+
+    def success(self):
+        return not self.failed and set(self.completed_tasks) == set(self.task_ordering)
+
+    def is_over(self):
+        """The attempt is over once it failed, succeeded, or the player to move has no cards left."""
+        return self.failed or self.success() or not self.hands[self.turn_order[0]]
+
+    def scores(self):
+        success = float(self.success())
+        return {i: success for i in range(self.num_players)}
+
+    def play(self, move, player_id=0):
+        if self.num_players == 2 and player_id == 2:
+            self._play_jarvis(move.upper())
+            return
+
+        if player_id != self.turn_order[0]:
+            raise GameplayError(f"Not player {player_id}'s turn.")
+
+        move = move.lower()
+        if move.startswith("radio"):
+            self._play_radio(move, player_id)
+            return
+
+        move = move.upper()
+        hand = self.hands[player_id]
+        if self.trick:
+            lead_suit = self.trick[0][1][0]
+            if move[0] != lead_suit and any(card[0] == lead_suit for card in hand):
+                raise GameplayError(f"You must follow suit with {lead_suit} if possible.")
+        if move not in hand:
+            raise GameplayError(f"Card {move} not in hand.")
+
+        hand.remove(move)
+        self.trick.append((player_id, move))
+        self.played_cards.append((player_id, move))
+        self.turn_order = self.turn_order[1:]
+        if len(self.trick) == trick_size(self.num_players):
+            self._process_trick()
+
+    def _play_radio(self, move, player_id):
+        """Same radio validation as TheCrewGame.play."""
+        if self.disruption:
+            raise GameplayError("Radio communication is disabled due to disruption. You cannot use the radio.")
+        if not move.startswith("radio "):
+            raise GameplayError("Invalid input format. Please use 'radio <clue_type> <card>'.")
+        if self.radio_used[player_id]:
+            raise GameplayError("Radio clue already used.")
+        move_parts = move.split()
+        if len(move_parts) != 3:
+            raise GameplayError("Invalid input format. Please use 'radio <clue_type> <card>'.")
+        clue_type, clue_card = move_parts[1], move_parts[2]
+        if self.deadzone:
+            self.radio_clues[player_id] = (clue_card, "deadzone")
+            return
+        if clue_type not in ['highest', 'lowest', 'only']:
+            raise GameplayError("Invalid clue type. Please enter 'highest', 'lowest', or 'only'.")
+        clue_card = clue_card.upper()
+        hand = self.hands[player_id]
+        if clue_card not in hand:
+            raise GameplayError(f"Card {clue_card} not in hand.")
+        color_nums = [int(c[1:]) for c in hand if c[0] == clue_card[0]]
+        card_num = int(clue_card[1:])
+        if len(color_nums) > 1 and card_num != max(color_nums) and card_num != min(color_nums):
+            raise GameplayError(f"Card {clue_card} cannot be communicated as it is neither highest, lowest, nor the only card of that color.")
+        self.radio_clues[player_id] = (clue_card, clue_type)
+        self.radio_used[player_id] = True
+
+    def _play_jarvis(self, move):
+        """Mirror of TheCrewGame._handle_jarvis_play: play a face-up card and reveal the one beneath it."""
+        revealed = self.hands[2]
+        if move not in revealed:
+            raise GameplayError(f"Card {move} not in JARVIS's revealed cards.")
+        if self.trick:
+            lead_suit = self.trick[0][1][0]
+            if move[0] != lead_suit and any(card[0] == lead_suit for card in revealed):
+                raise GameplayError(f"JARVIS must follow suit with {lead_suit} if possible.")
+
+        revealed.remove(move)
+        self.trick.append((2, move))
+        self.played_cards.append((2, move))
+        self.turn_order = self.turn_order[1:]
+        hidden_card = self.jarvis_dictionary.pop(move)
+        if hidden_card != '':
+            revealed.append(hidden_card)
+            self.jarvis_dictionary[hidden_card] = ''
+        if len(self.trick) == 3:
+            self._process_trick()
+
+    def _process_trick(self):
+        """Trick winner and task bookkeeping, rule for rule as in TheCrewGame._process_trick."""
+        lead_suit = self.trick[0][1][0]
+
+        def card_strength(entry):
+            card = entry[1]
+            if card[0] == 'R':
+                return (2, int(card[1:]))
+            elif card[0] == lead_suit:
+                return (1, int(card[1:]))
+            return (0, 0)
+
+        winner = max(self.trick, key=card_strength)[0]
+        self.previous_trick = self.trick.copy()
+        seats = trick_size(self.num_players)
+        self.turn_order = [(winner + i) % seats for i in range(seats)]
+
+        token_map = self.task_token_map
+        for player, card in self.trick:
+            if card not in self.tasks:
+                continue
+            token = token_map[card]
+            numbered_remaining = any(token_map[t].startswith("numbered token") for t in self.tasks if t in token_map)
+            if token == "simple task" and numbered_remaining:
+                return self._fail(f"Cannot complete simple task {card} while numbered tasks remain. Mission failed!")
+            if token in TheCrewGame.ARROW_TOKENS and numbered_remaining:
+                return self._fail(f"Cannot complete arrow task {card} while numbered tasks remain. Mission failed!")
+            if token == TheCrewGame.OMEGA_TOKEN and len(self.completed_tasks) != len(self.task_ordering) - 1:
+                return self._fail(f"Omega task {card} must be completed last. Mission failed!")
+            if token == "simple task":
+                self.completed_tasks.append(card)
+                self.tasks.remove(card)
+                continue
+            expected_card = self.task_ordering[len(self.completed_tasks)]
+            if card != expected_card:
+                return self._fail(f"Task {card} was completed out of order. Mission failed!")
+            if winner != self.assigned_tasks[expected_card]:
+                return self._fail(f"Task {card} was won by Player {winner + 1}, but was assigned to "
+                                  f"Player {self.assigned_tasks[expected_card] + 1}. Mission failed!")
+            self.completed_tasks.append(card)
+            self.tasks.remove(card)
+
+        self.trick = []
+        self.turn += 1
+
+    def _fail(self, reason):
+        self.failed = True
+        self.failure = reason
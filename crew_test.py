@@ -0,0 +1,41 @@
+import json
+import sys
+
+import pytest
+
+import crew
+from differential import run_game
+from replay import load_case, replay
+from simulate import run
+from the_crew_game import quiet
+
+
+@pytest.mark.parametrize("command", crew.OFFLINE)
+def test_offline_commands_leave_heavy_modules_alone(command):
+    assert crew.heavy_modules(command) == []
+
+
+def test_subcommands_get_their_own_arguments(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", sys.argv)
+    crew.main(["simulate", "--agent", "random", "--engine", "sim", "--games", "2", "--missions", "1"])
+    assert "2 games in" in capsys.readouterr().out
+    crew.main(["solve", "deal", "--players", "4", "--mission", "1", "--seed", "3"])
+    assert "mission 1, 4 players, seed 3: winnable" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        crew.main(["simulate", "--no-such-option"])
+
+
+def test_replay_of_a_recorded_game_ends_the_same_way(tmp_path):
+    results = run("heuristic", [1, 4], 3, 3, engine="crew", record=tmp_path)
+    for index in range(len(results)):
+        case = load_case(str(tmp_path), index)
+        result = next(r for r in results if (r["mission"], r["seed"]) == (case["mission"], case["seed"]))
+        game = replay(case, print_fn=quiet)
+        assert (set(game.completed_tasks) == set(game.task_ordering)) == result["success"] == case["success"]
+
+
+def test_replay_restarts_between_attempts_like_the_harness():
+    moves, _ = run_game(3, 2, seed=5, invalid=0.0)
+    lines = []
+    game = replay(load_case(json.dumps({"players": 3, "mission": 2, "seed": 5, "moves": moves})), print_fn=lines.append)
+    assert game.attempts > 1 and any("Restarting mission" in line for line in lines)
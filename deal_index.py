@@ -0,0 +1,392 @@
+"""
+Winnable-deal index: a perfect-information verdict for every deal of a deal pool.
+
+    python deal_index.py build deals_3p.bin --missions 1 2 3 --workers 8
+    python deal_index.py info deals_3p.bin --missions 1 2 3
+    python deal_index.py deal --players 4 --mission 8 --seed 12
+
+For each (pool, mission) a file <pool>.m<mission>.idx holds, per deal, whether the mission
+can be completed when every hand is known (with the task assignment TheCrewGame gets from
+simulate.SetupResponder's answers) and the fewest tricks it takes. Deals are solved by
+DealSolver: heuristic playouts give a quick winning line, then iterative deepening on the
+number of tricks proves whether a shorter one exists. The search is budgeted per deal, so
+a deal is winnable (tricks exact or a range), lost, or unknown when the budget ran out;
+for unknown deals the tricks that were ruled out still give a lower bound.
+
+The file is a header, three bitsets (done, winnable, lost) and two byte arrays (lowest and
+highest possible trick counts, 255 for none), so a query is a couple of byte reads and
+the whole index of a million deals is about 2.4 MB. Building is split into chunks over a
+process pool; results are written as each chunk finishes and marked done afterwards, so
+an interrupted build resumes where it stopped. Deal i answers for seed i % len(pool), as
+simulate.py and tournament.py map seeds onto a pool.
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+from typing import NamedTuple
+
+from crew_sim import SimGame, legal_moves
+from deal_pool import DealPool, open_pool
+from heuristic import HeuristicAgent, heuristic_playout, rank
+from the_crew_game import CARD_INDEX, TheCrewGame
+import mock_missions
+
+
+MAGIC = b"CREWDIDX"
+VERSION = 1
+HEADER = struct.Struct("<8sHHHHQQI")  # magic, version, players, mission, reserved, count, pool seed, node budget
+NONE = 255  # No trick count known
+CHUNK = 64  # Deals per build job (a multiple of 8, so chunks own whole bitset bytes)
+
+UNKNOWN, WINNABLE, LOST = "unknown", "winnable", "lost"
+
+
+class Verdict(NamedTuple):
+    status: str
+    low: int  # Fewest tricks not ruled out (NONE when lost)
+    high: int  # Tricks of the shortest winning line found (NONE when none was found)
+    nodes: int
+
+
+class Budget(Exception):
+    pass
+
+
+def _task_counts(sim):
+    """Task cards still to be played, per seat (JARVIS's face-down ones included)."""
+    tasks = set(sim.tasks)
+    counts = {pid: sum(card in tasks for card in hand) for pid, hand in sim.hands.items()}
+    if sim.jarvis_dictionary:
+        counts[2] += sum(down in tasks for down in sim.jarvis_dictionary.values() if down)
+    return counts
+
+
+def _doomed(sim):
+    """The trick in progress already breaks a task-order rule, whoever wins it (as SimGame._process_trick checks)."""
+    token_map = sim.task_token_map
+    tasks = list(sim.tasks)
+    done = len(sim.completed_tasks)
+    for _, card in sim.trick:
+        if card not in tasks:
+            continue
+        token = token_map[card]
+        numbered_remaining = any(token_map[task].startswith("numbered token") for task in tasks if task in token_map)
+        if (token == "simple task" or token in TheCrewGame.ARROW_TOKENS) and numbered_remaining:
+            return True
+        if token == TheCrewGame.OMEGA_TOKEN and done != len(sim.task_ordering) - 1:
+            return True
+        if token != "simple task" and card != sim.task_ordering[done]:
+            return True
+        tasks.remove(card)
+        done += 1
+    return False
+
+
+class DealSolver:
+    """
+    Perfect-information verdict for a freshly dealt SimGame within `node_budget` searched trick positions.
+
+    within(k) is a depth-first search over whole tricks with a transposition table on trick
+    starts. It is pruned by three exact rules:
+    - every seat plays one card per trick, so a seat holding more than k task cards cannot
+      finish in k tricks, and a seat holding exactly k must play a task card now;
+    - a trick whose cards already break the task order is dropped as soon as it does;
+    - cards of one hand that are touching (no unplayed card of the suit between them) and
+      are not tasks are interchangeable, so only one of them is tried.
+    """
+
+    def __init__(self, node_budget=50_000, playouts=8, seed=0):
+        self.node_budget = node_budget
+        self.playouts = playouts
+        self.seed = seed
+        self.agent = HeuristicAgent(use_radio=False)
+
+    def solve(self, sim):
+        self.nodes = 0
+        self.memo = {}  # trick-start key -> (fewest tricks not ruled out, tricks known to suffice)
+        high = self._playout_bound(sim)
+        counts = _task_counts(sim)
+        low = max(counts.values())
+        longest = max(len(hand) for hand in sim.hands.values()) + (
+            sum(1 for down in sim.jarvis_dictionary.values() if down) if sim.jarvis_dictionary else 0)
+        try:
+            for tricks in range(low, (high if high is not None else longest + 1)):
+                if self._within(sim, tricks):
+                    high = tricks
+                    break
+                low = tricks + 1
+        except Budget:
+            return Verdict(WINNABLE if high is not None else UNKNOWN, low, high if high is not None else NONE, self.nodes)
+        if high is None:
+            return Verdict(LOST, NONE, NONE, self.nodes)
+        return Verdict(WINNABLE, high, high, self.nodes)
+
+    def _playout_bound(self, sim):
+        """Tricks taken by the shortest successful heuristic playout, or None."""
+        best = None
+        for index in range(self.playouts):
+            game = sim.copy()
+            if index == 0:
+                while not game.is_over():
+                    pid = game.whose_turn()
+                    game.play(self.agent.choose_move(game, pid), player_id=pid)
+            else:
+                heuristic_playout(game, random.Random(f"{self.seed}:{index}"), epsilon=0.2)
+            if game.success() and (best is None or game.turn - sim.turn < best):
+                best = game.turn - sim.turn
+        return best
+
+    def _key(self, sim):
+        hands = tuple(sum(1 << CARD_INDEX[card] for card in sim.hands[pid]) for pid in sorted(sim.hands))
+        hidden = tuple(sorted(sim.jarvis_dictionary.items())) if sim.jarvis_dictionary else None
+        return hands, hidden, tuple(sim.tasks), sim.turn_order[0]
+
+    def _within(self, sim, tricks):
+        """True if the mission can be finished within `tricks` more tricks from this trick start."""
+        if sim.success():
+            return True
+        if sim.is_over() or tricks == 0:
+            return False
+        counts = _task_counts(sim)
+        if max(counts.values()) > tricks:
+            return False
+        key = self._key(sim)
+        low, high = self.memo.get(key, (0, NONE))
+        if high <= tricks:
+            return True
+        if low > tricks:
+            return False
+        critical = {pid for pid, count in counts.items() if count == tricks}
+        unplayed = set(card for hand in sim.hands.values() for card in hand)
+        if sim.jarvis_dictionary:
+            unplayed.update(down for down in sim.jarvis_dictionary.values() if down)
+        found = self._trick(sim, tricks, critical, unplayed)
+        self.memo[key] = (low, tricks) if found else (tricks + 1, high)
+        return found
+
+    def _trick(self, sim, tricks, critical, unplayed):
+        self.nodes += 1
+        if self.nodes > self.node_budget:
+            raise Budget
+        pid = sim.whose_turn()
+        for move in self._moves(sim, pid, critical, unplayed):
+            child = sim.copy()
+            child.play(move, player_id=pid)
+            if child.trick and not child.failed:
+                if not _doomed(child) and self._trick(child, tricks, critical, unplayed):
+                    return True
+            elif not child.failed and self._within(child, tricks - 1):
+                return True
+        return False
+
+    def _moves(self, sim, pid, critical, unplayed):
+        legal = legal_moves(sim, pid)
+        tasks = set(sim.tasks)
+        if pid in critical:
+            return [card for card in legal if card in tasks]
+        moves = []
+        for card in sorted(legal, key=lambda card: (card[0], rank(card))):
+            previous = moves[-1] if moves else None
+            if (card not in tasks and previous is not None and previous not in tasks and previous[0] == card[0]
+                    and not any(other[0] == card[0] and rank(previous) < rank(other) < rank(card) for other in unplayed)):
+                moves[-1] = card  # Touching the previous card: the same move
+                continue
+            moves.append(card)
+        moves.sort(key=lambda card: card not in tasks)  # Task cards first
+        return moves
+
+
+def index_path(pool_path, mission):
+    return f"{pool_path}.m{mission}.idx"
+
+
+def _sections(count):
+    """Byte offsets of the done, winnable and lost bitsets and the low and high arrays."""
+    bits = (count + 7) // 8
+    offsets = {}
+    position = HEADER.size
+    for name, size in (("done", bits), ("winnable", bits), ("lost", bits), ("low", count), ("high", count)):
+        offsets[name] = position
+        position += size
+    return offsets, position
+
+
+def _solve_chunk(args):
+    pool_path, mission, start, stop, node_budget = args
+    pool = open_pool(pool_path)
+    solver = DealSolver(node_budget)
+    return start, [solver.solve(SimGame.from_deal(mission, pool.deal(index))) for index in range(start, stop)]
+
+
+class DealIndex:
+    """An index file for one (pool, mission); writable=True is used while building."""
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        with open(path, "r+b" if writable else "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, self.num_players, self.mission, _, self.count, self.pool_seed, self.node_budget = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} deal index")
+        self.offsets, size = _sections(self.count)
+        if len(self._mmap) < size:
+            raise ValueError(f"{path} is truncated")
+
+    @classmethod
+    def create(cls, path, pool, mission, node_budget):
+        """A new, empty index for `pool` (or the existing one if it was made for the same pool and mission)."""
+        if os.path.exists(path):
+            index = cls(path, writable=True)
+            if (index.num_players, index.mission, index.count, index.pool_seed) == (pool.num_players, mission, len(pool), pool.seed):
+                return index
+            index.close()
+            raise ValueError(f"{path} indexes a different pool or mission")
+        _, size = _sections(len(pool))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, pool.num_players, mission, 0, len(pool), pool.seed, node_budget))
+            f.write(bytes(size - HEADER.size))
+        os.replace(tmp_path, path)
+        return cls(path, writable=True)
+
+    def __len__(self):
+        return self.count
+
+    def _bit(self, name, index):
+        return self._mmap[self.offsets[name] + (index >> 3)] >> (index & 7) & 1
+
+    def _set_bit(self, name, index):
+        position = self.offsets[name] + (index >> 3)
+        self._mmap[position] |= 1 << (index & 7)
+
+    def done(self, index):
+        return bool(self._bit("done", index))
+
+    def verdict(self, seed):
+        """(status, low, high) for the deal a seed plays, or None if it has not been solved yet."""
+        index = seed % self.count
+        if not self._bit("done", index):
+            return None
+        status = WINNABLE if self._bit("winnable", index) else LOST if self._bit("lost", index) else UNKNOWN
+        return status, self._mmap[self.offsets["low"] + index], self._mmap[self.offsets["high"] + index]
+
+    def lost(self, seed):
+        """True only for deals proven lost."""
+        index = seed % self.count
+        return bool(self._bit("done", index) and self._bit("lost", index))
+
+    def min_tricks(self, seed):
+        """Fewest tricks that win the deal, or None when lost, unsolved or not known exactly."""
+        verdict = self.verdict(seed)
+        if verdict is None or verdict[0] != WINNABLE or verdict[1] != verdict[2]:
+            return None
+        return verdict[1]
+
+    def seeds(self, status=WINNABLE, tricks=None):
+        """Deal indexes with a verdict, optionally with exactly `tricks` fewest tricks (for stratified evaluation)."""
+        return [index for index in range(self.count)
+                if (verdict := self.verdict(index)) is not None and verdict[0] == status
+                and (tricks is None or (verdict[1] == verdict[2] == tricks))]
+
+    def summary(self):
+        """{"solved": n, "winnable": n, "lost": n, "unknown": n, "tricks": {tricks: deals}}"""
+        summary = {"solved": 0, WINNABLE: 0, LOST: 0, UNKNOWN: 0, "tricks": {}}
+        for index in range(self.count):
+            verdict = self.verdict(index)
+            if verdict is None:
+                continue
+            summary["solved"] += 1
+            summary[verdict[0]] += 1
+            if verdict[0] == WINNABLE and verdict[1] == verdict[2]:
+                summary["tricks"][verdict[1]] = summary["tricks"].get(verdict[1], 0) + 1
+        return summary
+
+    def _store(self, index, verdict):
+        self._mmap[self.offsets["low"] + index] = min(verdict.low, NONE)
+        self._mmap[self.offsets["high"] + index] = min(verdict.high, NONE)
+        if verdict.status == WINNABLE:
+            self._set_bit("winnable", index)
+        elif verdict.status == LOST:
+            self._set_bit("lost", index)
+
+    def close(self):
+        self._mmap.close()
+
+
+def build(pool_path, mission, workers=1, node_budget=50_000, path=None, progress=None):
+    """Solve every deal of the pool not yet in the index; returns the index path."""
+    path = path or index_path(pool_path, mission)
+    pool = DealPool(pool_path)
+    index = DealIndex.create(path, pool, mission, node_budget)
+    jobs = [(pool_path, mission, start, min(start + CHUNK, len(pool)), node_budget)
+            for start in range(0, len(pool), CHUNK)
+            if not all(index.done(i) for i in range(start, min(start + CHUNK, len(pool))))]
+    pool.close()
+
+    def store(start, verdicts):
+        for offset, verdict in enumerate(verdicts):
+            index._store(start + offset, verdict)
+        for offset in range(len(verdicts)):
+            index._set_bit("done", start + offset)  # Only after the results, so a crash never leaves half a chunk done
+        index._mmap.flush()
+        if progress:
+            progress(start + len(verdicts))
+
+    try:
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(workers) as executor:
+                for start, verdicts in executor.map(_solve_chunk, jobs):
+                    store(start, verdicts)
+        else:
+            for job in jobs:
+                store(*_solve_chunk(job))
+    finally:
+        index.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("build", "Solve the pool's deals (resumes an interrupted build)"), ("info", "Summarise the indexes")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("pool")
+        command.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+        if name == "build":
+            command.add_argument("--workers", type=int, default=1)
+            command.add_argument("--node-budget", type=int, default=50_000, help="Trick positions searched per deal")
+    deal = commands.add_parser("deal", help="Solve the deal of one seed")
+    deal.add_argument("--players", type=int, default=3)
+    deal.add_argument("--mission", type=int, default=1)
+    deal.add_argument("--seed", type=int, default=0)
+    deal.add_argument("--node-budget", type=int, default=50_000, help="Trick positions searched")
+    args = parser.parse_args()
+
+    if args.command == "deal":
+        verdict = DealSolver(args.node_budget).solve(SimGame.from_seed(args.players, args.mission, args.seed))
+        if verdict.status == LOST:
+            tricks = ""
+        elif verdict.high == NONE:
+            tricks = f", at least {verdict.low} tricks"
+        else:
+            tricks = f" in {verdict.low if verdict.low == verdict.high else f'{verdict.low}-{verdict.high}'} tricks"
+        print(f"mission {args.mission}, {args.players} players, seed {args.seed}: {verdict.status}{tricks} ({verdict.nodes:,} nodes)")
+        return
+    for mission in args.missions:
+        if args.command == "build":
+            build(args.pool, mission, args.workers, args.node_budget,
+                  progress=lambda done: print(f"\rmission {mission}: {done:,} deals", end="", flush=True))
+            print()
+        index = DealIndex(index_path(args.pool, mission))
+        summary = index.summary()
+        tricks = ", ".join(f"{tricks}: {deals}" for tricks, deals in sorted(summary["tricks"].items()))
+        print(f"mission {mission}: {summary['solved']:,}/{len(index):,} solved, {summary[WINNABLE]:,} winnable, "
+              f"{summary[LOST]:,} lost, {summary[UNKNOWN]:,} unknown; fewest tricks {{{tricks}}}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+import deal_index
+from crew_sim import SimGame
+from deal_index import LOST, NONE, UNKNOWN, WINNABLE, DealIndex, DealSolver, Verdict, build, index_path
+from deal_pool import generate
+from endgame import EndgameSolver
+from the_crew_game import DECK, MISSIONS
+from tournament import Tournament, report
+
+
+def small_deals(num_players, num_mission, count):
+    """Random three-card deals, small enough for the endgame solver."""
+    deals = []
+    for seed in range(count):
+        rng = random.Random(seed)
+        cards = ["R4"] + rng.sample([card for card in DECK if card != "R4"], 3 * num_players - 1)
+        rng.shuffle(cards)
+        hands = {pid: cards[3 * pid:3 * pid + 3] for pid in range(num_players)}
+        tasks = [card for card in cards if card[0] != "R"][:len(MISSIONS[num_mission].tokens)]
+        deals.append(SimGame.from_cards(num_players, num_mission, tasks, hands, None))
+    return deals
+
+
+@pytest.mark.parametrize("num_players, num_mission", [(3, 1), (3, 2), (4, 5), (4, 8)])
+def test_verdicts_agree_with_the_endgame_solver(num_players, num_mission):
+    endgame = EndgameSolver(max_cards=3)
+    solver = DealSolver(node_budget=10 ** 6)
+    statuses = set()
+    for sim in small_deals(num_players, num_mission, 40):
+        verdict = solver.solve(sim)
+        line = endgame.solve(sim)
+        assert verdict.status == (WINNABLE if line is not None else LOST)
+        if line is not None:
+            assert verdict.low == verdict.high <= len(line) // num_players
+        statuses.add(verdict.status)
+    assert statuses == {WINNABLE, LOST}
+
+
+def test_budget_gives_a_lower_bound():
+    sim = SimGame.from_seed(4, 2, 1)
+    verdict = DealSolver(node_budget=50, playouts=0).solve(sim)
+    assert verdict.status == UNKNOWN and verdict.high == NONE and verdict.low >= 1
+
+
+def test_index_round_trip_and_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(deal_index, "CHUNK", 8)
+    pool = tmp_path / "deals.bin"
+    generate(pool, 3, count=21, seed=5)
+    verdicts = {index: Verdict(status, low, high, 0) for index, (status, low, high) in
+                enumerate([(WINNABLE, 4, 4), (LOST, NONE, NONE), (UNKNOWN, 6, NONE), (WINNABLE, 3, 5)] * 6)}
+    monkeypatch.setattr(deal_index, "_solve_chunk", lambda job: (job[2], [verdicts[i] for i in range(job[2], job[3])]))
+
+    path = build(pool, 1, node_budget=100)
+    assert path == index_path(pool, 1)
+    index = DealIndex(path)
+    assert len(index) == 21 and index.node_budget == 100
+    assert index.verdict(0) == (WINNABLE, 4, 4) and index.min_tricks(0) == 4
+    assert index.lost(1) and index.min_tricks(1) is None
+    assert index.verdict(2) == (UNKNOWN, 6, NONE) and not index.lost(2)
+    assert index.min_tricks(3) is None and index.min_tricks(21) == 4  # Seeds wrap around the pool
+    assert index.seeds(LOST) == list(range(1, 21, 4))
+    assert index.seeds(WINNABLE, tricks=4) == list(range(0, 21, 4))
+    assert index.summary() == {"solved": 21, WINNABLE: 11, LOST: 5, UNKNOWN: 5, "tricks": {4: 6}}
+    index.close()
+
+    # A finished index is not solved again; one that is missing a chunk only solves that chunk
+    solved = []
+    monkeypatch.setattr(deal_index, "_solve_chunk", lambda job: solved.append(job[2]) or (job[2], [verdicts[i] for i in range(job[2], job[3])]))
+    build(pool, 1)
+    assert solved == []
+    index = DealIndex(path, writable=True)
+    index._mmap[index.offsets["done"] + 1] = 0
+    index.close()
+    build(pool, 1)
+    assert solved == [8]
+    assert DealIndex(path).summary()["solved"] == 21
+
+
+def test_workers_give_the_same_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(deal_index, "CHUNK", 8)
+    pool = tmp_path / "deals.bin"
+    generate(pool, 3, count=12, seed=2)
+    serial = build(pool, 1, workers=1, node_budget=2000, path=tmp_path / "serial.idx")
+    parallel = build(pool, 1, workers=2, node_budget=2000, path=tmp_path / "parallel.idx")
+    assert open(serial, "rb").read() == open(parallel, "rb").read()
+    with pytest.raises(ValueError):
+        build(pool, 2, path=serial)  # Made for another mission
+
+
+@pytest.mark.parametrize("attempts", [1, 2])
+def test_tournament_report_leaves_out_forced_failures(tmp_path, monkeypatch, attempts):
+    pool = tmp_path / "deals.bin"
+    generate(pool, 3, count=4, attempts=attempts, seed=1)
+    monkeypatch.setattr(deal_index, "_solve_chunk", lambda job: (
+        job[2], [Verdict(LOST if i % 2 else WINNABLE, 3, 3, 0) for i in range(job[2], job[3])]))
+    build(pool, 1)
+    tournament = Tournament(tmp_path / "run", ["random"], [1], [3], games=6, pool_path=str(pool))
+    tournament.run(chunk_size=3)
+    results = tournament.table()[("random", 1, 3)]
+    # Only attempts dealt the pool deal's first hands are the position the index solved
+    for r in results:
+        assert r["indexed_attempts"] == list(range(1, r["attempts"] + 1, attempts))
+
+    lost = [r for r in results if r["seed"] % 4 % 2]
+    excluded = sum(not r["success"] and attempts == 1 for r in lost)
+    uncharged = sum(a < r["attempts"] or not r["success"] for r in lost if attempts == 2 or r["success"] for a in r["indexed_attempts"])
+    text = report(tournament, exclude_lost=True)
+    assert excluded + uncharged > 0
+    assert f"{excluded} games on provably lost deals excluded, {uncharged} forced failures" in text
+    assert "excluded" not in report(tournament)
@@ -0,0 +1,211 @@
+"""
+Pre-generated deal pools stored in a memory-mapped binary file.
+
+    python deal_pool.py generate deals_3p.bin --players 3 --count 1000000 --workers 8
+    python deal_pool.py info deals_3p.bin
+
+Each record holds the task selection (MAX_TASKS card indexes, a mission uses the first
+ones it needs) followed by one owner byte per card of DECK for every attempt the record
+covers. Owner bytes are player ids, or JARVIS_UP + slot / JARVIS_DOWN + slot for JARVIS's
+paired face-up and face-down cards in 2-player games. Every process that opens the same
+file shares the page cache, so a pool costs no extra memory per worker.
+
+TheCrewGame(num_players, num_mission, deal=pool.deal(i)) and SimGame.from_deal() build a
+game straight from a record without touching the random module.
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import threading
+
+from crew_sim import DECK, split_deck
+from the_crew_game import CARD_INDEX
+
+
+MAGIC = b"CREWDEAL"
+VERSION = 1
+HEADER = struct.Struct("<8sHHHHQQ")  # magic, version, players, max tasks, attempts per record, count, seed
+MAX_TASKS = 8  # More than any mission in mock_missions uses
+JARVIS_UP = 0x10
+JARVIS_DOWN = 0x20
+CHUNK = 10_000  # Records per generation job; chunk k always uses the same RNG stream
+
+
+def record_size(attempts):
+    size = MAX_TASKS + attempts * len(DECK)
+    return (size + 7) // 8 * 8
+
+
+def owner_bytes(hands, jarvis_hands):
+    """Encode a _deal_cards result as one owner byte per card in DECK order."""
+    owners = bytearray(len(DECK))
+    for pid, hand in hands.items():
+        for card in hand:
+            owners[CARD_INDEX[card]] = pid
+    if jarvis_hands:
+        for slot, (up, down) in enumerate(zip(jarvis_hands['face_up'], jarvis_hands['face_down'])):
+            owners[CARD_INDEX[up]] = JARVIS_UP + slot
+            owners[CARD_INDEX[down]] = JARVIS_DOWN + slot
+    return owners
+
+
+def decode_hands(owners, num_players):
+    """Owner bytes back to the (hands, jarvis_hands) pair TheCrewGame._deal_cards returns."""
+    if num_players == 2:
+        hands = {0: [], 1: []}
+        face_up = [None] * 7
+        face_down = [None] * 7
+        for card, owner in zip(DECK, owners):
+            if owner >= JARVIS_DOWN:
+                face_down[owner - JARVIS_DOWN] = card
+            elif owner >= JARVIS_UP:
+                face_up[owner - JARVIS_UP] = card
+            else:
+                hands[owner].append(card)
+        return hands, {'face_up': face_up, 'face_down': face_down}
+    hands = {pid: [] for pid in range(num_players)}
+    for card, owner in zip(DECK, owners):
+        hands[owner].append(card)
+    return hands, None
+
+
+def _generate_chunk(args):
+    num_players, attempts, seed, chunk, count = args
+    rng = random.Random(f"{seed}:{chunk}")
+    size = record_size(attempts)
+    out = bytearray(size * count)
+    deck = list(range(len(DECK)))
+    seats = [position % num_players for position in range(len(DECK))]  # Round-robin deal of the shuffled deck
+    for i in range(count):
+        offset = i * size
+        out[offset:offset + MAX_TASKS] = bytes(rng.sample(deck, MAX_TASKS))
+        for attempt in range(attempts):
+            rng.shuffle(deck)
+            start = offset + MAX_TASKS + attempt * len(DECK)
+            if num_players == 2:
+                out[start:start + len(DECK)] = owner_bytes(*split_deck([DECK[card] for card in deck], 2))
+                continue
+            for card, seat in zip(deck, seats):
+                out[start + card] = seat
+    return bytes(out)
+
+
+def generate(path, num_players, count, attempts=1, seed=0, workers=1):
+    """
+    Write `count` deal records for `num_players` to path.
+
+    Records are produced in chunks with their own RNG streams, so the file only depends on
+    (num_players, count, attempts, seed), whatever the number of workers.
+    """
+    jobs = [(num_players, attempts, seed, chunk, min(CHUNK, count - chunk * CHUNK))
+            for chunk in range((count + CHUNK - 1) // CHUNK)]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, num_players, MAX_TASKS, attempts, count, seed))
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(workers) as pool:
+                for block in pool.map(_generate_chunk, jobs):
+                    f.write(block)
+        else:
+            for job in jobs:
+                f.write(_generate_chunk(job))
+    os.replace(tmp_path, path)
+
+
+class Deal:
+    """One record of a pool; what TheCrewGame needs instead of its RNG."""
+
+    __slots__ = ("pool", "index")
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+
+    @property
+    def num_players(self):
+        return self.pool.num_players
+
+    def tasks(self, count):
+        """The first `count` task cards of the record, in draw order."""
+        offset = self.pool.offset(self.index)
+        return [DECK[i] for i in self.pool.data[offset:offset + count]]
+
+    def owners(self, attempt=1):
+        """Zero-copy view of the owner bytes for an attempt (records wrap around after their last attempt)."""
+        start = self.pool.offset(self.index) + MAX_TASKS + ((attempt - 1) % self.pool.attempts) * len(DECK)
+        return self.pool.data[start:start + len(DECK)]
+
+    def hands(self, attempt=1):
+        return decode_hands(self.owners(attempt), self.pool.num_players)
+
+
+class DealPool:
+    """Read-only memory-mapped view of a file written by generate()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.num_players, max_tasks, self.attempts, self.count, self.seed = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or max_tasks != MAX_TASKS:
+            raise ValueError(f"{path} is not a version {VERSION} deal pool")
+        self.record_size = record_size(self.attempts)
+        self.data = memoryview(self._mmap)
+        if len(self.data) < HEADER.size + self.count * self.record_size:
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(f"Deal {index} is outside a pool of {self.count}")
+        return HEADER.size + index * self.record_size
+
+    def deal(self, index):
+        return Deal(self, index)
+
+    def close(self):
+        self.data.release()
+        self._mmap.close()
+
+
+_open_pools = {}
+_open_lock = threading.Lock()
+
+
+def open_pool(path):
+    """Open a pool once per process and reuse it (workers call this per job, possibly from threads)."""
+    with _open_lock:
+        pool = _open_pools.get(path)
+        if pool is None:
+            pool = _open_pools[path] = DealPool(path)
+        return pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="Write a new pool")
+    gen.add_argument("path")
+    gen.add_argument("--players", type=int, default=3)
+    gen.add_argument("--count", type=int, default=100_000)
+    gen.add_argument("--attempts", type=int, default=1, help="Deals per record, used by successive attempts")
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--workers", type=int, default=1)
+    info = commands.add_parser("info", help="Describe a pool")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.path, args.players, args.count, args.attempts, args.seed, args.workers)
+    pool = DealPool(args.path)
+    print(f"{args.path}: {len(pool):,} deals for {pool.num_players} players, {pool.attempts} attempt(s) per record, "
+          f"seed {pool.seed}, {os.path.getsize(args.path):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
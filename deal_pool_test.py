@@ -0,0 +1,60 @@
+from unittest.mock import patch
+import contextlib
+import io
+import random
+
+import pytest
+
+import deal_pool
+from crew_sim import SimGame, split_deck
+from deal_pool import DealPool, decode_hands, generate, owner_bytes
+from simulate import SetupResponder
+from the_crew_game import TheCrewGame
+
+
+def make_pool_game(num_players, num_mission, deal):
+    with patch('builtins.input', side_effect=SetupResponder()), contextlib.redirect_stdout(io.StringIO()):
+        return TheCrewGame(num_players=num_players, num_mission=num_mission, deal=deal)
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5])
+def test_owner_bytes_roundtrip(num_players):
+    deck = list(deal_pool.DECK)
+    random.Random(num_players).shuffle(deck)
+    hands, jarvis_hands = split_deck(deck, num_players)
+    decoded_hands, decoded_jarvis = decode_hands(owner_bytes(hands, jarvis_hands), num_players)
+    assert {pid: sorted(hand) for pid, hand in decoded_hands.items()} == {pid: sorted(hand) for pid, hand in hands.items()}
+    assert decoded_jarvis == jarvis_hands  # Face-up/face-down pairing survives
+
+
+@pytest.mark.parametrize("num_players, num_mission", [(2, 10), (3, 8), (4, 9), (5, 3)])
+def test_game_from_pool_matches_sim_and_leaves_random_alone(tmp_path, num_players, num_mission):
+    path = tmp_path / "deals.bin"
+    generate(path, num_players, count=5, attempts=2, seed=3)
+    pool = DealPool(path)
+    for index in range(len(pool)):
+        state = random.getstate()
+        game = make_pool_game(num_players, num_mission, pool.deal(index))
+        assert random.getstate() == state
+        sim = SimGame.from_deal(num_mission, pool.deal(index))
+        assert game.task_ordering == sim.task_ordering
+        assert game.hands == sim.hands
+        assert game.turn_order == sim.turn_order
+        assert game.assigned_tasks == sim.assigned_tasks
+
+    # A restart deals the record's next attempt
+    game.failed = True
+    with patch('builtins.input', side_effect=SetupResponder()), contextlib.redirect_stdout(io.StringIO()):
+        game.is_over()
+    second_hands, _ = pool.deal(len(pool) - 1).hands(attempt=2)
+    assert all(game.hands[pid] == hand for pid, hand in second_hands.items())
+    pool.close()
+
+
+def test_pool_file_does_not_depend_on_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(deal_pool, "CHUNK", 4)
+    generate(tmp_path / "serial.bin", 3, count=10, seed=1)
+    generate(tmp_path / "parallel.bin", 3, count=10, seed=1, workers=2)
+    assert (tmp_path / "serial.bin").read_bytes() == (tmp_path / "parallel.bin").read_bytes()
+    with pytest.raises(Exception, match="generated for 3 players"):
+        make_pool_game(4, 1, DealPool(tmp_path / "serial.bin").deal(0))
@@ -0,0 +1,314 @@
+"""
+Differential testing: a fast engine against TheCrewGame, move for move.
+
+    python differential.py --games 100000 --workers 8
+    python differential.py --missions 8 9 10 --players 2 --games 20000 --invalid 0.3
+    python differential.py --replay '{"players": 3, "mission": 2, "seed": 7, "moves": [[0, "G3"], ...]}'
+
+Both engines get the same seed and SetupResponder's setup answers, then the same moves,
+drawn at random from TheCrewGame's legal moves (move_protocol.legal_move_strings). With
+probability --invalid a move is a probe instead: any card of the mover's hand (mostly
+follow-suit errors), a radio clue with a random clue type and card, or a move out of turn.
+Cards a player does not hold are never played (TheCrewGame lets list.remove raise there).
+After every move the harness compares what a driver can see: the result of play() (or the
+exception it raised), is_over() and the restart it triggers, whose_turn(), the legal moves
+and the game state (hands, trick, tasks, turn order, radio, JARVIS's hidden cards, attempts
+and the reasons attempts failed). Games run until TheCrewGame ends them: success, the
+attempt limit, or a player to act with no cards.
+
+Candidates are registered in ENGINES by name; "sim" is SimEngine, SimGame wrapped in the
+restart logic of TheCrewGame.is_over. The first divergence is shrunk by delta debugging
+(moves that no longer apply raise the same error in both engines, or are skipped when the
+card has left the hand) and printed as a --replay argument.
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from crew_sim import SimGame, split_deck
+from game_config import GameplayError
+from move_protocol import legal_move_strings
+from simulate import SetupResponder
+from the_crew_game import DECK, TheCrewGame
+import mock_missions
+
+
+MAX_ATTEMPTS = 10  # TheCrewGame.is_over gives up after this many attempts
+RAN_OUT = "A player ran out of cards before completing all tasks. Mission failed!"
+FIELDS = ("attempts", "turn", "turn_order", "hands", "trick", "previous_trick", "played_cards", "tasks",
+          "completed_tasks", "task_ordering", "assigned_tasks", "failed", "radio_used", "radio_clues")
+
+
+class Divergence(NamedTuple):
+    step: int  # Moves played before it showed
+    field: str
+    reference: object
+    candidate: object
+
+
+class Failures:
+    """A print_fn keeping the reasons TheCrewGame gives for failed attempts."""
+
+    def __init__(self):
+        self.failures = []
+
+    def __call__(self, *args, **kwargs):
+        text = " ".join(map(str, args))
+        if text.startswith("❌ "):
+            self.failures.append(text[2:])
+
+
+class SimEngine:
+    """
+    SimGame attempts behind TheCrewGame's game loop: the candidate checked by default.
+
+    SimGame plays a single attempt; the restarts are done here the way TheCrewGame.is_over
+    and _restart_mission do them with SetupResponder's answers: a new shuffle per attempt,
+    the turn counter carried over, and the first attempt's task assignment kept unless a
+    commander hands the tasks out again.
+    """
+
+    def __init__(self, num_players, num_mission, seed):
+        self.num_players = num_players
+        self.num_mission = num_mission
+        self.seed = seed
+        self.attempts = 1
+        self.failures = []
+        self.sim = SimGame.from_seed(num_players, num_mission, seed)
+
+    def __getattr__(self, name):
+        return getattr(self.sim, name)
+
+    def play(self, move, player_id=0):
+        sim = self.sim
+        failed, turn = sim.failed, sim.turn
+        sim.play(move, player_id=player_id)
+        if sim.failed and not failed:
+            self.failures.append(sim.failure)
+        elif sim.turn != turn:
+            self.is_over()  # TheCrewGame._process_trick ends every clean trick with is_over()
+
+    def is_over(self):
+        sim = self.sim
+        complete = set(sim.completed_tasks) == set(sim.task_ordering)
+        if sim.failed:
+            self._restart()
+            return False
+        if not any(sim.hands.values()) and not complete:
+            self.failures.append(RAN_OUT)
+            self._restart()
+            return False
+        if complete:
+            return True
+        if self.attempts > MAX_ATTEMPTS:
+            raise GameplayError(f"Mission failed completely. Reached the attempt limit of {MAX_ATTEMPTS}")
+        return False
+
+    def _restart(self):
+        previous = self.sim
+        self.attempts += 1
+        deck = list(DECK)
+        random.Random(f"{self.seed}:{self.attempts}").shuffle(deck)
+        self.sim = SimGame.from_cards(self.num_players, self.num_mission, previous.task_ordering, *split_deck(deck, self.num_players))
+        condition = self.sim.condition
+        if not ("commanders_decision" in condition or "commanders_distribution" in condition):
+            self.sim.assigned_tasks = previous.assigned_tasks
+        self.sim.turn = previous.turn
+
+
+ENGINES = {"sim": SimEngine}
+
+
+def reference(num_players, num_mission, seed):
+    failures = Failures()
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed,
+                       input_fn=SetupResponder(), print_fn=failures)
+    return game, failures
+
+
+def snapshot(game, failures):
+    state = {field: getattr(game, field) for field in FIELDS}
+    if game.num_players == 2:
+        state["jarvis_dictionary"] = game.jarvis_dictionary
+    state["failures"] = failures
+    return state
+
+
+def _call(method, *args):
+    """What a driver sees from a call: its result or the exception it raised."""
+    try:
+        return method(*args)
+    except Exception as error:
+        return (type(error).__name__, str(error))
+
+
+def _probe(game, pid, rng):
+    """A move that is often rejected."""
+    kind = rng.randrange(3)
+    hand = game.hands[pid]
+    if kind == 0 and hand:
+        return pid, rng.choice(hand)
+    if kind == 1 and hand and pid != 2:
+        return pid, f"radio {rng.choice(('highest', 'lowest', 'only'))} {rng.choice(hand).lower()}"
+    others = [other for other in range(game.num_players) if other != pid and game.hands[other]]
+    if not others:
+        return pid, rng.choice(legal_move_strings(game, pid))
+    other = rng.choice(others)
+    return other, rng.choice(game.hands[other])
+
+
+def run_game(num_players, num_mission, seed, engine="sim", moves=None, invalid=0.1):
+    """
+    Play one game on both engines; returns (moves played, first Divergence or None).
+
+    With `moves` given, those (player, move) pairs are replayed instead of drawn at random.
+    """
+    game, failures = reference(num_players, num_mission, seed)
+    candidate = ENGINES[engine](num_players, num_mission, seed)
+    rng = random.Random(f"{num_players}:{num_mission}:{seed}")
+    replay = iter(moves) if moves is not None else None
+    played = []
+
+    def compare(field, ours, theirs):
+        return Divergence(len(played), field, ours, theirs) if ours != theirs else None
+
+    def compare_state():
+        ours, theirs = snapshot(game, failures.failures), snapshot(candidate, candidate.failures)
+        return next((Divergence(len(played), field, ours[field], theirs.get(field)) for field in ours
+                     if ours[field] != theirs.get(field)), None)
+
+    divergence = compare_state()
+    while divergence is None:
+        over = _call(game.is_over)
+        divergence = compare("is_over", over, _call(candidate.is_over)) or compare_state()
+        if divergence or over is not False:
+            break
+        pid = game.whose_turn()
+        legal = legal_move_strings(game, pid)
+        divergence = (compare("whose_turn", pid, _call(candidate.whose_turn))
+                      or compare("legal_moves", legal, _call(legal_move_strings, candidate, pid)))
+        if divergence or not legal:
+            break
+        if replay is not None:
+            move = next(replay, None)
+            if move is None:
+                break
+            if not move[1].startswith("radio") and move[1] not in game.hands[move[0]]:
+                continue  # Only possible in a shrunk list; cards not in hand are outside what is compared
+        elif rng.random() < invalid:
+            move = _probe(game, pid, rng)
+        else:
+            move = (pid, rng.choice(legal))
+        played.append(move)
+        divergence = compare("play", _call(game.play, move[1], move[0]), _call(candidate.play, move[1], move[0])) or compare_state()
+    return played, divergence
+
+
+def minimize(num_players, num_mission, seed, engine, moves):
+    """A shorter move list that still diverges (ddmin over the moves)."""
+    def diverges(candidate_moves):
+        return run_game(num_players, num_mission, seed, engine, candidate_moves)[1] is not None
+
+    moves = list(moves)
+    chunks = 2
+    while len(moves) >= 2:
+        size = -(-len(moves) // chunks)
+        for start in range(0, len(moves), size):
+            rest = moves[:start] + moves[start + size:]
+            if diverges(rest):
+                moves = rest
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if chunks >= len(moves):
+                break
+            chunks = min(len(moves), chunks * 2)
+    return moves
+
+
+def _check_chunk(args):
+    """(games, moves, first divergence as a report dict or None) for a run of seeds of one cell."""
+    engine, num_players, num_mission, seeds, invalid = args
+    total_moves = 0
+    for games, seed in enumerate(seeds, 1):
+        played, divergence = run_game(num_players, num_mission, seed, engine, invalid=invalid)
+        total_moves += len(played)
+        if divergence is not None:
+            moves = minimize(num_players, num_mission, seed, engine, played)
+            _, divergence = run_game(num_players, num_mission, seed, engine, moves)
+            return games, total_moves, {"players": num_players, "mission": num_mission, "seed": seed, "engine": engine,
+                                        "moves": moves, "divergence": divergence._asdict(), "original_moves": len(played)}
+    return len(seeds), total_moves, None
+
+
+def check(missions, player_counts, games, engine="sim", base_seed=0, workers=1, chunk=200, invalid=0.1, progress=None):
+    """Run every (mission, player count) for `games` seeds; returns (games, moves, first divergence or None)."""
+    jobs = [(engine, players, mission, range(start, min(start + chunk, base_seed + games)), invalid)
+            for start in range(base_seed, base_seed + games, chunk)
+            for mission in missions for players in player_counts]
+    totals = [0, 0]
+
+    def collect(results):
+        for played, moves, report in results:
+            totals[0] += played
+            totals[1] += moves
+            if progress:
+                progress(*totals)
+            if report is not None:
+                return report
+        return None
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers)
+        try:
+            report = collect(executor.map(_check_chunk, jobs))
+        finally:
+            executor.shutdown(cancel_futures=True)
+    else:
+        report = collect(map(_check_chunk, jobs))
+    return totals[0], totals[1], report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sim")
+    parser.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--games", type=int, default=1000, help="Seeds per (mission, player count)")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk", type=int, default=200, help="Games per job")
+    parser.add_argument("--invalid", type=float, default=0.1, help="Share of moves that are probes rather than legal moves")
+    parser.add_argument("--replay", default=None, help="A divergence printed by an earlier run")
+    args = parser.parse_args()
+
+    if args.replay:
+        case = json.loads(args.replay)
+        moves = [tuple(move) for move in case["moves"]]
+        _, divergence = run_game(case["players"], case["mission"], case["seed"], case.get("engine", args.engine), moves)
+        print(divergence or "No divergence")
+        return
+
+    start = time.perf_counter()
+    games, moves, report = check(
+        args.missions, args.players, args.games, args.engine, args.base_seed, args.workers, args.chunk, args.invalid,
+        progress=lambda games, moves: print(f"\r{games:,} games, {moves:,} moves", end="", flush=True))
+    elapsed = time.perf_counter() - start
+    print(f"\r{games:,} games, {moves:,} moves in {elapsed:.1f}s ({games / elapsed:,.0f} games/s)")
+    if report is None:
+        print(f"No divergence between TheCrewGame and {args.engine}")
+        return
+    divergence = report.pop("divergence")
+    print(f"Divergence in mission {report['mission']}, {report['players']} players, seed {report['seed']} "
+          f"after {divergence['step']} of {len(report['moves'])} moves (shrunk from {report.pop('original_moves')}):")
+    print(f"  {divergence['field']}: TheCrewGame {divergence['reference']!r}")
+    print(f"  {' ' * len(divergence['field'])}  {args.engine} {divergence['candidate']!r}")
+    print(f"Replay with --replay '{json.dumps(report)}'")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
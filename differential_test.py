@@ -0,0 +1,56 @@
+import pytest
+
+from crew_sim import SimGame, legal_moves
+from differential import ENGINES, SimEngine, check, run_game
+from game_config import GameplayError
+
+
+class LateRestart(SimEngine):
+    """Forgets to carry the turn counter over from the second attempt on."""
+
+    def _restart(self):
+        super()._restart()
+        if self.attempts > 2:
+            self.sim.turn = 1
+
+
+class SilentFollowSuit(SimEngine):
+    """Ignores a card that breaks follow-suit instead of raising."""
+
+    def play(self, move, player_id=0):
+        try:
+            super().play(move, player_id)
+        except GameplayError as error:
+            if "follow suit" not in str(error):
+                raise
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 5])
+def test_sim_engine_matches_the_engine(num_players):
+    games, moves, report = check(range(1, 11), [num_players], games=3, invalid=0.3)
+    assert report is None
+    assert games == 30 and moves > 30 * 10
+
+
+def test_failure_reasons_are_reported_like_the_engine():
+    reasons = set()
+    for seed in range(20):
+        sim = SimGame.from_seed(3, 10, seed)
+        while not sim.is_over():
+            pid = sim.whose_turn()
+            sim.play(legal_moves(sim, pid)[0], player_id=pid)
+        assert (sim.failure is not None) == sim.failed
+        assert sim.copy().failure == sim.failure
+        reasons.add(sim.failure and sim.failure.split()[0])
+    assert {"Task", "Cannot"} <= reasons
+    assert all(reason is None or reason in ("Task", "Cannot", "Omega") for reason in reasons)
+
+
+@pytest.mark.parametrize("engine, field", [(LateRestart, "turn"), (SilentFollowSuit, "play")])
+def test_divergences_are_found_and_shrunk(monkeypatch, engine, field):
+    monkeypatch.setitem(ENGINES, "broken", engine)
+    _, _, report = check([2], [3], games=20, engine="broken", invalid=0.3)
+    assert report["divergence"]["field"] == field
+    assert len(report["moves"]) < report["original_moves"]
+    _, divergence = run_game(3, 2, report["seed"], "broken", report["moves"])
+    assert divergence.field == field and divergence.step <= len(report["moves"])
@@ -0,0 +1,250 @@
+"""
+Distress-signal advisor: decide the signal, the pass direction and the passed cards by simulation.
+
+TheCrewGame asks three kinds of setup questions before the first trick of every attempt:
+whether to send a distress signal, which way to pass, and which non-rocket card each
+player passes. Nobody sees the whole deal, so DistressAdvisor answers them by playing the
+attempt out on deals sampled from the players' points of view (ismcts.InformationSet: own
+hand known, the rest dealt at random), on crew_sim.SimGame with the heuristic playout
+policy (a little randomness per playout, the same deals and playout seeds for every
+candidate so candidates are compared on equal terms):
+
+- each player's card, per direction: every non-rocket card of their hand, on deals sampled
+  from their view, where the others pass their default card (the lowest plain card that
+  is not a task) of their sampled hands;
+- the signal and the direction: the baseline (no signal) and each direction's pass on
+  fresh deals sampled from every player's view in turn, each player passing the chosen
+  card and the others their default.
+
+A signal adds one to the score (attempts + distress_token_usage), so it is only sent when
+the gain in success rate, times the further attempts a failure is expected to cost, is
+worth more than that penalty. Evaluations run serially or on a process pool, stop at the
+time limit with the best cards found so far, and are cached per deal.
+
+AdvisedInput plugs it into TheCrewGame as input_fn, answering the questions directly or
+adding its advice to the question for another input_fn (e.g. the model in rollout.py).
+"""
+import random
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Tuple
+
+from crew_sim import SimGame
+from heuristic import heuristic_playout, rank
+from ismcts import InformationSet
+
+
+MAX_ATTEMPTS = 10  # TheCrewGame.is_over gives up after this many attempts
+DIRECTIONS = ("cw", "ccw")
+
+
+class Advice(NamedTuple):
+    signal: bool
+    direction: str  # Best direction found, even when no signal is advised
+    cards: Tuple[str, ...]  # Card each player passes in that direction
+    success: float  # Simulated first-attempt success rate with that pass
+    baseline: float  # ... and without a signal
+    simulations: int  # Playouts behind this advice
+
+    def hint(self):
+        """One line for a prompt."""
+        passes = ", ".join(f"player {pid + 1} passes {card}" for pid, card in enumerate(self.cards))
+        verdict = "send" if self.signal else "do not send"
+        return (f"Advisor ({self.simulations} simulated games): {verdict} the distress signal. "
+                f"Best pass is {self.direction} ({passes}) with {self.success:.0%} success vs {self.baseline:.0%} "
+                f"without; a signal adds 1 to the final score.")
+
+
+def pass_cards(hands, cards, direction, num_players):
+    """Hands after each player in turn passes cards[pid] the given way, as TheCrewGame._pass_cards does."""
+    hands = {pid: list(hand) for pid, hand in hands.items()}
+    for pid in range(num_players):
+        hands[pid].remove(cards[pid])
+        hands[(pid + 1) % num_players if direction == "cw" else (pid - 1) % num_players].append(cards[pid])
+    return hands
+
+
+def default_pass(hand, tasks):
+    """The lowest card that is neither a rocket nor a task, else the lowest non-rocket card."""
+    plain = [card for card in hand if card[0] != 'R']
+    spare = [card for card in plain if card not in tasks]
+    return min(spare or plain, key=lambda card: (rank(card), card))
+
+
+def retry_cost(success, attempts_left):
+    """Expected further attempts (score points) a failed attempt costs, with `success` per attempt."""
+    if success <= 0:
+        return attempts_left
+    return (1 - (1 - success) ** attempts_left) / success
+
+
+def _evaluate(args):
+    """Successes over (hands, passed cards, playout seed) deals for one direction (None: no signal)."""
+    num_players, num_mission, tasks, direction, deals, epsilon = args
+    wins = 0
+    for hands, cards, seed in deals:
+        if direction is not None:
+            hands = pass_cards(hands, cards, direction, num_players)
+        sim = SimGame.from_cards(num_players, num_mission, tasks, {pid: list(hand) for pid, hand in hands.items()}, None)
+        heuristic_playout(sim, random.Random(seed), epsilon)
+        wins += sim.success()
+    return wins
+
+
+class DistressAdvisor:
+    """
+    Simulation-backed answers to the distress-signal questions.
+
+    simulations: playouts per candidate pass; time_limit: seconds per new deal (None: no
+    limit); workers > 1 evaluates candidates on a process pool; penalty: score cost of a
+    signal; cache_size: deals whose evaluations are kept.
+    """
+
+    def __init__(self, simulations=64, time_limit=2.0, workers=1, penalty=1.0, epsilon=0.1, seed=0, cache_size=1024):
+        self.simulations = simulations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.penalty = penalty
+        self.epsilon = epsilon
+        self.seed = seed
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # deal key -> (baseline, {direction: (success, cards)}, playouts)
+        self.stats = {"deals": 0, "cache_hits": 0, "playouts": 0, "timeouts": 0}
+        self._pool = None
+
+    def advise(self, num_players, num_mission, tasks, hands, attempt=1):
+        """
+        Advice for a freshly dealt attempt; hands is {pid: cards} for the players who pass.
+        Each player's card only depends on their own hand (and the tasks).
+        """
+        key = (num_players, num_mission, tuple(tasks), tuple(tuple(sorted(hands[pid])) for pid in range(num_players)))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            evaluation = self.cache[key]
+        else:
+            evaluation = self._search(num_players, num_mission, list(tasks), {pid: list(hands[pid]) for pid in range(num_players)})
+            self.cache[key] = evaluation
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        baseline, passes, playouts = evaluation
+        direction = max(passes, key=lambda d: passes[d][0])
+        success, cards = passes[direction]
+        attempts_left = max(1, MAX_ATTEMPTS - attempt)
+        signal = (success - baseline) * retry_cost(baseline, attempts_left) > self.penalty
+        return Advice(signal, direction, cards, success, baseline, playouts)
+
+    def advise_game(self, game, num_mission):
+        """Advice for a TheCrewGame (or SimGame) at its setup questions."""
+        hands = {pid: game.hands[pid] for pid in range(game.num_players)}
+        return self.advise(game.num_players, num_mission, game.task_ordering, hands, getattr(game, "attempts", 1))
+
+    def _search(self, num_players, num_mission, tasks, hands):
+        self.stats["deals"] += 1
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        search_seeds = range(self.seed, self.seed + self.simulations)
+        fresh_seeds = range(self.seed + self.simulations, self.seed + 2 * self.simulations)
+        playouts = 0
+
+        # Deals each player could be facing, from a generator of their own so they depend on their hand only
+        root = SimGame.from_cards(num_players, num_mission, tasks, {pid: list(hands[pid]) for pid in range(num_players)}, None)
+        views = {}
+        for pid in range(num_players):
+            info_set, rng = InformationSet(root, pid), random.Random(f"{self.seed}:{pid}")
+            views[pid] = [info_set.sample(rng).hands for _ in range(2 * self.simulations)]
+
+        def defaults(deal, pid=None, card=None):
+            cards = [default_pass(deal[other], tasks) for other in range(num_players)]
+            if pid is not None:
+                cards[pid] = card
+            return cards
+
+        def evaluate(direction, candidates):
+            nonlocal playouts
+            jobs = [(num_players, num_mission, tasks, direction, deals, self.epsilon) for deals in candidates]
+            if self.workers > 1 and len(jobs) > 1:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.workers)
+                wins = list(self._pool.map(_evaluate, jobs))
+            else:
+                wins = [_evaluate(job) for job in jobs]
+            playouts += sum(len(deals) for deals in candidates)
+            return [count / self.simulations for count in wins]
+
+        def out_of_time():
+            if deadline is not None and time.perf_counter() > deadline:
+                self.stats["timeouts"] += 1
+                return True
+            return False
+
+        chosen = {direction: [default_pass(hands[pid], tasks) for pid in range(num_players)] for direction in DIRECTIONS}
+        for direction in DIRECTIONS:
+            for pid in range(num_players):
+                if out_of_time():
+                    break
+                deals = views[pid][:self.simulations]
+                options = [chosen[direction][pid]] + [card for card in sorted(hands[pid])
+                                                      if card[0] != 'R' and card != chosen[direction][pid]]
+                rates = evaluate(direction, [[(deal, defaults(deal, pid, card), seed) for deal, seed in zip(deals, search_seeds)]
+                                             for card in options])
+                chosen[direction][pid] = options[rates.index(max(rates))]  # The default wins ties
+
+        # The best of many noisy candidates looks better than it is, so the signal and the direction
+        # are decided on fresh deals, taken from each player's view in turn
+        team = [(views[i % num_players][self.simulations + i], i % num_players, seed) for i, seed in enumerate(fresh_seeds)]
+        baseline = evaluate(None, [[(deal, None, seed) for deal, _, seed in team]])[0]
+        passes = {}
+        for direction, cards in chosen.items():
+            deals = [(deal, defaults(deal, pid, cards[pid]), seed) for deal, pid, seed in team]
+            passes[direction] = (evaluate(direction, [deals])[0], tuple(cards))
+        self.stats["playouts"] += playouts
+        return baseline, passes, playouts
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class AdvisedInput:
+    """
+    A TheCrewGame input_fn for the distress-signal questions; everything else goes to `fallback`.
+
+    With hint=False the advisor's answers are given directly; with hint=True the question is
+    passed on to `fallback` with the advice appended. TheCrewGame calls bind() with itself
+    before its first question, which is how the advisor sees the deal.
+    """
+
+    QUESTIONS = ("send a distress signal", "pass cards clockwise", "choose a card to pass")
+
+    def __init__(self, advisor, fallback, num_mission, hint=False):
+        self.advisor = advisor
+        self.fallback = fallback
+        self.num_mission = num_mission
+        self.hint = hint
+        self.game = None
+        self.advice = None
+
+    def bind(self, game):
+        self.game = game
+        if hasattr(self.fallback, "bind"):
+            self.fallback.bind(game)
+
+    def __call__(self, prompt):
+        text = prompt.lower()
+        if self.game is None or not any(question in text for question in self.QUESTIONS):
+            return self.fallback(prompt)
+        if "send a distress signal" in text or self.advice is None:
+            self.advice = self.advisor.advise_game(self.game, self.num_mission)  # A new deal every attempt
+        advice = self.advice
+        if self.hint:
+            return self.fallback(f"{prompt}\n{advice.hint()}")
+        if "send a distress signal" in text:
+            return "yes" if advice.signal else "no"
+        if "clockwise" in text:
+            return advice.direction
+        pid = int(re.search(r"player (\d+), choose", text).group(1)) - 1
+        card = advice.cards[pid]
+        return card if card in self.game.hands[pid] else self.fallback(prompt)
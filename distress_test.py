@@ -0,0 +1,70 @@
+from crew_sim import SimGame
+from distress import DIRECTIONS, AdvisedInput, DistressAdvisor, pass_cards, retry_cost
+from heuristic import HeuristicAgent
+from simulate import SetupResponder
+from the_crew_game import TheCrewGame, quiet
+from tournament import play_match
+
+
+def test_pass_matches_the_engine():
+    sim = SimGame.from_seed(3, 1, seed=11)
+    cards = [next(card for card in sorted(sim.hands[pid]) if card[0] != 'R') for pid in range(3)]
+    answers = iter(["yes", "ccw"] + cards)
+    game = TheCrewGame(num_players=3, num_mission=1, seed=11, input_fn=lambda prompt: next(answers), print_fn=quiet)
+    expected = pass_cards(sim.hands, cards, "ccw", 3)
+    assert {pid: sorted(hand) for pid, hand in game.hands.items()} == {pid: sorted(hand) for pid, hand in expected.items()}
+    assert game.distress_token_usage == 1
+
+
+def test_advised_answers_follow_the_advice():
+    advisor = DistressAdvisor(simulations=8, time_limit=None)
+    dealt = SimGame.from_seed(4, 4, seed=0).hands
+    responder = AdvisedInput(advisor, SetupResponder(), num_mission=4)
+    game = TheCrewGame(num_players=4, num_mission=4, seed=0, input_fn=responder, print_fn=quiet)
+    advice = responder.advice
+    assert game.distress_token_usage == advice.signal
+    expected = pass_cards(dealt, advice.cards, advice.direction, 4) if advice.signal else dealt
+    assert {pid: sorted(hand) for pid, hand in game.hands.items()} == {pid: sorted(hand) for pid, hand in expected.items()}
+    assert advice.success >= 0 and advice.simulations > 8 * 4
+
+    # The same deal again is served from the cache; a prohibitive penalty never signals
+    advisor.penalty = 100
+    again = advisor.advise(4, 4, game.task_ordering, dealt)
+    assert again.cards == advice.cards and not again.signal
+    assert advisor.stats == {**advisor.stats, "deals": 1, "cache_hits": 1}
+
+
+def test_each_pass_is_chosen_from_the_players_own_view():
+    advisor = DistressAdvisor(simulations=8, time_limit=None)
+    sim = SimGame.from_seed(4, 4, seed=2)
+    swapped = dict(sim.hands)
+    swapped[1], swapped[2] = sim.hands[2], sim.hands[1]
+    advisor.advise(4, 4, sim.task_ordering, sim.hands)
+    advisor.advise(4, 4, sim.task_ordering, swapped)
+    (_, passes, _), (_, other, _) = advisor.cache.values()
+    for direction in DIRECTIONS:  # Players 1 and 4 hold the same cards in both deals, so they pass the same
+        assert passes[direction][1][0::3] == other[direction][1][0::3]
+
+
+def test_hints_go_to_the_fallback():
+    questions = []
+
+    def fallback(prompt):
+        questions.append(prompt)
+        return "no"
+
+    responder = AdvisedInput(DistressAdvisor(simulations=2, time_limit=0.0), fallback, num_mission=1, hint=True)
+    TheCrewGame(num_players=3, num_mission=1, seed=3, input_fn=responder, print_fn=quiet)
+    assert questions[0].startswith("Do you want to send a distress signal?") and "Advisor (" in questions[0]
+
+
+def test_retry_cost_is_capped_by_attempts_left():
+    assert retry_cost(0.0, 9) == 9
+    assert retry_cost(1.0, 9) == 1
+    assert 1 < retry_cost(0.5, 9) < 2
+
+
+def test_tournament_counts_the_signal_penalty():
+    advisor = DistressAdvisor(simulations=4, time_limit=0.5)
+    outcome = play_match(HeuristicAgent(), 4, 4, seed=0, advisor=advisor)
+    assert outcome["score"] == outcome["attempts"] + outcome["distress_token_usage"]
@@ -0,0 +1,157 @@
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from canonical import canonicalize, invert
+from crew_sim import SimGame, legal_moves
+
+
+class EndgameSolver:
+    """
+    Exact perfect-information solver for the last few tricks.
+
+    Once every hand holds at most `max_cards` cards (JARVIS's face-down cards count towards
+    its hand), the remaining tree is small enough to search exhaustively. solve() returns a
+    winning line of (player, card) moves, or None when no line completes the mission.
+    Results are memoised in a bounded LRU keyed by the canonical position (colors
+    relabelled, ranks compressed), so equivalent positions share one entry; the memo can
+    be saved and loaded so repeated evaluation runs start warm.
+    """
+
+    def __init__(self, max_cards=4, cache_size=200_000, cache_path=None):
+        self.max_cards = max_cards
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_path and os.path.exists(cache_path):
+            self.load(cache_path)
+
+    def applies(self, game):
+        """True when every hand is small enough to solve (and the attempt is still running)."""
+        if game.failed or not game.hands[game.turn_order[0]]:
+            return False
+        for pid, hand in game.hands.items():
+            size = len(hand)
+            if game.num_players == 2 and pid == 2:
+                size += sum(1 for down in game.jarvis_dictionary.values() if down != '')
+            if size > self.max_cards:
+                return False
+        return True
+
+    def solve(self, game):
+        """Winning line from this position as a list of (player_id, move), or None if the position is lost."""
+        sim = game.copy() if isinstance(game, SimGame) else SimGame.from_game(game)
+        line = self._solve(sim)
+        return list(line) if line is not None else None
+
+    def winning_moves(self, game):
+        """The legal moves for the player to act that keep a winning line alive."""
+        sim = game.copy() if isinstance(game, SimGame) else SimGame.from_game(game)
+        pid = sim.whose_turn()
+        winners = []
+        for move in legal_moves(sim, pid):
+            child = sim.copy()
+            child.play(move, player_id=pid)
+            if self._solve(child) is not None:
+                winners.append(move)
+        return winners
+
+    def _solve(self, sim):
+        if sim.success():
+            return ()
+        if sim.is_over():
+            return None
+
+        # Mid-trick positions are only reachable from one trick start, so only trick starts are memoised
+        if sim.trick:
+            return self._search(sim)
+
+        key, forward = canonicalize(sim)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            line = self.cache[key]
+            if line is None:
+                return None
+            to_original = invert(forward)
+            return tuple((pid, to_original[move]) for pid, move in line)
+        self.misses += 1
+        result = self._search(sim)
+
+        # Stored in canonical card names; translated back through each position's own mapping on a hit
+        self.cache[key] = tuple((p, forward[move]) for p, move in result) if result is not None else None
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def _search(self, sim):
+        pid = sim.whose_turn()
+        for move in legal_moves(sim, pid):
+            child = sim.copy()
+            child.play(move, player_id=pid)
+            line = self._solve(child)
+            if line is not None:
+                return ((pid, move),) + line
+        return None
+
+    def save(self, path=None):
+        """
+        Persist the memo table (most recently used entries last), merged with the saved one.
+
+        Processes sharing a cache file (tournament workers) take turns through a lock file,
+        so each save adds its entries to the others' instead of overwriting them; the table
+        goes to a unique temporary file in the same directory and is renamed into place.
+        """
+        path = path or self.cache_path
+        with _file_lock(f"{path}.lock"):
+            entries = OrderedDict()
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    entries.update(pickle.load(f))
+            for key, value in self.cache.items():
+                entries[key] = value
+                entries.move_to_end(key)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".endgame-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(list(entries.items())[-self.cache_size:], f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def load(self, path=None):
+        """Warm-start from a saved memo table, keeping at most cache_size entries."""
+        with open(path or self.cache_path, "rb") as f:
+            entries = pickle.load(f)
+        for key, value in entries[-self.cache_size:]:
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+@contextmanager
+def _file_lock(path, stale=60.0, poll=0.01):
+    """Hold `path` (created with O_EXCL) for the block; a lock older than `stale` seconds is taken over."""
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime > stale:
+                    os.remove(path)  # Its holder died mid-save
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll)
+    try:
+        yield
+    finally:
+        os.remove(path)
@@ -0,0 +1,291 @@
+"""
+Local stand-in for the OpenAI chat-completions API, for offline load tests of rollout.py.
+
+    python fake_openai.py --port 8000 --policy heuristic --latency 0.2 --jitter 0.1 --error-rate 0.02 --rpm 600
+    CREW_LLM_BASE_URL=http://127.0.0.1:8000/v1 OPENAI_API_KEY=fake python simulate.py --agent random --games 1 --llm-games 20
+
+Move prompts are answered by reading the game state text out of the last user message and
+asking a policy for a card: "heuristic" (heuristic.HeuristicAgent) or "legal" (a random
+legal card), returned as JSON content, as the enum-constrained JSON of a json_schema
+response format, or as a forced tool call, whichever the request asks for. Setup
+questions from rollout.mock_input are answered like simulate.SetupResponder. Latency, random server errors and request/token rate limits
+(429 with Retry-After) can be injected; GET /stats returns the counters. process_batch()
+answers a whole Batch API input file the same way (see batch_rollout.py).
+"""
+import argparse
+import ast
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crew_sim import DECK, legal_moves, trick_size
+from heuristic import HeuristicAgent
+from llm_client import TokenBucket, estimate_tokens
+from move_protocol import extract_move
+from simulate import SetupResponder
+
+
+class PromptView:
+    """
+    The parts of TheCrewGame.state() (plus the BeliefTracker summary) a policy needs,
+    parsed back out of prompt text into the attributes crew_sim.legal_moves and
+    HeuristicAgent read.
+    """
+
+    def __init__(self, text):
+        turn = re.search(r"Turn: (\d+) \(Player (\d+)'s move\)", text)
+        if not turn:
+            raise ValueError("No game state in prompt")
+        self.turn = int(turn.group(1))
+        self.player_id = int(turn.group(2)) - 1
+        hand = re.search(r"(?:Your hand|JARVIS' hand \(face-up\)): (\[.*?\])", text)
+        self.hands = {self.player_id: ast.literal_eval(hand.group(1)) if hand else []}
+        self.trick = [tuple(entry) for entry in _literal(text, "Current Trick")]
+        self.tasks = _literal(text, "Tasks remaining")
+        self.completed_tasks = _literal(text, "Completed tasks")
+        self.task_token_map = dict(re.findall(r"^([PYGBR]\d) → \((.+)\)$", text, re.M))
+        self.task_ordering = list(self.task_token_map)
+        self.assigned_tasks = {task: int(player) - 1 for task, player in re.findall(r"^([PYGBR]\d) → Player (\d+)$", text, re.M)}
+
+        # The unseen-cards summary tells us which cards are gone and how many seats there are
+        unseen = set()
+        for color, ranks in re.findall(r"^  ([PYGBR]): ([\d ]+|-)$", text, re.M):
+            unseen.update(f"{color}{rank}" for rank in ranks.split() if rank != "-")
+        others = re.findall(r"^  (Player \d+|JARVIS face-down): ", text, re.M)
+        if "JARVIS face-down" in others:
+            self.num_players = 2
+        elif others:
+            self.num_players = len(others) + 1
+        else:
+            self.num_players = 1 + max([pid for pid, _ in self.trick] + list(self.assigned_tasks.values()) + [self.player_id, 2])
+        hidden = unseen | set(self.hands[self.player_id]) if unseen else set(DECK)
+        self.played_cards = [(None, card) for card in DECK if card not in hidden]
+        later = trick_size(self.num_players) - len(self.trick) - 1
+        self.turn_order = [self.player_id] + [None] * later
+        self.radio_used = {self.player_id: "You can use your radio" not in text}
+        self.disruption = self.deadzone = False
+
+
+def _literal(text, label):
+    match = re.search(rf"^{label}: (\[.*\])$", text, re.M)
+    return ast.literal_eval(match.group(1)) if match else []
+
+
+def legal_policy(view, rng):
+    return rng.choice(legal_moves(view, view.player_id))
+
+
+_heuristic = HeuristicAgent(use_radio=False)
+
+
+def heuristic_policy(view, rng):
+    return _heuristic.choose_move(view, view.player_id)
+
+
+POLICIES = {
+    "legal": legal_policy,
+    "heuristic": heuristic_policy,
+}
+
+
+class FakeOpenAI:
+    """Decides what each chat-completions request gets back; shared by all handler threads."""
+
+    def __init__(self, policy="heuristic", latency=0.0, jitter=0.0, error_rate=0.0, rpm=None, tpm=None, seed=None):
+        self.policy = POLICIES[policy]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.rng = random.Random(seed)
+        self.setup = SetupResponder()  # Shared, so it moves on to another player when the engine rejects an answer
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "completions": 0, "rate_limited": 0, "errors": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def complete(self, body):
+        """Return (status, headers, payload) for a chat-completions request body."""
+        self.count("requests")
+        messages = body.get("messages", [])
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        with self.lock:
+            wait = max(self.requests.wait_time(1) if self.requests else 0.0,
+                       self.tokens.wait_time(prompt_tokens) if self.tokens else 0.0)
+            if not wait:
+                for bucket, amount in ((self.requests, 1), (self.tokens, prompt_tokens)):
+                    if bucket:
+                        bucket.take(amount)
+            roll = self.rng.random()
+            delay = self.latency + self.rng.random() * self.jitter
+        if wait:
+            self.count("rate_limited")
+            return 429, {"Retry-After": f"{wait:.3f}"}, _error("Rate limit reached (injected)", "rate_limit_exceeded")
+        time.sleep(delay)
+        if roll < self.error_rate:
+            self.count("errors")
+            return 500, {}, _error("The server had an error while processing your request (injected)", "server_error")
+
+        message, finish_reason = self.message(body)
+        completion_tokens = estimate_tokens(json.dumps(message))
+        self.count("completions")
+        self.count("prompt_tokens", prompt_tokens)
+        self.count("completion_tokens", completion_tokens)
+        return 200, {}, {
+            "id": f"chatcmpl-fake-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def message(self, body):
+        """
+        The assistant message and finish reason. A request with a JSON-schema response format
+        gets the schema's JSON as content and a request with tools gets a call to the first
+        tool; either way the move is kept inside the schema's enum, as strict mode would.
+        """
+        text = self.answer(body.get("messages", []))
+        schema = _move_schema(body)
+        if schema is None:
+            return {"role": "assistant", "content": text}, "stop"
+        allowed = schema.get("properties", {}).get("move", {}).get("enum")
+        move = extract_move(text)
+        if allowed and move not in allowed:
+            move = allowed[0]
+        arguments = json.dumps({"reasoning": "Playing by policy.", "move": move})
+        if body.get("tools"):
+            call = {"id": f"call_fake_{self.stats['requests']}", "type": "function",
+                    "function": {"name": body["tools"][0]["function"]["name"], "arguments": arguments}}
+            return {"role": "assistant", "content": None, "tool_calls": [call]}, "tool_calls"
+        return {"role": "assistant", "content": arguments}, "stop"
+
+    def answer(self, messages):
+        last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        question = re.search(r"Question: (.*)", last)
+        if question and "Turn:" not in last:
+            with self.lock:
+                return self.setup(question.group(1))
+        try:
+            view = PromptView(last)
+        except (ValueError, SyntaxError):
+            return "no"
+        if not legal_moves(view, view.player_id):
+            return '{"move": "none"}'  # Nothing to play; the driver should not have asked
+        with self.lock:
+            move = self.policy(view, self.rng)
+        return f'Playing by policy.\n{{"move": "{move}"}}'
+
+
+def process_batch(fake, input_text):
+    """
+    Answer a Batch API input file (JSONL of {custom_id, method, url, body}) and return the
+    output file text, one {id, custom_id, response: {status_code, body}, error} line per request.
+    """
+    lines = []
+    for number, line in enumerate(input_text.splitlines()):
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        status, _, payload = fake.complete(request["body"])
+        lines.append(json.dumps({
+            "id": f"batch_req_fake_{number}",
+            "custom_id": request["custom_id"],
+            "response": {"status_code": status, "request_id": f"req_fake_{number}", "body": payload},
+            "error": None,
+        }))
+    return "".join(line + "\n" for line in lines)
+
+
+def _move_schema(body):
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return response_format["json_schema"]["schema"]
+    if body.get("tools"):
+        return body["tools"][0]["function"]["parameters"]
+    return None
+
+
+def _error(message, code):
+    return {"error": {"message": message, "type": code, "code": code}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so pooled client connections are reused
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {}, _error(f"Unknown endpoint {self.path}", "not_found"))
+            return
+        self._send(*self.server.fake.complete(body))
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send(200, {}, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "local"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            with self.server.fake.lock:
+                self._send(200, {}, dict(self.server.fake.stats))
+        else:
+            self._send(404, {}, _error(f"Unknown endpoint {self.path}", "not_found"))
+
+    def _send(self, status, headers, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the rollout logs
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """Serve in a background thread; returns the server (server.base_url, server.fake, server.shutdown())."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.fake = FakeOpenAI(**options)
+    server.base_url = f"http://{host}:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="heuristic")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute before HTTP 429")
+    parser.add_argument("--tpm", type=int, default=None, help="Prompt tokens per minute before HTTP 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    server.fake = FakeOpenAI(args.policy, args.latency, args.jitter, args.error_rate, args.rpm, args.tpm, args.seed)
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1 (policy: {args.policy})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.fake.stats))
+
+
+if __name__ == "__main__":
+    main()
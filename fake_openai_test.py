@@ -0,0 +1,83 @@
+import json
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from belief import BeliefTracker
+from bots_test import make_game
+from crew_sim import legal_moves
+from fake_openai import PromptView, start_server
+
+
+def post(base_url, messages):
+    request = urllib.request.Request(f"{base_url}/chat/completions", method="POST",
+                                     data=json.dumps({"model": "fake", "messages": messages}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**options):
+        servers.append(start_server(**options))
+        return servers[-1]
+    yield start
+    for s in servers:
+        s.shutdown()
+
+
+@pytest.mark.parametrize("num_players", [2, 3, 5])
+def test_prompt_view_matches_game(num_players):
+    game = make_game(num_players, 8, seed=4)
+    pid = game.whose_turn()
+    view = PromptView(game.state(pid) + BeliefTracker(game, pid).summary())
+    assert view.player_id == pid
+    assert view.num_players == num_players
+    assert sorted(view.hands[pid]) == sorted(game.hands[pid])
+    assert view.assigned_tasks == game.assigned_tasks
+    assert set(legal_moves(view, pid)) == set(legal_moves(game, pid))
+
+
+@pytest.mark.parametrize("policy", ["heuristic", "legal"])
+def test_fake_server_plays_a_whole_attempt(server, policy):
+    fake = server(policy=policy, seed=0)
+    game = make_game(3, 1, seed=2)
+    beliefs = {pid: BeliefTracker(game, pid) for pid in range(3)}
+    while not game.failed and game.attempts == 1 and set(game.completed_tasks) != set(game.task_ordering):
+        pid = game.whose_turn()
+        if not game.hands[pid]:
+            break
+        beliefs[pid].sync(game)
+        status, _, body = post(fake.base_url, [{"role": "user", "content": game.state(pid) + beliefs[pid].summary()}])
+        assert status == 200
+        move = re.search(r'"move"\s*:\s*"([^"]+)"', body["choices"][0]["message"]["content"]).group(1)
+        assert move in legal_moves(game, pid)
+        game.play(move, player_id=pid)
+    assert fake.fake.stats["completions"] > 0
+
+
+def test_fake_server_answers_setup_questions(server):
+    fake = server()
+    _, _, body = post(fake.base_url, [{"role": "user", "content": "Question: Do you want to send a distress signal? (yes/no): \n"}])
+    assert body["choices"][0]["message"]["content"] == "no"
+    assert body["usage"]["total_tokens"] > 0
+
+
+def test_fake_server_injects_rate_limits_and_errors(server):
+    limited = server(rpm=2)
+    statuses = [post(limited.base_url, [{"role": "user", "content": "Question: yes/no"}]) for _ in range(3)]
+    assert [status for status, _, _ in statuses] == [200, 200, 429]
+    assert float(statuses[-1][1]["Retry-After"]) > 0
+    assert statuses[-1][2]["error"]["type"] == "rate_limit_exceeded"
+
+    failing = server(error_rate=1.0)
+    status, _, body = post(failing.base_url, [{"role": "user", "content": "Question: yes/no"}])
+    assert status == 500 and failing.fake.stats["errors"] == 1
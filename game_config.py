@@ -5,6 +5,8 @@ class GameplayError(Exception):
     pass
 
 class Game():
+    __slots__ = ()  # Lets subclasses do without a per-instance __dict__
+
     def valid_players(self) -> tuple[int, ...]: ...
 
     def whose_turn(self) -> int: ...
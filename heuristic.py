@@ -0,0 +1,183 @@
+from crew_sim import legal_moves
+
+
+SIMPLE_TASK = "simple task"
+
+
+def allowed_tasks(game):
+    """
+    Task cards that may be completed in the next trick without failing the mission.
+
+    This is the ordering rollout.py describes in prose (numbered tasks first, then arrows
+    in order, then simple tasks, omega last) as _process_trick enforces it: the next
+    ordered task is task_ordering[len(completed_tasks)], and simple tasks only become
+    available once every ordered task before them is done.
+    """
+    done = len(game.completed_tasks)
+    if done >= len(game.task_ordering):
+        return ()
+    expected = game.task_ordering[done]
+    if game.task_token_map[expected] != SIMPLE_TASK:
+        return (expected,)
+    return tuple(task for task in game.tasks if game.task_token_map[task] == SIMPLE_TASK)
+
+
+def rank(card):
+    return int(card[1:])
+
+
+def strength(card, lead_suit):
+    """Same ordering as card_strength in TheCrewGame._process_trick, as one number."""
+    if card[0] == 'R':
+        return 20 + rank(card)
+    if card[0] == lead_suit:
+        return rank(card)
+    return 0
+
+
+class HeuristicAgent:
+    """
+    Fast deterministic rule-based bot.
+
+    It plays tasks in the order allowed_tasks() permits, tries to win tricks holding a
+    task for the assigned player, ducks when another player's task is in the trick,
+    keeps rockets for tricks it must win, and spends its radio clue on a task card it
+    holds for somebody else. It only reads its own hand and public information.
+    """
+
+    name = "heuristic"
+
+    def __init__(self, use_radio=True):
+        self.use_radio = use_radio
+
+    def choose_move(self, game, player_id):
+        legal = legal_moves(game, player_id)
+        if self.use_radio:
+            clue = self._radio(game, player_id)
+            if clue:
+                return clue
+        if len(legal) == 1:
+            return legal[0]
+
+        allowed = allowed_tasks(game)
+        pending = set(game.tasks)
+        gone = {card for _, card in game.played_cards}
+        if not game.trick:
+            return self._lead(game, player_id, legal, allowed, pending, gone)
+        return self._follow(game, player_id, legal, allowed, pending, gone)
+
+    def _radio(self, game, player_id):
+        """Announce a task card held for another player, if it can be communicated."""
+        if game.num_players == 2 and player_id == 2:
+            return None  # JARVIS has no radio
+        if game.disruption or game.deadzone or game.radio_used[player_id]:
+            return None
+        hand = game.hands[player_id]
+        for task in game.tasks:
+            if task not in hand or game.assigned_tasks[task] == player_id:
+                continue
+            ranks = [rank(card) for card in hand if card[0] == task[0]]
+            if len(ranks) == 1:
+                return f"radio only {task}"
+            if rank(task) == max(ranks):
+                return f"radio highest {task}"
+            if rank(task) == min(ranks):
+                return f"radio lowest {task}"
+        return None
+
+    def _is_boss(self, card, hand, gone):
+        """No unplayed card of the same suit outside this hand can beat it (rockets aside)."""
+        suit = card[0]
+        top = 4 if suit == 'R' else 9
+        return all(f"{suit}{higher}" in gone or f"{suit}{higher}" in hand for higher in range(rank(card) + 1, top + 1))
+
+    def _lead(self, game, player_id, legal, allowed, pending, gone):
+        hand = game.hands[player_id]
+        for task in allowed:
+            if game.assigned_tasks[task] != player_id:
+                continue
+            if task in hand:
+                # Lead our own task only when nobody can take it from us
+                if task in legal and self._is_boss(task, hand, gone):
+                    return task
+            elif task not in gone:
+                # Pull the task out with our highest card of its suit, if that card beats it
+                pullers = [card for card in legal if card[0] == task[0] and card not in pending and rank(card) > rank(task)]
+                if pullers:
+                    return max(pullers, key=rank)
+
+        # Otherwise lead low from a suit that cannot drag a task card into the trick
+        task_suits = {task[0] for task in pending}
+        safe = [card for card in legal if card not in pending and card[0] != 'R']
+        quiet = [card for card in safe if card[0] not in task_suits]
+        return self._lowest(quiet or safe or legal)
+
+    def _follow(self, game, player_id, legal, allowed, pending, gone):
+        hand = game.hands[player_id]
+        lead_suit = game.trick[0][1][0]
+        winner, winning_card = max(game.trick, key=lambda entry: strength(entry[1], lead_suit))
+        best = strength(winning_card, lead_suit)
+        later = game.turn_order[1:]
+        tasks_in_trick = [card for _, card in game.trick if card in pending]
+
+        if any(card not in allowed for card in tasks_in_trick):
+            return self._discard(legal, lead_suit, pending)  # The mission fails with this trick anyway
+
+        if tasks_in_trick:
+            owner = game.assigned_tasks[tasks_in_trick[0]]
+            if owner == player_id:
+                return self._win(legal, lead_suit, best, pending, bool(later)) or self._discard(legal, lead_suit, pending)
+            return self._duck(legal, lead_suit, best, pending)
+
+        # Hand over a task we hold: to ourselves if it wins, or under the owner's winning card
+        for task in allowed:
+            if task not in legal:
+                continue
+            owner = game.assigned_tasks[task]
+            safe_from_later = not later or self._is_boss(task if owner == player_id else winning_card, hand, gone)
+            if owner == player_id and strength(task, lead_suit) > best and safe_from_later:
+                return task
+            if owner == winner and strength(task, lead_suit) < best and safe_from_later:
+                return task
+
+        # We own a task of the lead suit that a later player may still drop: be ready to win it
+        for task in allowed:
+            if game.assigned_tasks[task] == player_id and task[0] == lead_suit and task not in hand and task not in gone:
+                beat = [card for card in legal if card not in pending and strength(card, lead_suit) > max(best, rank(task))]
+                if beat:
+                    return max(beat, key=lambda card: strength(card, lead_suit))
+
+        return self._discard(legal, lead_suit, pending)
+
+    def _win(self, legal, lead_suit, best, pending, contested):
+        winners = [card for card in legal if card not in pending and strength(card, lead_suit) > best]
+        if not winners:
+            return None
+        # With players still to come, win as high as possible; otherwise as cheaply as possible
+        pick = max if contested else min
+        return pick(winners, key=lambda card: strength(card, lead_suit))
+
+    def _duck(self, legal, lead_suit, best, pending):
+        under = [card for card in legal if card not in pending and strength(card, lead_suit) < best]
+        if under:
+            return max(under, key=lambda card: strength(card, lead_suit))  # Shed the highest card that still ducks
+        return self._discard(legal, lead_suit, pending)
+
+    def _discard(self, legal, lead_suit, pending):
+        safe = [card for card in legal if card not in pending]
+        plain = [card for card in safe if card[0] != 'R']
+        return self._lowest(plain or safe or legal)
+
+    def _lowest(self, cards):
+        return min(cards, key=lambda card: (rank(card), card))
+
+
+def heuristic_playout(sim, rng, epsilon=0.1, agent=HeuristicAgent(use_radio=False)):
+    """ISMCTS playout policy: the heuristic bot with a little randomness to diversify playouts."""
+    while not sim.is_over():
+        pid = sim.whose_turn()
+        if rng.random() < epsilon:
+            move = rng.choice(legal_moves(sim, pid))
+        else:
+            move = agent.choose_move(sim, pid)
+        sim.play(move, player_id=pid)
@@ -0,0 +1,217 @@
+import math
+import random
+import time
+
+from belief import JARVIS_HIDDEN, BeliefTracker
+from crew_sim import SimGame, legal_moves
+from endgame import EndgameSolver
+from heuristic import heuristic_playout
+
+
+class InformationSet:
+    """
+    Everything one player can see about a position, used to sample determinized deals.
+
+    The hidden-card constraints (follow-suit voids, radio clues, JARVIS's face-up cards)
+    live in a BeliefTracker; pass the player's long-lived tracker to avoid rebuilding it
+    from the move history on every decision.
+    """
+
+    def __init__(self, game, player_id, belief=None):
+        self.player_id = player_id
+        self.root = SimGame.from_game(game)
+        self.belief = belief if belief is not None else BeliefTracker(game, player_id)
+        self.jarvis_slots = []
+        if game.num_players == 2:
+            self.jarvis_slots = [up for up, down in game.jarvis_dictionary.items() if down != '']
+
+    def sample(self, rng):
+        """Deal the hidden cards at random so every constraint holds, returning a determinized SimGame."""
+        assignment = self.belief.sample(rng)
+        if assignment is None:
+            # Inconsistent clues (e.g. a mislabelled radio claim): fall back to respecting hand sizes only
+            cards = sorted(self.belief.unseen)
+            rng.shuffle(cards)
+            holders = [holder for holder, count in self.belief.counts.items() for _ in range(count)]
+            assignment = dict(zip(cards, holders))
+        return self._determinize(assignment)
+
+    def _determinize(self, assignment):
+        root = self.root
+        hands = {pid: list(hand) for pid, hand in root.hands.items()}
+        for pid in self.belief.counts:
+            if pid != JARVIS_HIDDEN:
+                hands[pid] = []
+        jarvis_hidden = []
+        for card, pid in assignment.items():
+            if pid == JARVIS_HIDDEN:
+                jarvis_hidden.append(card)
+            else:
+                hands[pid].append(card)
+        jarvis_dictionary = None
+        if root.num_players == 2:
+            jarvis_dictionary = {up: '' for up in root.jarvis_dictionary}
+            jarvis_dictionary.update(zip(self.jarvis_slots, jarvis_hidden))
+        return SimGame.from_game(root, hands=hands, jarvis_dictionary=jarvis_dictionary)
+
+
+def endgame_vote(solver, info_set, moves, rng, samples, deadline=None):
+    """
+    Solve deals sampled from the information set exactly and return the move that wins in
+    the most of them, so the last tricks are played from the player's view only.
+    """
+    votes = {move: 0 for move in moves}
+    for _ in range(samples):
+        for move in solver.winning_moves(info_set.sample(rng)):
+            votes[move] += 1
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    return max(moves, key=votes.get)
+
+
+class _Node:
+    __slots__ = ("move", "parent", "children", "visits", "wins", "available")
+
+    def __init__(self, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.available = 0
+
+
+def random_playout(sim, rng):
+    """Finish the attempt with uniformly random legal cards."""
+    while not sim.is_over():
+        pid = sim.whose_turn()
+        sim.play(rng.choice(legal_moves(sim, pid)), player_id=pid)
+
+
+PLAYOUTS = {
+    "random": random_playout,
+    "heuristic": heuristic_playout,
+}
+
+
+def search(info_set, iterations=1000, time_limit=None, exploration=0.7, seed=None, playout=random_playout):
+    """
+    Single-observer ISMCTS from info_set, returning {move: root visit count}.
+
+    Every iteration samples a fresh determinization, walks the shared tree restricted to
+    moves legal in that deal (UCB1 with availability counts), expands one node and
+    finishes with a fast playout. The Crew is cooperative, so every seat maximises the
+    same reward: 1 if the mission succeeds, else 0.
+    """
+    rng = random.Random(seed)
+    root = _Node()
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    done = 0
+    while done < iterations and (deadline is None or time.perf_counter() < deadline):
+        done += 1
+        sim = info_set.sample(rng)
+        node = root
+
+        # Selection / expansion
+        while not sim.is_over():
+            pid = sim.whose_turn()
+            legal = legal_moves(sim, pid)
+            for move in legal:
+                child = node.children.get(move)
+                if child is not None:
+                    child.available += 1
+            untried = [move for move in legal if move not in node.children]
+            if untried:
+                move = rng.choice(untried)
+                child = node.children[move] = _Node(move, node)
+                child.available = 1
+                sim.play(move, player_id=pid)
+                node = child
+                break
+            node = max((node.children[move] for move in legal),
+                       key=lambda c: c.wins / c.visits + exploration * math.sqrt(math.log(c.available) / c.visits))
+            sim.play(node.move, player_id=pid)
+
+        playout(sim, rng)
+        reward = 1.0 if sim.success() else 0.0
+        while node is not None:
+            node.visits += 1
+            node.wins += reward
+            node = node.parent
+
+    return {move: child.visits for move, child in root.children.items()}
+
+
+def _search_worker(args):
+    return search(*args)
+
+
+class ISMCTSAgent:
+    """
+    Determinized information-set MCTS bot.
+
+    Budget is per move: `iterations` playouts in total and/or a `time_limit` in seconds.
+    With workers > 1 the budget is split across a process pool (root parallelisation) and
+    the root visit counts are summed. Once every hand has at most `endgame_cards` cards the
+    search is replaced by exact solves of sampled deals, voting for the moves that win most.
+    `playout` names the rollout policy in PLAYOUTS used to finish each simulated attempt.
+    """
+
+    name = "ismcts"
+
+    def __init__(self, iterations=1000, time_limit=None, workers=1, exploration=0.7, seed=None,
+                 endgame_cards=4, endgame_samples=32, playout="random"):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self._pool = None
+        self._beliefs = {}  # player_id -> (game, BeliefTracker), kept in sync move by move
+        self.endgame = EndgameSolver(endgame_cards) if endgame_cards else None
+        self.endgame_samples = endgame_samples
+        self.playout = PLAYOUTS[playout]
+
+    def belief(self, game, player_id):
+        """The player's belief tracker for this game, synced with every move made since the last call."""
+        tracked = self._beliefs.get(player_id)
+        if tracked is None or tracked[0] is not game:
+            tracked = self._beliefs[player_id] = (game, BeliefTracker(game, player_id))
+        else:
+            tracked[1].sync(game)
+        return tracked[1]
+
+    def choose_move(self, game, player_id):
+        moves = legal_moves(game, player_id)
+        if len(moves) == 1:
+            return moves[0]
+
+        info_set = InformationSet(game, player_id, self.belief(game, player_id))
+        if self.endgame is not None and self.endgame.applies(game):
+            return self._endgame_move(info_set, moves)
+        if self.workers > 1:
+            if self._pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(self.workers)
+            share = math.ceil(self.iterations / self.workers)
+            jobs = [(info_set, share, self.time_limit, self.exploration, self.rng.random(), self.playout)
+                    for _ in range(self.workers)]
+            visits = {}
+            for result in self._pool.map(_search_worker, jobs):
+                for move, count in result.items():
+                    visits[move] = visits.get(move, 0) + count
+        else:
+            visits = search(info_set, self.iterations, self.time_limit, self.exploration, self.rng.random(), self.playout)
+
+        if not visits:
+            return self.rng.choice(moves)
+        return max(visits, key=visits.get)
+
+    def _endgame_move(self, info_set, moves):
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        return endgame_vote(self.endgame, info_set, moves, self.rng, min(self.iterations, self.endgame_samples), deadline)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
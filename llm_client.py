@@ -0,0 +1,212 @@
+"""
+Shared chat-completions client for rollouts: rate limiting, retries and one connection pool.
+
+One LLMClient is meant to serve every game in a process. It waits on a token bucket for
+requests and tokens per minute before each call, retries 408/409/429/5xx answers, timeouts
+and connection errors with jittered exponential backoff (never sooner than the server's
+Retry-After, and pausing every caller after a 429), and gives each call a timeout. The
+OpenAI SDK client and its pooled HTTP connections are only built on the first call.
+
+Settings come from the constructor or, via from_env(), from CREW_LLM_BASE_URL,
+CREW_LLM_MODEL, CREW_LLM_RPM, CREW_LLM_TPM, CREW_LLM_TIMEOUT, CREW_LLM_MAX_RETRIES and
+CREW_LLM_MAX_CONNECTIONS. Limits are per process; split the quota when running several.
+"""
+import os
+import random
+import threading
+import time
+
+
+RETRY_STATUSES = (408, 409, 429)  # Plus every 5xx
+DEFAULT_COMPLETION_TOKENS = 256  # Reserved for the answer when max_tokens is not given
+
+
+class LLMUnavailable(RuntimeError):
+    """The model could not be reached within the retry budget; the game cannot continue."""
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute and holds at most a minute's worth."""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount=1):
+        """Seconds until `amount` units are available (0.0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if amount <= self.level else (amount - self.level) / self.rate
+
+    def take(self, amount=1):
+        """Remove units; the level may go negative when actual usage exceeded the estimate."""
+        self._refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """Blocks callers until both the request and the token budget allow another call."""
+
+    def __init__(self, rpm=None, tpm=None, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock) if tpm else None
+        self.clock = clock
+        self.sleep = sleep
+        self.resume_at = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        while True:
+            with self.lock:
+                wait = max(self.resume_at - self.clock(),
+                           self.requests.wait_time(1) if self.requests else 0.0,
+                           self.tokens.wait_time(tokens) if self.tokens else 0.0)
+                if wait <= 0:
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return
+            self.sleep(wait)
+
+    def charge(self, tokens):
+        """Correct the token budget once a call reports its real usage (negative refunds)."""
+        if self.tokens and tokens:
+            with self.lock:
+                self.tokens.take(tokens)
+
+    def pause(self, seconds):
+        """Hold every caller back, e.g. after the server answered 429."""
+        with self.lock:
+            self.resume_at = max(self.resume_at, self.clock() + seconds)
+
+
+def retry_hint(error):
+    """None if `error` is not worth retrying, else the server's Retry-After in seconds (0.0 if absent)."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        if status not in RETRY_STATUSES and status < 500:
+            return None
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after") or 0.0)
+        except ValueError:
+            return 0.0
+    if isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in ("APITimeoutError", "APIConnectionError"):
+        return 0.0
+    return None
+
+
+class LLMClient:
+    """
+    Thread-safe chat-completions caller shared by all games in a process.
+
+    `create` replaces the SDK call (same keyword arguments, returns a response with
+    .choices and .usage); tests and the batch mode use it to plug in other transports.
+    """
+
+    def __init__(self, api_key=None, base_url=None, model="gpt-4o", rpm=None, tpm=None, timeout=60.0,
+                 max_retries=6, backoff_base=0.5, backoff_cap=30.0, max_connections=64, create=None,
+                 sleep=time.sleep, seed=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_connections = max_connections
+        self.limiter = RateLimiter(rpm, tpm, sleep=sleep)
+        self.sleep = sleep
+        self.rng = random.Random(seed)
+        self._create = create
+        self._build_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    @classmethod
+    def from_env(cls, **overrides):
+        def number(name, kind, default=None):
+            value = os.getenv(name)
+            return kind(value) if value else default
+
+        settings = {
+            "api_key": os.getenv("OPENAI_API_KEY"),
+            "base_url": os.getenv("CREW_LLM_BASE_URL") or None,
+            "model": os.getenv("CREW_LLM_MODEL", "gpt-4o"),
+            "rpm": number("CREW_LLM_RPM", int),
+            "tpm": number("CREW_LLM_TPM", int),
+            "timeout": number("CREW_LLM_TIMEOUT", float, 60.0),
+            "max_retries": number("CREW_LLM_MAX_RETRIES", int, 6),
+            "max_connections": number("CREW_LLM_MAX_CONNECTIONS", int, 64),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    @property
+    def create(self):
+        """The underlying create call; builds the SDK client and its connection pool on first use."""
+        if self._create is None:
+            with self._build_lock:
+                if self._create is None:
+                    import httpx
+                    import openai
+
+                    limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+                    client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout,
+                                           max_retries=0, http_client=openai.DefaultHttpxClient(limits=limits))
+                    self._create = client.chat.completions.create
+        return self._create
+
+    def count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def backoff(self, attempt, hint=0.0):
+        """Full-jitter exponential backoff, never shorter than the server's hint."""
+        return max(hint, self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def chat(self, messages, max_tokens=None, **kwargs):
+        """
+        One chat completion with rate limiting and retries; returns the SDK response.
+
+        Raises LLMUnavailable once the retries are used up or the error is not retryable.
+        """
+        reserved = sum(estimate_tokens(str(message.get("content", ""))) for message in messages)
+        reserved += max_tokens or DEFAULT_COMPLETION_TOKENS
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(reserved)
+            try:
+                response = self.create(model=self.model, messages=messages, timeout=self.timeout, **kwargs)
+            except Exception as e:
+                hint = retry_hint(e)
+                if hint is None or attempt == self.max_retries:
+                    raise LLMUnavailable(f"Model call failed after {attempt + 1} attempt(s): {e}") from e
+                if getattr(e, "status_code", None) == 429:
+                    self.count("rate_limited")
+                    self.limiter.pause(hint)
+                self.count("retries")
+                self.sleep(self.backoff(attempt, hint))
+                continue
+
+            self.count("calls")
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.count("prompt_tokens", usage.prompt_tokens)
+                self.count("completion_tokens", usage.completion_tokens)
+                self.limiter.charge(usage.prompt_tokens + usage.completion_tokens - reserved)
+            return response
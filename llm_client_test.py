@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm_client import LLMClient, LLMUnavailable, RateLimiter, TokenBucket, retry_hint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def response(prompt_tokens=10, completion_tokens=5):
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"move": "P1"}'))], usage=usage)
+
+
+def test_token_bucket_refills_over_a_minute():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.wait_time(30) == 0.0
+    assert bucket.wait_time(1000) == pytest.approx(30.0)  # Never asks for more than one minute's capacity
+
+
+def test_rate_limiter_spaces_requests_at_quota():
+    clock = FakeClock()
+    limiter = RateLimiter(rpm=120, clock=clock, sleep=clock.sleep)
+    for _ in range(120 + 10):
+        limiter.acquire()
+    # The first minute's burst is free, then one call every half second
+    assert clock.now == pytest.approx(5.0)
+    limiter.pause(3)
+    limiter.acquire()
+    assert clock.now >= 8.0
+
+
+def test_retry_hint_classifies_errors():
+    assert retry_hint(StatusError(429, "2.5")) == 2.5
+    assert retry_hint(StatusError(503)) == 0.0
+    assert retry_hint(StatusError(400)) is None
+    assert retry_hint(TimeoutError()) == 0.0
+    assert retry_hint(ValueError()) is None
+
+
+def test_client_retries_transient_errors_with_backoff():
+    clock = FakeClock()
+    failures = [StatusError(429, "1"), StatusError(500), TimeoutError()]
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if failures:
+            raise failures.pop(0)
+        return response()
+
+    client = LLMClient(create=create, sleep=clock.sleep, seed=0, tpm=10_000)
+    result = client.chat([{"role": "user", "content": "hi"}], max_tokens=10)
+    assert result.choices[0].message.content == '{"move": "P1"}'
+    assert len(calls) == 4 and calls[0]["max_tokens"] == 10 and calls[0]["timeout"] == 60.0
+    assert client.stats["retries"] == 3 and client.stats["rate_limited"] == 1
+    assert clock.now >= 1.0  # At least the Retry-After of the 429
+
+
+def test_client_gives_up_on_permanent_errors():
+    def create(**kwargs):
+        raise StatusError(401)
+
+    client = LLMClient(create=create, sleep=lambda s: None)
+    with pytest.raises(LLMUnavailable, match="HTTP 401"):
+        client.chat([{"role": "user", "content": "hi"}])
+
+    def flaky(**kwargs):
+        raise StatusError(503)
+
+    client = LLMClient(create=flaky, sleep=lambda s: None, max_retries=2)
+    with pytest.raises(LLMUnavailable, match="3 attempt"):
+        client.chat([{"role": "user", "content": "hi"}])
+
+
+def test_client_against_fake_server():
+    pytest.importorskip("openai")
+    from fake_openai import start_server
+
+    server = start_server(error_rate=0.3, seed=1)
+    try:
+        client = LLMClient(api_key="fake", base_url=server.base_url, backoff_base=0.01, seed=0)
+        for _ in range(10):
+            answer = client.chat([{"role": "user", "content": "Question: Do you want to send a distress signal? (yes/no)"}])
+            assert answer.choices[0].message.content == "no"
+        assert client.stats["retries"] == server.fake.stats["errors"]
+    finally:
+        server.shutdown()
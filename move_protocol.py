@@ -0,0 +1,130 @@
+"""
+Structured move answers for LLM players.
+
+The model is asked for {"reasoning": ..., "move": ...} with `move` constrained to the
+engine's current legal moves, either through a JSON-schema response format or a forced
+function call (CREW_LLM_MOVE_PROTOCOL=json_schema|tools|text). Whatever comes back is
+parsed leniently and repaired locally when there is exactly one legal move it can mean
+(case, a missing "radio" keyword or clue type), so only genuinely unusable answers cost
+another round trip.
+"""
+import json
+import re
+
+from crew_sim import legal_moves
+
+
+PROTOCOLS = ("json_schema", "tools", "text")
+CLUE_TYPES = ("highest", "lowest", "only")
+CARD = re.compile(r"\b([PYGBR][1-9])\b", re.I)
+TOOL_NAME = "play_move"
+
+
+def radio_moves(game, player_id):
+    """Radio clues the engine would accept now, each with its true clue type."""
+    if game.num_players == 2 and player_id == 2:
+        return []  # JARVIS has no radio
+    if game.disruption or game.radio_used[player_id]:
+        return []
+    hand = game.hands[player_id]
+    if game.deadzone:
+        # Deadzone clues never set radio_used, so only offer one per player
+        if player_id in game.radio_clues:
+            return []
+        return [f"radio deadzone {card}" for card in sorted(hand) if card[0] != 'R']
+    moves = []
+    for card in sorted(hand):
+        if card[0] == 'R':
+            continue  # Rockets cannot be communicated
+        ranks = [int(c[1:]) for c in hand if c[0] == card[0]]
+        if len(ranks) == 1:
+            moves.append(f"radio only {card}")
+        elif int(card[1:]) == max(ranks):
+            moves.append(f"radio highest {card}")
+        elif int(card[1:]) == min(ranks):
+            moves.append(f"radio lowest {card}")
+    return moves
+
+
+def legal_move_strings(game, player_id):
+    """Every move string play() accepts for this player right now: cards first, then radio clues."""
+    return sorted(legal_moves(game, player_id)) + radio_moves(game, player_id)
+
+
+def move_schema(moves):
+    return {
+        "type": "object",
+        "properties": {
+            "reasoning": {"type": "string", "description": "One or two sentences on why."},
+            "move": {"type": "string", "enum": list(moves)},
+        },
+        "required": ["reasoning", "move"],
+        "additionalProperties": False,
+    }
+
+
+def request_options(moves, protocol="json_schema"):
+    """Extra chat-completions arguments that constrain the answer to `moves`."""
+    if protocol == "json_schema":
+        return {"response_format": {"type": "json_schema",
+                                    "json_schema": {"name": "crew_move", "strict": True, "schema": move_schema(moves)}}}
+    if protocol == "tools":
+        tool = {"type": "function", "function": {"name": TOOL_NAME, "description": "Play a card or use the radio.",
+                                                 "strict": True, "parameters": move_schema(moves)}}
+        return {"tools": [tool], "tool_choice": {"type": "function", "function": {"name": TOOL_NAME}}}
+    return {}
+
+
+def answer_text(message):
+    """The text that carries the move: the forced tool call's arguments, else the content."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].function.arguments
+    return message.content or ""
+
+
+def extract_move(text):
+    """The raw move in an answer: JSON "move" field, a "move": "..." fragment, or the bare text."""
+    text = text.strip()
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict) and isinstance(data.get("move"), str):
+            return data["move"]
+    except json.JSONDecodeError:
+        pass
+    match = re.search(r'"move"\s*:\s*"([^"]+)"', text)
+    if match:
+        return match.group(1)
+    return text if len(text) <= 40 else None
+
+
+def repair_move(raw, moves):
+    """
+    Map a raw answer onto one of `moves`, returning (move, repaired) or (None, False).
+
+    Fixes case and spacing, a card named without the "radio" keyword or with a missing or
+    wrong clue type, and extra words around a single card, but only when exactly one legal
+    move fits; anything ambiguous is left for the model to correct.
+    """
+    if raw is None:
+        return None, False
+    normalized = " ".join(raw.split())
+    by_lower = {move.lower(): move for move in moves}
+    if normalized.lower() in by_lower:
+        move = by_lower[normalized.lower()]
+        return move, move != raw
+
+    cards = {card.upper() for card in CARD.findall(normalized)}
+    if len(cards) != 1:
+        return None, False
+    card = cards.pop()
+    words = set(re.findall(r"[a-z]+", normalized.lower()))
+    if words & {"radio", "deadzone", *CLUE_TYPES}:
+        candidates = [move for move in moves if move.startswith("radio") and move.endswith(f" {card}")]
+        typed = [move for move in candidates if move.split()[1] in words]
+        candidates = typed or candidates
+    else:
+        candidates = [move for move in moves if move == card]
+    if len(candidates) == 1:
+        return candidates[0], True
+    return None, False
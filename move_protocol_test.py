@@ -0,0 +1,88 @@
+import contextlib
+import copy
+import io
+import json
+
+import pytest
+
+from bots_test import make_game
+from move_protocol import extract_move, legal_move_strings, repair_move, request_options
+from fake_openai import FakeOpenAI
+
+
+def accepted(game, pid, move):
+    trial = copy.deepcopy(game)
+    with contextlib.redirect_stdout(io.StringIO()):
+        trial.play(move, player_id=pid)
+    return trial
+
+
+@pytest.mark.parametrize("num_players, num_mission", [(2, 1), (3, 1), (4, 6), (3, 7), (5, 2)])
+def test_every_listed_move_is_accepted(num_players, num_mission):
+    game = make_game(num_players, num_mission, seed=5)
+    pid = game.whose_turn()
+    moves = legal_move_strings(game, pid)
+    assert moves
+    for move in moves:
+        accepted(game, pid, move)
+    radio = [move for move in moves if move.startswith("radio")]
+    if num_mission == 7:
+        assert not radio  # Disruption
+    elif num_mission == 6:
+        assert radio and all(move.startswith("radio deadzone") for move in radio)
+        trial = accepted(game, pid, radio[0])
+        assert not any(move.startswith("radio") for move in legal_move_strings(trial, pid))
+    elif num_players == 2 and pid == 2:
+        assert not radio
+    else:
+        assert radio and all(move.split()[1] in ("highest", "lowest", "only") for move in radio)
+        trial = accepted(game, pid, radio[0])
+        assert legal_move_strings(trial, pid) == [move for move in moves if not move.startswith("radio")]
+
+
+def test_repair_move():
+    moves = ["B3", "P5", "Y2", "radio highest P5", "radio lowest P2", "radio only Y2"]
+    assert repair_move("P5", moves) == ("P5", False)
+    assert repair_move("p5", moves) == ("P5", True)
+    assert repair_move("  Radio   Highest p5 ", moves) == ("radio highest P5", True)
+    assert repair_move("RADIO P5", moves) == ("radio highest P5", True)
+    assert repair_move("highest p5", moves) == ("radio highest P5", True)
+    assert repair_move("radio lowest Y2", moves) == ("radio only Y2", True)  # Wrong clue type, one clue fits
+    assert repair_move("I play B3.", moves) == ("B3", True)
+    assert repair_move("B3 or P5", moves) == (None, False)
+    assert repair_move("G7", moves) == (None, False)
+    assert repair_move("radio B3", moves) == (None, False)
+    assert repair_move(None, moves) == (None, False)
+
+
+def test_extract_move():
+    assert extract_move('{"reasoning": "win the trick", "move": "P5"}') == "P5"
+    assert extract_move('Let me think.\n{"move": "radio only Y2"}') == "radio only Y2"
+    assert extract_move("  b3 ") == "b3"
+    assert extract_move("I would rather not say which card I would play here, honestly.") is None
+
+
+@pytest.mark.parametrize("protocol", ["json_schema", "tools"])
+def test_fake_server_honours_structured_requests(protocol):
+    game = make_game(3, 1, seed=2)
+    pid = game.whose_turn()
+    moves = legal_move_strings(game, pid)
+    fake = FakeOpenAI(policy="legal", seed=0)
+    body = {"model": "fake", "messages": [{"role": "user", "content": game.state(pid)}], **request_options(moves, protocol)}
+    status, _, payload = fake.complete(body)
+    assert status == 200
+    message = payload["choices"][0]["message"]
+    if protocol == "tools":
+        assert payload["choices"][0]["finish_reason"] == "tool_calls"
+        arguments = json.loads(message["tool_calls"][0]["function"]["arguments"])
+    else:
+        arguments = json.loads(message["content"])
+    assert set(arguments) == {"reasoning", "move"}
+    assert arguments["move"] in moves
+
+    # A move outside the enum is clamped into it, as strict mode would
+    body = {**body, **request_options(["radio only Z1"], protocol)}
+    _, _, payload = fake.complete(body)
+    message = payload["choices"][0]["message"]
+    text = message["tool_calls"][0]["function"]["arguments"] if protocol == "tools" else message["content"]
+    assert extract_move(text) == "radio only Z1"
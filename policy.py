@@ -0,0 +1,232 @@
+"""
+A small NumPy MLP policy over trajectory.py's observation rows, batched across games.
+
+    python policy.py init weights/random.npz --hidden 256 128
+    python policy.py info weights/random.npz
+    python simulate.py --agent policy --weights weights/random.npz --engine sim --games 10000
+
+The network reads what trajectory.observe records for the acting player (hand, who played
+which card, the current trick, tasks and their owners, radio clues, the player count) as a
+fixed vector of FEATURES 0/1 inputs, with every seat relative to the acting player so one
+network serves all seats. ReLU layers end in one logit per trajectory.MOVES entry; illegal
+moves are masked out and the best legal one is played (or one is sampled at --temperature).
+features() works on whole dataset batches too, so training code sees the same inputs.
+
+simulate.play_batched keeps up to max_batch games waiting on the agent and decides all of
+them with one forward pass through buffers allocated once; choose_move (one game at a
+time) keeps the usual agent protocol for tournaments and the other drivers. Weights are
+an .npz of w0, b0, w1, b1, ... with w<i> shaped (inputs, outputs).
+"""
+import argparse
+
+import numpy as np
+
+from deal_pool import MAX_TASKS
+from the_crew_game import DECK
+from trajectory import CLUE_TYPES, MOVES, ROW_COLUMNS, SEATS, observe
+
+
+CARDS = len(DECK)
+PLAYER_COUNTS = (2, 3, 4, 5)
+# name -> width, in input order
+BLOCKS = {
+    "hand": CARDS,
+    "played": CARDS * SEATS,  # Card x relative seat that played it this attempt
+    "trick": CARDS * SEATS,  # Card in the current trick x relative seat that played it
+    "tasks": CARDS * SEATS,  # Task card x relative seat that owns it
+    "tasks_done": CARDS,
+    "clue_cards": SEATS * CARDS,  # Relative seat x the card it radioed
+    "clue_types": SEATS * len(CLUE_TYPES),
+    "players": len(PLAYER_COUNTS),
+}
+OFFSETS = {}
+FEATURES = 0
+for _name, _width in BLOCKS.items():
+    OFFSETS[_name] = FEATURES
+    FEATURES += _width
+# Observation columns the features are made of
+COLUMNS = ("player", "hand", "owner_played", "trick_cards", "trick_players", "task_cards", "task_players", "tasks_done",
+           "clue_cards", "clue_types", "legal")
+
+
+def features(rows, players, out=None):
+    """
+    (n, FEATURES) float32 inputs for n observation rows.
+
+    rows maps COLUMNS to arrays of the rows (a TrajectoryDataset batch, or the agent's
+    buffers); players is the player count of each row's game, or one count for all. With
+    `out` the inputs are written to its first n rows.
+    """
+    player = np.asarray(rows["player"], dtype=np.int64)
+    n = len(player)
+    if out is None:
+        out = np.zeros((n, FEATURES), np.float32)
+    else:
+        out = out[:n]
+        out.fill(0)
+    players = np.broadcast_to(np.asarray(players, dtype=np.int64), (n,))
+    seats = np.maximum(players, 3)[:, None]  # A 2-player game has JARVIS in the third seat
+
+    def relative(seat_ids):
+        seat_ids = np.asarray(seat_ids, dtype=np.int64)
+        return np.where(seat_ids >= 0, (seat_ids - player[:, None]) % seats, -1)
+
+    def scatter(block, columns, valid):
+        row_index, column_index = np.nonzero(valid)
+        out[row_index, OFFSETS[block] + columns[row_index, column_index]] = 1
+
+    hand = np.asarray(rows["hand"], dtype=np.uint64)
+    bits = np.arange(CARDS, dtype=np.uint64)
+    out[:, OFFSETS["hand"]:OFFSETS["hand"] + CARDS] = (hand[:, None] >> bits) & np.uint64(1)
+
+    owners = relative(rows["owner_played"])
+    scatter("played", np.arange(CARDS) * SEATS + owners, owners >= 0)
+
+    trick_cards = np.asarray(rows["trick_cards"], dtype=np.int64)
+    trick_seats = relative(rows["trick_players"])
+    scatter("trick", trick_cards * SEATS + trick_seats, (trick_cards >= 0) & (trick_seats >= 0))
+
+    task_cards = np.asarray(rows["task_cards"], dtype=np.int64)
+    task_seats = relative(rows["task_players"])
+    scatter("tasks", task_cards * SEATS + task_seats, (task_cards >= 0) & (task_seats >= 0))
+    done = (np.asarray(rows["tasks_done"], dtype=np.int64)[:, None] >> np.arange(MAX_TASKS)) & 1
+    scatter("tasks_done", task_cards, (task_cards >= 0) & (done == 1))
+
+    # Clue columns are indexed by absolute seat
+    clue_seats = relative(np.broadcast_to(np.arange(SEATS), (n, SEATS)))
+    clue_cards = np.asarray(rows["clue_cards"], dtype=np.int64)
+    clue_types = np.asarray(rows["clue_types"], dtype=np.int64)
+    scatter("clue_cards", clue_seats * CARDS + clue_cards, clue_cards >= 0)
+    scatter("clue_types", clue_seats * len(CLUE_TYPES) + clue_types, clue_types >= 0)
+
+    out[np.arange(n), OFFSETS["players"] + players - PLAYER_COUNTS[0]] = 1
+    return out
+
+
+class MLP:
+    """ReLU layers ending in one logit per MOVES entry, evaluated in preallocated buffers."""
+
+    def __init__(self, weights, biases, max_batch=1024):
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        sizes = [FEATURES] + [w.shape[1] for w in self.weights]
+        if len(self.weights) != len(self.biases) or not self.weights:
+            raise ValueError("Need one bias per weight matrix")
+        for layer, (w, b) in enumerate(zip(self.weights, self.biases)):
+            if w.shape != (sizes[layer], sizes[layer + 1]) or b.shape != (sizes[layer + 1],):
+                raise ValueError(f"Layer {layer} is {w.shape} + {b.shape}; expected {sizes[layer]} inputs")
+        if sizes[-1] != len(MOVES):
+            raise ValueError(f"The last layer has {sizes[-1]} outputs; expected one per move ({len(MOVES)})")
+        self.max_batch = max_batch
+        self.inputs = np.zeros((max_batch, FEATURES), np.float32)
+        self.outputs = [np.empty((max_batch, w.shape[1]), np.float32) for w in self.weights]
+
+    @classmethod
+    def load(cls, path, max_batch=1024):
+        with np.load(path) as archive:
+            layers = sum(1 for name in archive.files if name.startswith("w"))
+            return cls([archive[f"w{layer}"] for layer in range(layers)], [archive[f"b{layer}"] for layer in range(layers)],
+                       max_batch)
+
+    @classmethod
+    def initial(cls, hidden=(256,), seed=0, max_batch=1024):
+        """He-initialised weights and zero biases, for training from scratch."""
+        rng = np.random.default_rng(seed)
+        sizes = [FEATURES, *hidden, len(MOVES)]
+        weights = [rng.normal(0.0, (2.0 / fan_in) ** 0.5, (fan_in, fan_out)) for fan_in, fan_out in zip(sizes, sizes[1:])]
+        return cls(weights, [np.zeros(size) for size in sizes[1:]], max_batch)
+
+    def save(self, path):
+        arrays = {}
+        for layer, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{layer}"] = w
+            arrays[f"b{layer}"] = b
+        np.savez(path, **arrays)
+
+    def forward(self, n):
+        """Logits for the first n rows of self.inputs (a view of a buffer the next call overwrites)."""
+        x = self.inputs[:n]
+        last = len(self.weights) - 1
+        for layer, (w, b, buffer) in enumerate(zip(self.weights, self.biases, self.outputs)):
+            y = buffer[:n]
+            np.matmul(x, w, out=y)
+            y += b
+            if layer < last:
+                np.maximum(y, 0.0, out=y)
+            x = y
+        return x
+
+
+class PolicyAgent:
+    """
+    Plays the network's best legal move, or samples legal moves by softmax(logits / temperature).
+
+    choose_moves decides for a list of games in forward passes of up to max_batch rows.
+    """
+
+    name = "policy"
+
+    def __init__(self, weights, temperature=0.0, seed=None, max_batch=1024):
+        self.mlp = weights if isinstance(weights, MLP) else MLP.load(weights, int(max_batch))
+        self.max_batch = self.mlp.max_batch
+        self.temperature = float(temperature)
+        self.rng = np.random.default_rng(seed)
+        self.columns = {name: np.zeros((self.max_batch, *ROW_COLUMNS[name][1]), ROW_COLUMNS[name][0])
+                        for name in COLUMNS}
+        self.players = np.zeros(self.max_batch, np.int64)
+        self.noise = np.empty((self.max_batch, len(MOVES)), np.float32)
+
+    def choose_move(self, game, player_id):
+        return self.choose_moves([game], [player_id])[0]
+
+    def choose_moves(self, games, player_ids):
+        """One move per (game, player_id) pair."""
+        moves = []
+        for start in range(0, len(games), self.max_batch):
+            moves += self._choose(games[start:start + self.max_batch], player_ids[start:start + self.max_batch])
+        return moves
+
+    def _choose(self, games, player_ids):
+        n = len(games)
+        for row_index, (game, player_id) in enumerate(zip(games, player_ids)):
+            row = observe(game, player_id)
+            for name, column in self.columns.items():
+                column[row_index] = row[name]
+            self.players[row_index] = game.num_players
+        features({name: column[:n] for name, column in self.columns.items()}, self.players[:n], self.mlp.inputs)
+        logits = self.mlp.forward(n)
+        if self.temperature > 0:
+            # Gumbel-max: the argmax of logits / T + Gumbel noise is a softmax sample
+            noise = self.noise[:n]
+            self.rng.random(dtype=np.float32, out=noise)
+            with np.errstate(divide="ignore"):
+                np.log(noise, out=noise)
+                np.negative(noise, out=noise)
+                np.log(noise, out=noise)
+            logits /= self.temperature
+            logits -= noise
+        legal = np.unpackbits(self.columns["legal"][:n], axis=1, count=len(MOVES), bitorder="little")
+        np.putmask(logits, legal == 0, -np.inf)
+        return [MOVES[index] for index in logits.argmax(axis=1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init", help="Write freshly initialised weights")
+    init.add_argument("path")
+    init.add_argument("--hidden", type=int, nargs="*", default=[256], help="Hidden layer widths")
+    init.add_argument("--seed", type=int, default=0)
+    info = commands.add_parser("info", help="Show a weights file's layers")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "init":
+        MLP.initial(args.hidden, args.seed, max_batch=1).save(args.path)
+    mlp = MLP.load(args.path, max_batch=1)
+    layers = " -> ".join(str(size) for size in [FEATURES] + [w.shape[1] for w in mlp.weights])
+    print(f"{args.path}: {layers}, {sum(w.size + b.size for w, b in zip(mlp.weights, mlp.biases)):,} parameters")
+
+
+if __name__ == "__main__":
+    main()
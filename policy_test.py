@@ -0,0 +1,88 @@
+import pytest
+
+from crew_sim import SimGame
+from heuristic import HeuristicAgent
+from move_protocol import legal_move_strings
+from simulate import play_batched, play_game, play_sim_game, run
+from trajectory import TrajectoryDataset, observe
+
+
+class BatchedHeuristic(HeuristicAgent):
+    """Counts choose_moves calls and their sizes."""
+
+    max_batch = 4
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def choose_moves(self, games, player_ids):
+        self.batches.append(len(games))
+        return [self.choose_move(game, pid) for game, pid in zip(games, player_ids)]
+
+
+@pytest.mark.parametrize("engine, play", [("sim", play_sim_game), ("crew", play_game)])
+def test_batched_games_end_like_one_at_a_time(engine, play):
+    agent = BatchedHeuristic()
+    results = play_batched(agent, 3, 2, range(10), engine)
+    assert results == [play(HeuristicAgent(), 3, 2, seed) for seed in range(10)]
+    assert max(agent.batches) == 4 and sum(agent.batches) > 10 * 10
+
+
+def learned(tmp_path, **kwargs):
+    pytest.importorskip("numpy")
+    from policy import MLP, PolicyAgent
+
+    path = tmp_path / "weights.npz"
+    MLP.initial([64, 32], seed=1).save(path)
+    return PolicyAgent(str(path), **kwargs)
+
+
+def test_features_match_between_game_rows_and_dataset(tmp_path):
+    np = pytest.importorskip("numpy")
+    from policy import FEATURES, features
+
+    run("random", [3], 4, 3, engine="sim", record=tmp_path / "data")
+    for _, arrays in TrajectoryDataset(tmp_path / "data").iter_shards():
+        inputs = features(arrays, arrays["game_players"][arrays["game"]])
+        assert inputs.shape == (len(arrays["move"]), FEATURES)
+        assert set(np.unique(inputs)) <= {0.0, 1.0}
+        assert (inputs[:, :40].sum(axis=1) > 0).all()  # Somebody always holds cards
+
+    sim = SimGame.from_seed(4, 3, 7)
+    rows = [observe(sim, pid) for pid in range(4)]
+    inputs = features({name: np.array([row[name] for row in rows]) for name in rows[0]}, 4)
+    # Each player's tasks sit at the same relative seats wherever they sit at the table
+    blocks = inputs[:, 40 + 400:40 + 600].reshape(4, 40, 5)
+    assert (blocks[:, :, 0].sum(axis=1) == [sum(owner == pid for owner in sim.assigned_tasks.values())
+                                             for pid in range(4)]).all()
+
+
+def test_policy_plays_legal_moves_in_batches(tmp_path):
+    agent = learned(tmp_path, max_batch=8)
+    games = [SimGame.from_seed(5, mission, seed) for mission in (1, 5) for seed in range(10)]
+    moves = agent.choose_moves(games, [game.whose_turn() for game in games])
+    assert len(moves) == 20
+    for game, move in zip(games, moves):
+        assert move in legal_move_strings(game, game.whose_turn())
+    assert moves[:3] == [agent.choose_move(game, game.whose_turn()) for game in games[:3]]
+
+    results = play_batched(agent, 4, 2, range(30))
+    assert [result["seed"] for result in results] == list(range(30))
+    assert results == [play_sim_game(agent, 4, 2, seed) for seed in range(30)]  # Greedy play is deterministic
+
+
+def test_sampled_policy_is_seeded(tmp_path):
+    learned(tmp_path)
+    kwargs = {"weights": str(tmp_path / "weights.npz"), "temperature": 1.0, "seed": 3}
+    assert run("policy", [1], 3, 20, kwargs, engine="sim") == run("policy", [1], 3, 20, kwargs, engine="sim")
+
+
+def test_weights_must_fit_the_inputs_and_moves(tmp_path):
+    np = pytest.importorskip("numpy")
+    from policy import FEATURES, MLP
+
+    with pytest.raises(ValueError):
+        MLP([np.zeros((FEATURES, 10))], [np.zeros(10)])
+    with pytest.raises(ValueError):
+        MLP([np.zeros((FEATURES - 1, 200))], [np.zeros(200)])
@@ -0,0 +1,220 @@
+"""
+Profiles for simulate.py and rollout.py runs: collapsed stacks and a per-cell summary.
+
+    python simulate.py --agent heuristic --games 200 --profile sample
+    python simulate.py --agent ismcts --games 5 --missions 4 --profile trace --profile-window 2 10
+    python rollout.py --players 3 --mission 2 --profile sample --profile-dir profile/rollout
+    flamegraph.pl profile/m2-p3.collapsed > m2-p3.svg
+
+`sample` reads the running thread's stack every --profile-interval seconds from a helper
+thread (sys._current_frames) and weights each sample by the time since the previous one;
+it costs little and works through LLM waits. `trace` is deterministic: sys.setprofile
+sees every Python and C call, so self time is exact per stack, at several times the run
+time. Only time inside --profile-window (seconds since the run started) is recorded.
+
+Each stack's time also goes to one category: its innermost frame that is an engine
+method (ENGINE_FUNCTIONS of TheCrewGame or SimGame), LLM client code (LLM_MODULES) or
+an agent (AGENT_MODULES); anything else is driver overhead. Session.write puts one
+collapsed-stack file per (mission, player count) in the profile directory (frames
+separated by ';', microseconds per stack, as flamegraph.pl and speedscope read them) and
+a summary.txt with the categories and the top functions by self and total time.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+ENGINE_CLASSES = ("the_crew_game:TheCrewGame.", "crew_sim:SimGame.")
+ENGINE_FUNCTIONS = ("play", "_process_trick", "state", "_deal_cards", "is_over")
+LLM_MODULES = ("llm_client", "fake_openai", "openai", "httpx", "httpcore")
+AGENT_MODULES = ("heuristic", "ismcts", "policy", "belief", "endgame", "canonical", "speculation", "commander", "distress",
+                 "deal_index")
+MODES = ("sample", "trace")
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def stack_of(frame):
+    """Labels of a frame and its callers, outermost first."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def category(stack):
+    """The category of a stack's time: "engine <function>", "engine other", "llm wait", "agent" or "driver"."""
+    in_engine = False
+    for label in reversed(stack):
+        module, _, function = label.partition(":")
+        package = module.split(".")[0]
+        if package in LLM_MODULES:
+            return "llm wait"
+        if label.startswith(ENGINE_CLASSES):
+            name = function.split(".")[1]
+            if name in ENGINE_FUNCTIONS:
+                return f"engine {name}"
+            in_engine = True
+            continue
+        if in_engine:
+            return "engine other"
+        if module in AGENT_MODULES:
+            return "agent"
+    return "engine other" if in_engine else "driver"
+
+
+class Profiler:
+    """Seconds per stack of the thread that calls start(), until stop(); only inside the window."""
+
+    def __init__(self, mode="sample", interval=0.001, window=(0.0, None), origin=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; choose from {', '.join(MODES)}")
+        self.mode = mode
+        self.interval = interval
+        self.origin = time.perf_counter() if origin is None else origin  # Window times count from here
+        self.window = window
+        self.stacks = Counter()
+        self._thread_id = None
+        self._sampler = None
+        self._running = False
+
+    def _inside(self, now):
+        start, stop = self.window
+        return start <= now - self.origin and (stop is None or now - self.origin < stop)
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._running = True
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        else:
+            self._trace_start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self.mode == "sample":
+            self._sampler.join()
+        else:
+            sys.setprofile(None)
+            self._trace_event(time.perf_counter())
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _sample(self):
+        last = time.perf_counter()
+        while self._running:
+            time.sleep(self.interval)
+            if not self._running:
+                break
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None and self._inside(now):
+                self.stacks[stack_of(frame)] += now - last
+            last = now
+
+    def _trace_start(self):
+        self._stack = list(stack_of(sys._getframe()))  # Frames up to here report their returns
+        self._last = time.perf_counter()
+        sys.setprofile(self._trace)
+
+    def _trace_event(self, now):
+        if self._inside(now):
+            self.stacks[tuple(self._stack)] += now - self._last
+        self._last = now
+
+    def _trace(self, frame, event, arg):
+        self._trace_event(time.perf_counter())
+        if event == "call":
+            self._stack.append(frame_label(frame))
+        elif event == "c_call":
+            self._stack.append(f"{getattr(arg, '__module__', None) or 'builtins'}:{getattr(arg, '__qualname__', repr(arg))}")
+        elif self._stack:  # return, c_return, c_exception
+            self._stack.pop()
+        self._last = time.perf_counter()  # Leave the tracer's own time out
+
+
+class Session:
+    """Profiles runs under cell keys (mission, players), all timed from the session's start."""
+
+    def __init__(self, mode="sample", interval=0.001, window=(0.0, None), top=20):
+        self.mode = mode
+        self.interval = interval
+        self.window = window
+        self.top = top
+        self.origin = time.perf_counter()
+        self.cells = {}  # (mission, players) -> Counter of stacks
+
+    def run(self, cell, function, *args, **kwargs):
+        """function(*args, **kwargs) under a profiler; its stacks are added to the cell's."""
+        profiler = Profiler(self.mode, self.interval, self.window, self.origin)
+        with profiler:
+            result = function(*args, **kwargs)
+        self.cells.setdefault(cell, Counter()).update(profiler.stacks)
+        return result
+
+    def summary(self):
+        lines = []
+        for (mission, players), stacks in sorted(self.cells.items()):
+            total = sum(stacks.values())
+            lines.append(f"Mission {mission}, {players} players: {total:.3f}s profiled ({self.mode})")
+            if not total:
+                continue
+            categories, own, inclusive = Counter(), Counter(), Counter()
+            for stack, seconds in stacks.items():
+                categories[category(stack)] += seconds
+                if stack:
+                    own[stack[-1]] += seconds
+                for label in set(stack):
+                    inclusive[label] += seconds
+            lines.append(f"  {'Category':<24} {'Seconds':>9} {'Share':>6}")
+            for name, seconds in categories.most_common():
+                lines.append(f"  {name:<24} {seconds:>9.3f} {seconds / total:>6.1%}")
+            lines.append(f"  {'Top functions':<60} {'Self s':>9} {'Self':>6} {'Total s':>9}")
+            for label, seconds in own.most_common(self.top):
+                lines.append(f"  {label[-60:]:<60} {seconds:>9.3f} {seconds / total:>6.1%} {inclusive[label]:>9.3f}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write(self, directory):
+        """One m<mission>-p<players>.collapsed per cell and summary.txt; returns the summary."""
+        os.makedirs(directory, exist_ok=True)
+        for (mission, players), stacks in self.cells.items():
+            with open(os.path.join(directory, f"m{mission}-p{players}.collapsed"), "w") as f:
+                for stack, seconds in sorted(stacks.items()):
+                    microseconds = round(seconds * 1e6)
+                    if stack and microseconds:
+                        f.write(f"{';'.join(stack)} {microseconds}\n")
+        summary = self.summary()
+        with open(os.path.join(directory, "summary.txt"), "w") as f:
+            f.write(summary)
+        return summary
+
+
+def add_arguments(parser):
+    """The --profile options, shared by simulate.py and rollout.py."""
+    parser.add_argument("--profile", choices=MODES, default=None, help="Profile the run: sampling or deterministic")
+    parser.add_argument("--profile-dir", default="profile", help="Where collapsed stacks and summary.txt go")
+    parser.add_argument("--profile-interval", type=float, default=0.001, help="Seconds between samples")
+    parser.add_argument("--profile-window", type=float, nargs=2, default=None, metavar=("START", "STOP"),
+                        help="Only record between these seconds of the run")
+    parser.add_argument("--profile-top", type=int, default=20, help="Functions listed per mission and player count")
+
+
+def session(args):
+    """A Session for parsed add_arguments() options, or None without --profile."""
+    if args.profile is None:
+        return None
+    return Session(args.profile, args.profile_interval, tuple(args.profile_window or (0.0, None)), args.profile_top)
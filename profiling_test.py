@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from profiling import Profiler, Session, category
+from simulate import run
+
+
+def test_stacks_are_categorised_by_their_innermost_known_frame():
+    driver = ("simulate:main", "simulate:run", "simulate:play_game")
+    assert category(driver) == "driver"
+    assert category(driver + ("the_crew_game:TheCrewGame.play", "the_crew_game:TheCrewGame._process_trick",
+                              "the_crew_game:TheCrewGame._process_trick.<locals>.card_strength")) == "engine _process_trick"
+    assert category(driver + ("the_crew_game:TheCrewGame.play", "the_crew_game:TheCrewGame._check_radio_card",
+                              "builtins:sorted")) == "engine play"
+    assert category(driver + ("the_crew_game:TheCrewGame.__init__", "random:Random.shuffle")) == "engine other"
+    assert category(driver + ("heuristic:HeuristicAgent.choose_move", "crew_sim:legal_moves")) == "agent"
+    assert category(("rollout:main", "llm_client:LLMClient.complete", "httpx._client:Client.send", "_ssl:_SSLSocket.read")) \
+        == "llm wait"
+
+
+@pytest.mark.parametrize("mode", ["trace", "sample"])
+def test_profiled_runs_are_split_by_mission_and_player_count(tmp_path, mode):
+    session = Session(mode, interval=0.0005)
+    results = run("heuristic", [1, 4], 3, 40, engine="crew", profile=session, workers=2)
+    assert len(results) == 80
+    assert set(session.cells) == {(1, 3), (4, 3)}
+
+    summary = session.write(tmp_path)
+    assert "Mission 4, 3 players" in summary and (tmp_path / "summary.txt").read_text() == summary
+    lines = (tmp_path / "m4-p3.collapsed").read_text().splitlines()
+    assert lines and all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    if mode == "trace":  # Every call is seen; a short sampled run may miss some
+        categories = {category(tuple(line.rsplit(" ", 1)[0].split(";"))) for line in lines}
+        assert {"engine play", "engine _process_trick", "engine _deal_cards", "agent", "driver"} <= categories
+
+
+def test_only_the_window_is_recorded():
+    def busy(seconds):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+    with Profiler("sample", interval=0.001, window=(0.1, 0.2)) as profiler:
+        busy(0.3)
+    assert 0.05 < sum(profiler.stacks.values()) < 0.15
+    assert any(stack[-1].endswith("busy") for stack in profiler.stacks)
+
+    session = Session("trace", window=(1000, None))
+    session.run((1, 3), busy, 0.01)
+    assert not session.cells[(1, 3)]
@@ -0,0 +1,76 @@
+"""
+Replay recorded moves on TheCrewGame with its full commentary.
+
+    python replay.py data/heuristic --game 12
+    python replay.py '{"players": 3, "mission": 2, "seed": 7, "moves": [[0, "G3"], [1, "G5"]]}'
+    python replay.py case.json --state
+
+The moves come from a trajectory.py dataset (one game of it) or from a JSON case like the
+ones differential.py prints. The game is dealt from its seed with simulate.SetupResponder's
+setup answers, exactly as simulate.py played it; games recorded with --pool need the same
+--pool here. Moves the engine rejects are shown with its error and skipped, and a failed
+attempt is restarted when more moves follow.
+"""
+import argparse
+import json
+import os
+
+from game_config import GameplayError
+from simulate import SetupResponder
+from the_crew_game import TheCrewGame
+
+
+def load_case(source, game_index=0):
+    """A {"players", "mission", "seed", "moves"} case from a JSON string or file, or a trajectory directory."""
+    if os.path.isdir(source):
+        from trajectory import TrajectoryDataset
+
+        return TrajectoryDataset(source).game(game_index)
+    if os.path.exists(source):
+        with open(source) as f:
+            return json.load(f)
+    return json.loads(source)
+
+
+def replay(case, pool=None, print_fn=print, show_state=False):
+    """Play the case's moves on a fresh TheCrewGame; returns the game."""
+    deal = None
+    if pool is not None:
+        from deal_pool import open_pool
+
+        pool = open_pool(pool)
+        deal = pool.deal(case["seed"] % len(pool))
+    game = TheCrewGame(num_players=case["players"], num_mission=case["mission"], seed=case["seed"], deal=deal,
+                       input_fn=SetupResponder(), print_fn=print_fn)
+    moves = case["moves"]
+    for number, (player, move) in enumerate(moves, 1):
+        if show_state:
+            print_fn(game.state(player))
+        print_fn(f"Player {player + 1} plays {move}" if player != 2 or game.num_players != 2 else f"JARVIS plays {move}")
+        try:
+            game.play(move, player)
+        except (GameplayError, ValueError) as error:
+            print_fn(f"  rejected: {error}")
+            continue
+        if number < len(moves) and game.is_over():  # Restarts a failed attempt, as the drivers do
+            break
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Trajectory dataset directory, JSON file or JSON string")
+    parser.add_argument("--game", type=int, default=0, help="Game of the dataset to replay")
+    parser.add_argument("--pool", default=None, help="Deal pool the game was played on")
+    parser.add_argument("--state", action="store_true", help="Print the acting player's view before every move")
+    args = parser.parse_args()
+
+    case = load_case(args.source, args.game)
+    game = replay(case, args.pool, show_state=args.state)
+    success = set(game.completed_tasks) == set(game.task_ordering)
+    print(f"\nMission {case['mission']}, {case['players']} players, seed {case['seed']}: "
+          f"{'success' if success else 'not completed'} after {len(case['moves'])} moves, attempt {game.attempts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,90 @@
 from the_crew_game import TheCrewGame, GameplayError
-from openai import OpenAI
-import re
+from belief import BeliefTracker
+from canonical import canonicalize_view, invert, relabel_move
+from commander import CommanderInput, CommanderOptimizer
+from crew_sim import legal_moves
+from distress import AdvisedInput, DistressAdvisor
+from endgame import EndgameSolver
+from llm_client import LLMClient, LLMUnavailable
+from heuristic import HeuristicAgent
+from ismcts import InformationSet, endgame_vote
+from move_protocol import answer_text, extract_move, legal_move_strings, repair_move, request_options
+from speculation import Speculator
+import profiling
+import argparse
+import copy
 import os
+import pickle
 import sys
-from unittest.mock import patch
 import random
 from dotenv import load_dotenv
 load_dotenv()
 
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# One rate-limited, retrying client shared by every game in this process (see llm_client.py for the
+# CREW_LLM_* settings; CREW_LLM_BASE_URL points it at another endpoint, e.g. fake_openai.py)
+llm = LLMClient.from_env()
+# How move answers are constrained to the legal moves: json_schema, tools (function calling) or text
+MOVE_PROTOCOL = os.getenv("CREW_LLM_MOVE_PROTOCOL", "json_schema")
+# Seats ahead to prompt speculatively while the current one is thinking (0 turns it off; see speculation.py)
+SPECULATE_DEPTH = int(os.getenv("CREW_LLM_SPECULATE", "0"))
+# Simulation advice for the distress-signal questions: "hint" adds it to the model's question,
+# "answer" answers without the model, unset leaves them to the model alone (see distress.py)
+DISTRESS_ADVISOR = os.getenv("CREW_DISTRESS_ADVISOR", "")
+distress_advisor = DistressAdvisor() if DISTRESS_ADVISOR in ("hint", "answer") else None
+# Settle commander's decision/distribution missions by simulation instead of a chain of model calls
+commander_optimizer = CommanderOptimizer() if os.getenv("CREW_COMMANDER_OPTIMIZER") else None
+
+# Exact solver for the last tricks; set CREW_ENDGAME_CACHE to a file path to persist its memo table across runs
+endgame_solver = EndgameSolver(cache_path=os.getenv("CREW_ENDGAME_CACHE"))
+# Deals sampled from the acting player's beliefs per endgame move (the solver never sees the real hidden hands)
+ENDGAME_SAMPLES = int(os.getenv("CREW_ENDGAME_SAMPLES", "32"))
+
+class ResponseCache:
+    """
+    Model moves keyed by the canonical view of the player to act.
+
+    Views that only differ by a color permutation or by the ranks of already-played cards
+    share one entry; the stored move is kept in canonical card names and translated back
+    through the current view's mapping.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.moves = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.moves = pickle.load(f)
+
+    def lookup(self, game, player_id):
+        """Return (key, forward mapping, cached move or None) for the player's current view."""
+        key, forward = canonicalize_view(game, player_id)
+        move = self.moves.get(key)
+        if move is None:
+            self.misses += 1
+            return key, forward, None
+        self.hits += 1
+        return key, forward, relabel_move(move, invert(forward))
+
+    def peek(self, game, player_id):
+        """The cached move for this view, without counting a hit or a miss."""
+        key, forward = canonicalize_view(game, player_id)
+        move = self.moves.get(key)
+        return None if move is None else relabel_move(move, invert(forward))
+
+    def store(self, key, forward, move):
+        self.moves[key] = relabel_move(move, forward)
+
+    def save(self):
+        if self.path:
+            with open(self.path, "wb") as f:
+                pickle.dump(self.moves, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Reuse model answers for equivalent views across runs (opt-in: set CREW_RESPONSE_CACHE to a file path)
+response_cache = ResponseCache(os.getenv("CREW_RESPONSE_CACHE")) if os.getenv("CREW_RESPONSE_CACHE") else None
 
 def mock_input(prompt_text, responses=None):
     """Simulates input() but uses OpenAI to generate responses to all questions."""
@@ -29,8 +103,7 @@ def mock_input(prompt_text, responses=None):
     )
     
     # Use OpenAI to generate a response to the question
-    ai_response = client.chat.completions.create(
-        model="gpt-4o",
+    ai_response = llm.chat(
         messages=[
             {"role": "system", "content": 
                 "You are playing The Crew: The Quest for Planet Nine board game. "
@@ -49,109 +122,262 @@ def mock_input(prompt_text, responses=None):
     print(f"AI response: {response}")  # Debugging statement
     return response
 
-def run_rollout():
+def move_messages(game, pid, history, belief):
+    """The legal move strings and the chat that asks `pid` for a move (history plus the state prompt)."""
+    moves = legal_move_strings(game, pid)
+    state = game.state(pid)
+    return moves, history + [{
+        "role": "user",
+        "content": (
+            f"You are an expert board game player assisting in a game of The Crew: The Quest for Planet Nine.\n"
+            f"Here is the current state:\n{state}\n"
+            f"{belief.summary()}\n"
+            "Suggestions for the next move should always follow these rules:\n"
+            "1. Complete numbered tasks first (1, 2, 3, etc.).\n"
+            "2. After all numbered tasks are completed, complete the arrowed tasks in the following order: < before << before <<< before <<<<.\n"
+            "3. The omega task must be completed last, after all other tasks are done.\n"
+            "4. Simple tasks can be completed at any time after the numbered tasks and before the omega task.\n"
+            "5. If the distress signal is active (before the first trick), players must pass cards in the specified direction (clockwise or counter-clockwise).\n"
+            "6. Only the assigned player may complete a task.\n"
+            "7. Always follow suit unless playing a Rocket card.\n\n"
+            "8. Focus on the tasks assigned to the players. you have to complete those to win the game and remember the task has to be completed by the player it is assigned to. A task is won when u win the round that task card was played in for example if b2 is assigned to player 1, then player 1 has to play the highest b card in the round to win that round in which b2 is played in.\n"
+            "9. You will be given multiple atttempts. You have to sucessfully finish the mission in minimum attempts as possible. If you use the distress token, your final number of attemtps will be increadsed by 1.\n"
+            "10. You can attempt one mission a maximum of 10 times.\n"
+            f"Legal moves right now: {', '.join(moves)}\n"
+            "Provide short reasoning, then your move in JSON format like:\n"
+            "{\"reasoning\": \"...\", \"move\": \"P5\"} or {\"reasoning\": \"...\", \"move\": \"radio highest P5\"}.\n"
+            "The move must be exactly one of the legal moves."
+        )
+    }]
+
+_predictor = HeuristicAgent(use_radio=False)
+
+def synced_belief(game, pid, beliefs):
+    """A copy of pid's tracker (or a new one) brought up to date with `game`, leaving beliefs untouched."""
+    belief = copy.deepcopy(beliefs[pid]) if pid in beliefs else BeliefTracker(game, pid)
+    belief.sync(game)
+    return belief
+
+def endgame_move(game, pid, belief):
+    """
+    The solver's move for `pid` from what `pid` can see: exact solves of deals sampled from
+    its beliefs vote, as ISMCTSAgent does. The samples are seeded by the position, so
+    speculation predicts the move the game loop will play.
+    """
+    moves = legal_moves(game, pid)
+    if len(moves) <= 1:
+        return moves[0] if moves else None
+    rng = random.Random(f"{game.seed}:{game.attempts}:{len(game.played_cards)}:{pid}")
+    return endgame_vote(endgame_solver, InformationSet(game, pid, belief), moves, rng, ENDGAME_SAMPLES)
+
+def predict_move(game, pid, beliefs):
+    """Speculation's cheap guess at what `pid` will play: forced, the solver's, cached, else the heuristic's."""
+    if endgame_solver.applies(game):
+        return endgame_move(game, pid, synced_belief(game, pid, beliefs))
+    if response_cache is not None:
+        cached = response_cache.peek(game, pid)
+        if cached is not None:
+            return cached
+    moves = legal_move_strings(game, pid)
+    if len(moves) <= 1:
+        return moves[0] if moves else None
+    return _predictor.choose_move(game, pid)
+
+def speculative_request(game, pid, chat_history, beliefs):
+    """The (messages, options) the game loop would send for `pid` in this position, or None if it would not ask."""
+    if not legal_moves(game, pid) or endgame_solver.applies(game):
+        return None
+    if response_cache is not None and response_cache.peek(game, pid) is not None:
+        return None
+    moves, messages = move_messages(game, pid, chat_history[str(pid)], synced_belief(game, pid, beliefs))
+    return messages, request_options(moves, MOVE_PROTOCOL)
+
+def run_rollout(num_players=3, num_mission=2, seed=42, deal=None):
+    """
+    Play one LLM-driven game and return its outcome (used by simulate.py for per-mission reports).
+
+    deal: optional deal_pool.Deal to play instead of the seeded deal.
+    The outcome has success, attempts, distress_token_usage, score and error (why the game
+    was abandoned when the model stayed unreachable, else None), plus counts of move
+    requests, unusable answers and locally repaired answers, and with CREW_LLM_SPECULATE
+    the speculative calls made, how many were used and the tokens the others wasted.
+    """
     game = type('DummyGame', (object,), {'state': lambda player_id: f"Dummy state for player {player_id}"})()
-    # Apply the patch first to ensure all input() calls are handled by mock_input
-    with patch('builtins.input', side_effect=lambda prompt: mock_input(prompt)):
-        print("Patch applied. Running game...")  # Debugging statement
-        game = TheCrewGame(num_players=3, num_mission=2, seed=42)
-        # Initialize the game **after** patching input
-          # Adjust to use mission 8 directly
-        game_log = []
-        chat_history = {str(i): [] for i in range(max(3,game.num_players))}
-        # Handle the game start
-        starting_player_id = game.whose_turn()
-        state = game.state(starting_player_id)
-        
-        print(f"\nPlayer {starting_player_id + 1} will start the game.")
-        
-        # Now we check if there's a distress signal **after** applying the patch
-        if "distress signal" in state.lower():
-            print("Distress signal detected. AI will handle card passing.")
-        else:
-            print("No distress signal detected. Proceeding directly to game.")
-        
-        try:
-            while not game.is_over():
-                if game.failed:
-                    print("\n🚨 Mission failed. Exiting early.")
-                    break  # Break the loop when game.failed is True
-                
-                pid = game.whose_turn()
-                state = game.state(pid)
-                log_string = f"\nPlayer: {pid + 1}\nState:\n{state}\n"
-                
-                # Proceed with AI's suggested move
-                chat = chat_history[str(pid)] + [{
-                    "role": "user",
-                    "content": (
-                        f"You are an expert board game player assisting in a game of The Crew: The Quest for Planet Nine.\n"
-                        f"Here is the current state:\n{state}\n"
-                        "Suggestions for the next move should always follow these rules:\n"
-                        "1. Complete numbered tasks first (1, 2, 3, etc.).\n"
-                        "2. After all numbered tasks are completed, complete the arrowed tasks in the following order: < before << before <<< before <<<<.\n"
-                        "3. The omega task must be completed last, after all other tasks are done.\n"
-                        "4. Simple tasks can be completed at any time after the numbered tasks and before the omega task.\n"
-                        "5. If the distress signal is active (before the first trick), players must pass cards in the specified direction (clockwise or counter-clockwise).\n"
-                        "6. Only the assigned player may complete a task.\n"
-                        "7. Always follow suit unless playing a Rocket card.\n\n"
-                        "8. Focus on the tasks assigned to the players. you have to complete those to win the game and remember the task has to be completed by the player it is assigned to. A task is won when u win the round that task card was played in for example if b2 is assigned to player 1, then player 1 has to play the highest b card in the round to win that round in which b2 is played in.\n"
-                        "9. You will be given multiple atttempts. You have to sucessfully finish the mission in minimum attempts as possible. If you use the distress token, your final number of attemtps will be increadsed by 1.\n"
-                        "10. You can attempt one mission a maximum of 10 times.\n"
-                        "Provide short reasoning, then your move in JSON format like:\n"
-                        "{\"move\": \"P5\"} or {\"move\": \"RADIO P5\"}.\nOnly use cards from the player's hand."
-                    )
-                }]
-                
-                # Call OpenAI API to get the AI response
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=chat
-                )
-                
-                text_response = response.choices[0].message.content.strip()
-                chat_history[str(pid)].append({"role": "assistant", "content": text_response})
-                
-                # Match the AI's response to extract the move
-                match = re.search(r'"move"\s*:\s*"([^"]+)"', text_response)
-                if match:
-                    move = match.group(1)
-                    log_string += f"🧠 Suggested move: {move}\n"
+    print("Running game...")  # Debugging statement
+    # Setup questions (distress signal, commander prompts, restarts) are answered by the model through mock_input
+    input_fn = mock_input
+    if commander_optimizer is not None:
+        input_fn = CommanderInput(commander_optimizer, input_fn)
+    if distress_advisor is not None:
+        input_fn = AdvisedInput(distress_advisor, input_fn, num_mission, hint=DISTRESS_ADVISOR == "hint")
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal, input_fn=input_fn)
+    game_log = []
+    chat_history = {str(i): [] for i in range(max(3,game.num_players))}
+    beliefs = {}  # Per-player card tracking for the "unseen cards" part of the prompt
+    # Handle the game start
+    starting_player_id = game.whose_turn()
+    state = game.state(starting_player_id)
+    
+    print(f"\nPlayer {starting_player_id + 1} will start the game.")
+    
+    # Now we check if there's a distress signal
+    if "distress signal" in state.lower():
+        print("Distress signal detected. AI will handle card passing.")
+    else:
+        print("No distress signal detected. Proceeding directly to game.")
+    
+    error = None
+    model_calls = invalid_answers = repaired_answers = 0
+    speculator = Speculator(lambda messages, options: llm.chat(messages, **options), SPECULATE_DEPTH) if SPECULATE_DEPTH else None
+    try:
+        while not game.is_over():
+            if game.failed:
+                print("\n🚨 Mission failed. Exiting early.")
+                break  # Break the loop when game.failed is True
+            
+            pid = game.whose_turn()
+            if not legal_moves(game, pid):
+                print(f"\n❌ Player {pid + 1} has no cards left to play. Mission failed!")
+                game.failed = True  # is_over() restarts the mission
+                continue
+            state = game.state(pid)
+            log_string = f"\nPlayer: {pid + 1}\nState:\n{state}\n"
+            if pid not in beliefs:
+                beliefs[pid] = BeliefTracker(game, pid)
+            else:
+                beliefs[pid].sync(game)
+
+            # Once every hand is small, play the solver's move (over deals this player could be facing) instead of asking the model
+            if endgame_solver.applies(game):
+                move = endgame_move(game, pid, beliefs[pid])
+                log_string += f"🧮 Endgame solver move: {move} (voted over {ENDGAME_SAMPLES} deals sampled from Player {pid + 1}'s view)\n"
+                game.play(move=move, player_id=pid)
+                log_string += f"✅ Player {pid + 1} played: {move}\n"
+                game_log.append(log_string)
+                print(log_string)
+                continue
+            
+            cache_entry = None
+            if response_cache is not None:
+                cache_key, cache_forward, cached_move = response_cache.lookup(game, pid)
+                cache_entry = (cache_key, cache_forward)
+                if cached_move is not None:
                     try:
-                        game.play(move=move, player_id=pid)
-                        log_string += f"✅ Player {pid + 1} played: {move}\n"
-                        log_string += f"🂠 Remaining hand: {sorted(game.hands[pid])}\n"
-                    except GameplayError as e:
-                        log_string += f"❌ Illegal move: {e}\n"
-                        chat_history[str(pid)].append({
-                            "role": "user",
-                            "content": f"Illegal move: {e}. Try again."
-                        })
-                        print(log_string)
-                        continue
-                    except RuntimeError as e:
-                        # Log the error but don't re-raise, let the main loop handle it
-                        log_string += f"\n🚨 Mission failed during move: {e}"
-                        game.failed = True  # Make sure failed flag is set
+                        game.play(move=cached_move, player_id=pid)
+                        log_string += f"♻️ Cached move: {cached_move}\n✅ Player {pid + 1} played: {cached_move}\n"
                         game_log.append(log_string)
                         print(log_string)
-                        break  # Break out of the main loop
-                
+                        continue
+                    except GameplayError:
+                        pass  # Fall back to asking the model
+
+            # Proceed with AI's suggested move
+            moves, chat = move_messages(game, pid, chat_history[str(pid)], beliefs[pid])
+            options = request_options(moves, MOVE_PROTOCOL)
+            
+            # Call OpenAI API to get the AI response (rate limited and retried by llm_client),
+            # unless the same request already went out speculatively; either way guess ahead first
+            speculative = speculator.take(chat, options) if speculator else None
+            if speculator:
+                speculator.launch(game, pid, lambda g, p: predict_move(g, p, beliefs),
+                                  lambda g, p: speculative_request(g, p, chat_history, beliefs))
+            response = speculative.result() if speculative is not None else llm.chat(chat, **options)
+            model_calls += 1
+            
+            text_response = answer_text(response.choices[0].message).strip()
+            chat_history[str(pid)].append({"role": "assistant", "content": text_response})
+            
+            # Take the move from the structured answer, repairing it locally when it can only mean one legal move
+            raw_move = extract_move(text_response)
+            move, repaired = repair_move(raw_move, moves)
+            if move is None:
+                invalid_answers += 1
+                log_string += f"❌ Unusable answer: {raw_move!r}\n"
+                chat_history[str(pid)].append({
+                    "role": "user",
+                    "content": f"{raw_move!r} is not a legal move. Answer with exactly one of: {', '.join(moves)}."
+                })
+                print(log_string)
+                continue
+            if repaired:
+                repaired_answers += 1
+                log_string += f"🔧 Repaired answer {raw_move!r} to {move}\n"
+            log_string += f"🧠 Suggested move: {move}\n"
+            try:
+                game.play(move=move, player_id=pid)
+                if cache_entry is not None:
+                    response_cache.store(*cache_entry, move)
+                log_string += f"✅ Player {pid + 1} played: {move}\n"
+                log_string += f"🂠 Remaining hand: {sorted(game.hands[pid])}\n"
+            except GameplayError as e:
+                log_string += f"❌ Illegal move: {e}\n"
+                chat_history[str(pid)].append({
+                    "role": "user",
+                    "content": f"Illegal move: {e}. Try again."
+                })
+                print(log_string)
+                continue
+            except RuntimeError as e:
+                # Log the error but don't re-raise, let the main loop handle it
+                log_string += f"\n🚨 Mission failed during move: {e}"
+                game.failed = True  # Make sure failed flag is set
                 game_log.append(log_string)
                 print(log_string)
+                break  # Break out of the main loop
             
-            # After the game is over (whether normally or due to failure)
-            score = game.attempts+game.distress_token_usage
-            game_log.append(f"\nFinal Scores: {score} attempts taken. Distress token used: {game.distress_signal_active}")
-            print(f"\nFinal Scores: {score} attempts taken. Distress token used: {game.distress_signal_active}")
-            
-            if game.failed:
-                sys.exit(1)  # Exit with error code if the mission failed
-        
-        except Exception as e:
-            print(f"\n🚨 Unexpected error: {e}")
-            sys.exit(1)
+            game_log.append(log_string)
+            print(log_string)
+    except LLMUnavailable as e:
+        # Retries are exhausted: report this game as unfinished instead of killing the process
+        error = str(e)
+        print(f"\n🚨 Model unavailable, stopping this game: {e}")
+    except GameplayError as e:
+        print(f"\n🚨 {e}")  # is_over() gives up after 10 attempts
+
+    speculation = speculator.close() if speculator else {"launched": 0, "hits": 0, "wasted_tokens": 0}
+
+    # After the game is over (whether normally or due to failure)
+    score = game.attempts+game.distress_token_usage
+    if endgame_solver.cache_path:
+        endgame_solver.save()
+    if response_cache is not None:
+        response_cache.save()
+    game_log.append(f"\nFinal Scores: {score} attempts taken. Distress token used: {game.distress_signal_active}")
+    print(f"\nFinal Scores: {score} attempts taken. Distress token used: {game.distress_signal_active}")
+
+    return {
+        "success": not game.failed and set(game.completed_tasks) == set(game.task_ordering),
+        "attempts": game.attempts,
+        "distress_token_usage": game.distress_token_usage,
+        "score": score,
+        "error": error,
+        "model_calls": model_calls,
+        "invalid_answers": invalid_answers,
+        "repaired_answers": repaired_answers,
+        "speculative_calls": speculation["launched"],
+        "speculative_hits": speculation["hits"],
+        "wasted_tokens": speculation["wasted_tokens"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Play one mission with the model in every seat.")
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--mission", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profile = profiling.session(args)
+    if profile is None:
+        outcome = run_rollout(num_players=args.players, num_mission=args.mission, seed=args.seed)
+    else:
+        outcome = profile.run((args.mission, args.players), run_rollout, num_players=args.players, num_mission=args.mission,
+                              seed=args.seed)
+    print(outcome)
+    if profile is not None:
+        print(profile.write(args.profile_dir))
+    return 0 if outcome["success"] else 1  # Exit with error code if the mission failed
+
 
 # Run normally now
 if __name__ == "__main__":
-    run_rollout()
+    sys.exit(main())
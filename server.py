@@ -0,0 +1,423 @@
+"""
+A local game server: agents in other processes play TheCrewGame sessions over HTTP/JSON.
+
+    python server.py --port 8765 --max-sessions 10000 --idle-timeout 300
+    python crew.py serve --port 8765
+
+    curl -s -X POST localhost:8765/sessions -d '{"players": 3, "mission": 2, "seed": 7}'
+    curl -s 'localhost:8765/sessions/<id>?player=0'                   # game.state(0) text
+    curl -s 'localhost:8765/sessions/<id>?player=0&format=structured' # trajectory.observe row
+    curl -s 'localhost:8765/sessions/<id>/legal'                       # moves of the player to act
+    curl -s -X POST localhost:8765/sessions/<id>/play -d '{"player": 0, "move": "G3"}'
+    curl -s -X POST localhost:8765/batch -d '{"requests": [{"op": "legal", "session": "<id>"}, ...]}'
+
+Every response is a JSON object; failures have an HTTP error status and an "error"
+message (the engine's own for rejected moves). Game responses carry the session's status
+(playing, success or failed), whose turn it is, the attempt, and the engine's printed
+messages since the last response. Setup questions are answered like simulate.py does
+(SetupResponder), and after each move the session is settled the way rollout.py drives
+the engine: a failed attempt is restarted by is_over() until the session's max_attempts.
+
+One asyncio loop serves every connection (HTTP/1.1 keep-alive, pipelined requests are
+answered in order) and plays the moves inline, which takes microseconds to a millisecond;
+/batch runs many operations ({"op": "play", "session": ..., "move": ...}) in one round
+trip and answers with one entry each, its HTTP status as "code", for agents driving many
+games at once. Memory is bounded: at most --max-sessions sessions (creating more is
+refused with 503 until some end), each keeping only its last MAX_MESSAGES messages, and
+sessions idle for --idle-timeout seconds are evicted, least recently used first. Client
+is a small keep-alive client for Python agents.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from crew_sim import legal_moves
+from game_config import GameplayError
+from move_protocol import legal_move_strings
+from simulate import SetupResponder
+from the_crew_game import CARD_INDEX, TheCrewGame
+from trajectory import observe
+import mock_missions
+
+
+MAX_MESSAGES = 64  # Engine messages kept per session between responses
+MAX_BODY = 1 << 20
+MAX_BATCH = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    __slots__ = ("game", "status", "max_attempts", "messages", "last_used")
+
+    def __init__(self, game, max_attempts, messages):
+        self.game = game
+        self.status = "playing"
+        self.max_attempts = max_attempts
+        self.messages = messages
+        self.last_used = time.monotonic()
+
+
+class GameServer:
+    """The sessions and the operations on them; serve() puts them behind HTTP."""
+
+    def __init__(self, max_sessions=10_000, idle_timeout=300.0, max_attempts=10):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.sessions = OrderedDict()  # id -> Session, least recently used first
+        self.counts = {"created": 0, "evicted": 0, "finished": 0, "requests": 0, "moves": 0}
+        self.operations = {"create": self.create, "observe": self.observe, "legal": self.legal, "play": self.play,
+                           "delete": self.delete}
+
+    # Operations: a dict of parameters in, a JSON-able dict out, ApiError on failure
+
+    def create(self, params):
+        players = _integer(params, "players", 3)
+        mission = _integer(params, "mission", 1)
+        seed = _integer(params, "seed", None)
+        max_attempts = _integer(params, "max_attempts", self.max_attempts)
+        if players not in (2, 3, 4, 5):
+            raise ApiError(400, "players must be 2 to 5")
+        if mission not in mock_missions.missions:
+            raise ApiError(400, f"Unknown mission {mission}")
+        if len(self.sessions) >= self.max_sessions and not self.evict_idle():
+            raise ApiError(503, f"{self.max_sessions} sessions are open; finish or delete some first")
+        messages = deque(maxlen=MAX_MESSAGES)
+        game = TheCrewGame(num_players=players, num_mission=mission, seed=random.getrandbits(32) if seed is None else seed,
+                           input_fn=SetupResponder(), print_fn=messages.append)
+        session = Session(game, max_attempts, messages)
+        session_id = secrets.token_hex(8)
+        self.sessions[session_id] = session
+        self.counts["created"] += 1
+        self._settle(session)
+        return {"session": session_id, "seed": game.seed, **self._summary(session)}
+
+    def observe(self, params):
+        session, player_id = self._lookup(params)
+        view = params.get("format", "text")
+        if view == "text":
+            return {"state": session.game.state(player_id), "player": player_id, **self._summary(session)}
+        if view == "structured":
+            return {"observation": observe(session.game, player_id), "player": player_id, **self._summary(session)}
+        raise ApiError(400, "format must be text or structured")
+
+    def legal(self, params):
+        session, player_id = self._lookup(params)
+        moves = legal_move_strings(session.game, player_id) if session.status == "playing" else []
+        return {"moves": moves, "player": player_id, **self._summary(session)}
+
+    def play(self, params):
+        session, player_id = self._lookup(params)
+        move = params.get("move")
+        if not isinstance(move, str):
+            raise ApiError(400, "move must be a string such as \"G3\" or \"radio highest B9\"")
+        if session.status != "playing":
+            raise ApiError(409, f"The game is over ({session.status})")
+        # The shape is checked here, the rules by the engine (which indexes into malformed moves)
+        parts = move.split()
+        if not (len(parts) == 1 and parts[0].upper() in CARD_INDEX
+                or len(parts) == 3 and parts[0].lower() == "radio" and parts[2].upper() in CARD_INDEX):
+            raise ApiError(400, f"{move!r} is neither a card nor \"radio <highest|lowest|only> <card>\"")
+        try:
+            session.game.play(" ".join(parts), player_id=player_id)
+        except (GameplayError, ValueError) as error:
+            raise ApiError(400, str(error)) from None
+        self.counts["moves"] += 1
+        self._settle(session)
+        return self._summary(session)
+
+    def delete(self, params):
+        if self.sessions.pop(params.get("session"), None) is None:
+            raise ApiError(404, "No such session")
+        return {"deleted": True}
+
+    def batch(self, params):
+        requests = params.get("requests")
+        if not isinstance(requests, list) or len(requests) > MAX_BATCH:
+            raise ApiError(400, f"requests must be a list of at most {MAX_BATCH} operations")
+        return {"responses": [self.call(request.get("op"), request) if isinstance(request, dict)
+                              else {"code": 400, "error": "Each request must be an object"}
+                              for request in requests]}
+
+    def stats(self, params):
+        return {"sessions": len(self.sessions), "max_sessions": self.max_sessions, **self.counts}
+
+    def call(self, op, params):
+        """One operation as a batch entry: its response with the HTTP status as "code", errors included."""
+        operation = self.operations.get(op)
+        if operation is None:
+            return {"code": 400, "error": f"Unknown op {op!r}; choose from {', '.join(self.operations)}"}
+        try:
+            return {"code": 200, **operation(params)}
+        except ApiError as error:
+            return {"code": error.status, "error": str(error)}
+        except Exception as error:  # A bug answers for its own entry, not the rest of the batch
+            return {"code": 500, "error": f"{type(error).__name__}: {error}"}
+
+    # Sessions
+
+    def _lookup(self, params):
+        session = self.sessions.get(params.get("session"))
+        if session is None:
+            raise ApiError(404, "No such session (finished sessions stay until deleted or evicted)")
+        session.last_used = time.monotonic()
+        self.sessions.move_to_end(params["session"])
+        game = session.game
+        player_id = _integer(params, "player", game.whose_turn())
+        if player_id not in game.hands:
+            raise ApiError(400, f"No player {player_id} in this game")
+        return session, player_id
+
+    def _settle(self, session):
+        """
+        Finish the move the way rollout.py drives the engine: restart failed attempts, detect the end.
+
+        The engine itself restarts an attempt whose hands ran out, hence the attempts check.
+        """
+        game = session.game
+        try:
+            while True:
+                if game.attempts > session.max_attempts or game.failed and game.attempts == session.max_attempts:
+                    status = "failed"
+                    break
+                if game.is_over():  # Restarts a failed attempt
+                    status = "success"
+                    break
+                if legal_moves(game, game.whose_turn()):
+                    status = "playing"
+                    break
+                game.failed = True  # The player to move has no cards left
+        except GameplayError as error:  # The engine's own attempt limit
+            game.print(str(error))
+            status = "failed"
+        if status != "playing" and session.status == "playing":
+            self.counts["finished"] += 1
+        session.status = status
+
+    def _summary(self, session):
+        game = session.game
+        messages = list(session.messages)
+        session.messages.clear()
+        return {
+            "status": session.status,
+            "turn": game.whose_turn() if session.status == "playing" else None,
+            "attempt": game.attempts,
+            "tricks": game.turn - 1,
+            "completed_tasks": list(game.completed_tasks),
+            "messages": messages,
+        }
+
+    def evict_idle(self, now=None):
+        """Drop sessions idle for idle_timeout seconds; returns how many."""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_used < self.idle_timeout:
+                break
+            del self.sessions[session_id]
+            evicted += 1
+        self.counts["evicted"] += evicted
+        return evicted
+
+    # HTTP
+
+    def handle(self, method, target, body=b""):
+        """(HTTP status, response dict) for one request."""
+        self.counts["requests"] += 1
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            params = dict(parse_qsl(url.query))
+            if body:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    raise ApiError(400, "The body must be JSON") from None
+                if not isinstance(payload, dict):
+                    raise ApiError(400, "The body must be a JSON object")
+                params.update(payload)
+            route = self._route(method, parts)
+            if len(parts) > 1:
+                params["session"] = parts[1]
+            return 200, route(params)
+        except ApiError as error:
+            return error.status, {"error": str(error)}
+
+    def _route(self, method, parts):
+        routes = {
+            ("POST", ("sessions",)): self.create,
+            ("GET", ("sessions", None)): self.observe,
+            ("DELETE", ("sessions", None)): self.delete,
+            ("GET", ("sessions", None, "legal")): self.legal,
+            ("POST", ("sessions", None, "play")): self.play,
+            ("POST", ("batch",)): self.batch,
+            ("GET", ("stats",)): self.stats,
+        }
+        shape = tuple(None if index == 1 and parts[0] == "sessions" else part for index, part in enumerate(parts))
+        route = routes.get((method, shape))
+        if route is None:
+            raise ApiError(404 if not any(key[1] == shape for key in routes) else 405, f"No route for {method} /{'/'.join(parts)}")
+        return route
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    writer.write(_response(413, {"error": f"Bodies are limited to {MAX_BODY} bytes"}, close=True))
+                    break
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = self.handle(method, target, body)
+                except Exception as error:  # A bug must not take the other sessions down
+                    status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+                writer.write(_response(status, payload, close))
+                if close:
+                    break
+                if writer.transport.get_write_buffer_size() > 1 << 16:
+                    await writer.drain()
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _evict_forever(self):
+        while True:
+            await asyncio.sleep(max(0.05, min(self.idle_timeout / 4, 30.0)))
+            self.evict_idle()
+
+    async def serve(self, host="127.0.0.1", port=8765, started=None):
+        """Serve until cancelled; started(port) is called once the socket listens."""
+        server = await asyncio.start_server(self._connection, host, port, backlog=1024)
+        evictor = asyncio.create_task(self._evict_forever())
+        if started is not None:
+            started(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+def _integer(params, name, default):
+    value = params.get(name, default)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be an integer") from None
+
+
+def _response(status, payload, close=False):
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n{'Connection: close' if close else 'Connection: keep-alive'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def serve_in_thread(server, host="127.0.0.1", port=0):
+    """Run server.serve on a daemon thread; returns the port it listens on."""
+    ready = threading.Event()
+    bound = []
+
+    def started(actual_port):
+        bound.append(actual_port)
+        ready.set()
+
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(host, port, started),), daemon=True)
+    thread.start()
+    if not ready.wait(10):
+        raise RuntimeError("The game server did not start")
+    return bound[0]
+
+
+class Client:
+    """Keep-alive JSON client for agents written in Python; methods return the response dicts."""
+
+    def __init__(self, host="127.0.0.1", port=8765, timeout=30.0):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, payload=None):
+        """(HTTP status, response dict)"""
+        body = None if payload is None else json.dumps(payload)
+        self.connection.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def _ok(self, method, path, payload=None):
+        status, data = self.request(method, path, payload)
+        if status != 200:
+            raise ApiError(status, data.get("error", ""))
+        return data
+
+    def create(self, players=3, mission=1, seed=None, **options):
+        return self._ok("POST", "/sessions", {"players": players, "mission": mission, "seed": seed, **options})
+
+    def observe(self, session, player=None, structured=False):
+        query = f"?format={'structured' if structured else 'text'}" + ("" if player is None else f"&player={player}")
+        return self._ok("GET", f"/sessions/{session}{query}")
+
+    def legal(self, session, player=None):
+        return self._ok("GET", f"/sessions/{session}/legal" + ("" if player is None else f"?player={player}"))
+
+    def play(self, session, move, player=None):
+        return self._ok("POST", f"/sessions/{session}/play", {"move": move, **({} if player is None else {"player": player})})
+
+    def delete(self, session):
+        return self._ok("DELETE", f"/sessions/{session}")
+
+    def batch(self, requests):
+        return self._ok("POST", "/batch", {"requests": requests})["responses"]
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="Seconds before an untouched session is evicted")
+    parser.add_argument("--max-attempts", type=int, default=10, help="Default attempts per session (the engine allows 10)")
+    args = parser.parse_args()
+
+    server = GameServer(args.max_sessions, args.idle_timeout, args.max_attempts)
+    try:
+        asyncio.run(server.serve(args.host, args.port, lambda port: print(f"Serving TheCrewGame sessions on "
+                                                                          f"http://{args.host}:{port}")))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
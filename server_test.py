@@ -0,0 +1,113 @@
+import json
+import socket
+
+import pytest
+
+from heuristic import HeuristicAgent
+from server import ApiError, Client, GameServer, serve_in_thread
+from simulate import play_game
+
+
+@pytest.mark.parametrize("mission", [1, 2, 4])
+def test_sessions_play_like_the_simulator(mission):
+    server = GameServer(max_attempts=1)
+    agent = HeuristicAgent()
+    for seed in range(5):
+        info = server.create({"players": 3, "mission": mission, "seed": seed})
+        session_id = info["session"]
+        game = server.sessions[session_id].game
+        while info["status"] == "playing":
+            assert info["turn"] == game.whose_turn()
+            info = server.play({"session": session_id, "move": agent.choose_move(game, info["turn"])})
+        expected = play_game(HeuristicAgent(), 3, mission, seed)
+        assert (info["status"] == "success", info["tricks"]) == (expected["success"], expected["tricks"])
+
+
+def test_moves_are_checked_by_the_engine():
+    server = GameServer(max_attempts=2)
+    info = server.create({"players": 4, "mission": 2, "seed": 3})
+    session_id, turn = info["session"], info["turn"]
+    assert any("Initial Hands" in line for line in info["messages"])
+    legal = server.legal({"session": session_id})["moves"]
+    assert legal and all(move in legal for move in server.sessions[session_id].game.hands[turn])
+    assert "Your hand" in server.observe({"session": session_id, "player": str(turn)})["state"]
+    assert server.observe({"session": session_id, "format": "structured"})["observation"]["player"] == turn
+    for params, status in [({"move": "Z9"}, 400), ({"move": legal[0], "player": (turn + 1) % 4}, 400),
+                           ({"move": 5}, 400), ({"move": legal[0], "player": 9}, 400)]:
+        with pytest.raises(ApiError) as error:
+            server.play({"session": session_id, **params})
+        assert error.value.status == status
+    with pytest.raises(ApiError) as error:
+        server.legal({"session": "missing"})
+    assert error.value.status == 404
+
+    while info["status"] == "playing":  # Lowest-first play loses mission 2 sooner or later
+        info = server.play({"session": session_id, "move": server.legal({"session": session_id})["moves"][0]})
+    assert info["status"] == "failed" and info["attempt"] == 2 and info["turn"] is None
+    with pytest.raises(ApiError) as error:
+        server.play({"session": session_id, "move": "G1"})
+    assert error.value.status == 409
+
+
+def test_empty_move_mid_trick_is_rejected():
+    server = GameServer()
+    session_id = server.create({"players": 3, "mission": 1, "seed": 4})["session"]
+    info = server.play({"session": session_id, "move": server.legal({"session": session_id})["moves"][0]})
+    for move in ("", "   ", "radio", "radio highest"):
+        with pytest.raises(ApiError) as error:
+            server.play({"session": session_id, "move": move})
+        assert error.value.status == 400
+    assert server.handle("POST", f"/sessions/{session_id}/play", b'{"move": ""}')[0] == 400
+    status, payload = server.handle("POST", "/batch", json.dumps({"requests": [
+        {"op": "play", "session": session_id, "move": ""}, {"op": "legal", "session": session_id}]}).encode())
+    assert status == 200 and [entry["code"] for entry in payload["responses"]] == [400, 200]
+    assert server.legal({"session": session_id})["turn"] == info["turn"]  # Nothing was played
+
+    def broken(params):
+        raise IndexError("string index out of range")
+
+    server.operations["legal"] = broken
+    responses = server.batch({"requests": [{"op": "legal", "session": session_id}, {"op": "observe", "session": session_id}]})["responses"]
+    assert [entry["code"] for entry in responses] == [500, 200] and "IndexError" in responses[0]["error"]
+
+
+def test_sessions_are_bounded_and_idle_ones_evicted():
+    server = GameServer(max_sessions=2, idle_timeout=60)
+    first = server.create({"seed": 1})["session"]
+    second = server.create({"seed": 2})["session"]
+    with pytest.raises(ApiError) as error:
+        server.create({"seed": 3})
+    assert error.value.status == 503
+    server.sessions[first].last_used -= 120
+    server.sessions[second].last_used -= 120
+    server.legal({"session": first})  # Touched: no longer idle
+    third = server.create({"seed": 3})["session"]
+    assert set(server.sessions) == {first, third} and server.stats({})["evicted"] == 1
+    assert server.delete({"session": first}) == {"deleted": True}
+    assert server.evict_idle(now=server.sessions[third].last_used + 60) == 1 and not server.sessions
+
+
+def test_http_batches_and_pipelining():
+    port = serve_in_thread(GameServer())
+    client = Client(port=port)
+    sessions = [entry["session"] for entry in client.batch([{"op": "create", "players": 5, "mission": 1, "seed": seed}
+                                                              for seed in range(20)])]
+    legal = client.batch([{"op": "legal", "session": session} for session in sessions] + [{"op": "nope"}])
+    assert [entry["code"] for entry in legal] == [200] * 20 + [400]
+    played = client.batch([{"op": "play", "session": session, "move": entry["moves"][0]}
+                           for session, entry in zip(sessions, legal)])
+    assert all(entry["code"] == 200 and entry["tricks"] == 0 for entry in played)
+    assert client.observe(sessions[0], player=1, structured=True)["player"] == 1
+    assert client.request("GET", "/nowhere")[0] == 404 and client.request("PUT", "/stats")[0] == 405
+    assert client.request("POST", "/sessions", "not an object")[0] == 400
+    assert client.request("GET", "/stats")[1]["sessions"] == 20
+
+    with socket.create_connection(("127.0.0.1", port)) as raw:  # Two requests in one packet, answered in order
+        raw.sendall(f"GET /sessions/{sessions[0]}/legal HTTP/1.1\r\n\r\n"
+                    f"DELETE /sessions/{sessions[0]} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+        data = b""
+        while chunk := raw.recv(65536):
+            data += chunk
+    responses = data.split(b"HTTP/1.1 ")[1:]
+    assert [response.split(b" ")[0] for response in responses] == [b"200", b"200"]
+    assert json.loads(responses[1].split(b"\r\n\r\n", 1)[1]) == {"deleted": True}
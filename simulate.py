@@ -0,0 +1,425 @@
+"""
+Batch simulator: play non-LLM agents through TheCrewGame and report per-mission success.
+
+    python simulate.py --agent ismcts --games 20 --iterations 500
+    python simulate.py --agent random --games 200 --missions 1 2 3 --llm-games 2
+    python simulate.py --agent heuristic --engine sim --games 10000 --workers 8
+    python simulate.py --agent heuristic --games 500 --workers 8 --executor thread
+    python simulate.py --agent heuristic --games 500 --workers 8 --bench-executors
+    python simulate.py --agent policy --weights weights/policy.npz --engine sim --games 10000
+
+--engine sim plays on crew_sim.SimGame (no prompts, prints or restarts), which deals the
+same cards and setup as TheCrewGame for every seed but is much faster. With --pool the
+seeds index a pre-generated deal_pool.py file instead of dealing from the seed.
+
+Games keep no process-wide state (each TheCrewGame has its own random generator, input and
+print), so --executor thread plays them on a thread pool, which scales with cores on a
+free-threaded (no-GIL) interpreter and skips process start-up and pickling otherwise.
+--bench-executors plays the same batch serially, on threads and on processes and compares.
+
+Agents with a choose_moves(games, player_ids) method (policy.PolicyAgent, a NumPy network)
+are driven by play_batched instead: up to the agent's max_batch games are in flight and
+every game waiting for a move is decided in one call.
+
+--record DIR also writes every decision to a trajectory.py dataset (one shard series per
+worker job), for training policies offline. --profile sample|trace profiles the run with
+profiling.py (jobs then run one after another in this process, whatever --workers says).
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from crew_sim import SimGame, legal_moves
+from deal_pool import open_pool
+from heuristic import HeuristicAgent
+from ismcts import ISMCTSAgent
+from the_crew_game import TheCrewGame, quiet
+import mock_missions
+import profiling
+
+
+class RandomAgent:
+    """Plays a uniformly random legal card."""
+
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game, player_id):
+        return self.rng.choice(legal_moves(game, player_id))
+
+
+def policy_agent(**kwargs):
+    from policy import PolicyAgent  # Imported lazily: it needs NumPy
+
+    return PolicyAgent(**kwargs)
+
+
+AGENTS = {
+    "random": RandomAgent,
+    "ismcts": ISMCTSAgent,
+    "heuristic": HeuristicAgent,
+    "policy": policy_agent,
+}
+SEEDED = ("random", "ismcts", "policy")  # Agents that take seed= for their own random choices
+
+
+def make_agent(name, kwargs, seed):
+    """AGENTS[name](**kwargs), seeded with `seed` unless kwargs name one, so a job plays the same every time."""
+    if name in SEEDED:
+        kwargs = {"seed": seed, **kwargs}
+    return AGENTS[name](**kwargs)
+
+
+class SetupResponder:
+    """
+    Answers the engine's setup input() prompts without a model.
+
+    Nobody sends a distress signal or transfers a task, every player volunteers during a
+    commander's distribution, and whenever a player number is asked for the first valid
+    one is given (moving on to the next number if the engine rejects it).
+    """
+
+    def __init__(self):
+        self.candidate = 0
+
+    def __call__(self, prompt):
+        text = prompt.lower()
+        choices = re.search(r"choose from: ([\d, ]+)", text)
+        if choices:
+            return choices.group(1).split(",")[0].strip()
+        player_range = re.search(r"\(1-(\d+)\)", text)
+        if player_range:
+            excluded = re.search(r"which is (\d+)", text)
+            if not text.startswith("invalid"):
+                self.candidate = 0
+            numbers = [n for n in range(1, int(player_range.group(1)) + 1)
+                       if not excluded or n != int(excluded.group(1))]
+            answer = numbers[self.candidate % len(numbers)]
+            self.candidate += 1
+            return str(answer)
+        if "do you want task" in text:
+            return "yes"
+        return "no"
+
+
+def _recorder(writer, game, agent, seed, num_mission):
+    if writer is None:
+        return None
+    return writer.start_game(game, getattr(agent, "name", type(agent).__name__), seed, num_mission)
+
+
+def _play(game, recorder, move, pid):
+    if recorder is None:
+        game.play(move, player_id=pid)
+    else:
+        recorder.play(game, move, pid)
+
+
+def play_game(agent, num_players, num_mission, seed, deal=None, writer=None):
+    """
+    Play one attempt of a mission with `agent` in every seat (JARVIS included).
+
+    The attempt ends at the first failure, so `success` is a per-attempt success.
+    With a deal_pool.Deal the cards come from the pool and `seed` is only reported.
+    With a trajectory.TrajectoryWriter every decision is recorded.
+    """
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal,
+                       input_fn=SetupResponder(), print_fn=quiet)
+    recorder = _recorder(writer, game, agent, seed, num_mission)
+    success = False
+    while not game.failed and game.attempts == 1:
+        if set(game.completed_tasks) == set(game.task_ordering):
+            success = True
+            break
+        pid = game.whose_turn()
+        if not legal_moves(game, pid):
+            break
+        _play(game, recorder, agent.choose_move(game, pid), pid)
+    if recorder is not None:
+        recorder.finish(game)
+    return {
+        "mission": num_mission,
+        "players": num_players,
+        "seed": seed,
+        "success": success,
+        "tricks": game.turn - 1,
+    }
+
+
+def play_sim_game(agent, num_players, num_mission, seed, deal=None, writer=None):
+    """play_game on a SimGame: same deal and setup for the seed (or pool deal), same result dict."""
+    if deal is None:
+        game = SimGame.from_seed(num_players, num_mission, seed)
+    else:
+        game = SimGame.from_deal(num_mission, deal)
+    recorder = _recorder(writer, game, agent, seed, num_mission)
+    while not game.is_over():
+        pid = game.whose_turn()
+        _play(game, recorder, agent.choose_move(game, pid), pid)
+    if recorder is not None:
+        recorder.finish(game)
+    return {
+        "mission": num_mission,
+        "players": num_players,
+        "seed": seed,
+        "success": game.success(),
+        "tricks": game.turn - 1,
+    }
+
+
+ENGINES = {
+    "crew": play_game,
+    "sim": play_sim_game,
+}
+
+
+def _outcome(game):
+    """None while play_game (TheCrewGame) or play_sim_game (SimGame) would go on, else the success flag."""
+    if isinstance(game, SimGame):
+        return game.success() if game.is_over() else None
+    if game.failed or game.attempts != 1:
+        return False
+    if set(game.completed_tasks) == set(game.task_ordering):
+        return True
+    return None if legal_moves(game, game.whose_turn()) else False
+
+
+def play_batched(agent, num_players, num_mission, seeds, engine="sim", pool=None, writer=None):
+    """
+    The engine's play function over `seeds` for an agent with choose_moves: same results, in seed order.
+
+    Up to agent.max_batch games are played side by side; each round every unfinished game
+    gets its move from a single choose_moves call and finished games make room for the next
+    seeds.
+    """
+    seeds = iter(seeds)
+    in_flight = getattr(agent, "max_batch", 1024)
+    games = []  # (seed, game, recorder)
+    results = []
+
+    def start():
+        seed = next(seeds, None)
+        if seed is not None:
+            deal = pool.deal(seed % len(pool)) if pool else None
+            if engine == "sim":
+                game = SimGame.from_seed(num_players, num_mission, seed) if deal is None else SimGame.from_deal(num_mission, deal)
+            else:
+                game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal,
+                                   input_fn=SetupResponder(), print_fn=quiet)
+            games.append((seed, game, _recorder(writer, game, agent, seed, num_mission)))
+
+    for _ in range(in_flight):
+        start()
+    while games:
+        waiting = []
+        for seed, game, recorder in games:
+            success = _outcome(game)
+            if success is None:
+                waiting.append((seed, game, recorder))
+                continue
+            if recorder is not None:
+                recorder.finish(game)
+            results.append({"mission": num_mission, "players": num_players, "seed": seed, "success": success,
+                            "tricks": game.turn - 1})
+        games[:] = waiting
+        if waiting:
+            player_ids = [game.whose_turn() for _, game, _ in waiting]
+            moves = agent.choose_moves([game for _, game, _ in waiting], player_ids)
+            for (_, game, recorder), pid, move in zip(waiting, player_ids, moves):
+                _play(game, recorder, move, pid)
+        for _ in range(in_flight - len(games)):
+            start()
+    return sorted(results, key=lambda result: result["seed"])
+
+
+def _play_batch(args):
+    agent_name, agent_kwargs, num_players, num_mission, seeds, engine, pool_path, record, shard_rows = args
+    agent = make_agent(agent_name, agent_kwargs, seeds.start)
+    play = ENGINES[engine]
+    pool = open_pool(pool_path) if pool_path else None
+    writer = None
+    if record:
+        from trajectory import TrajectoryWriter  # Only when recording: keeps `crew simulate` starting fast
+        prefix = f"{agent_name}-m{num_mission}-p{num_players}-s{seeds.start}-{engine}-"
+        writer = TrajectoryWriter(record, shard_rows, prefix=prefix)
+    try:
+        if hasattr(agent, "choose_moves"):
+            return play_batched(agent, num_players, num_mission, seeds, engine, pool, writer)
+        return [play(agent, num_players, num_mission, seed, pool.deal(seed % len(pool)) if pool else None, writer)
+                for seed in seeds]
+    finally:
+        if writer is not None:
+            writer.close()
+        if hasattr(agent, "close"):
+            agent.close()
+
+
+# concurrent.futures classes by name, imported when a pool is made (multiprocessing is slow to import)
+EXECUTORS = {
+    "process": "ProcessPoolExecutor",
+    "thread": "ThreadPoolExecutor",
+}
+
+
+def run(agent_name, missions, num_players, games, agent_kwargs=None, workers=1, first_seed=0, engine="crew", pool_path=None,
+        executor="process", record=None, shard_rows=65536, profile=None):
+    """
+    Play `games` seeds per mission, spreading the seeds over a process or thread pool; returns result dicts.
+
+    pool_path names a deal_pool.py file whose deal `seed % len(pool)` replaces the seeded deal.
+    record names a directory that receives every decision as trajectory.py shards.
+    profile is a profiling.Session: the jobs are then played serially, each profiled under its (mission, players).
+    """
+    chunks = max(1, workers)
+    jobs = [(agent_name, agent_kwargs or {}, num_players, mission, range(first_seed + i, first_seed + games, chunks), engine, pool_path,
+             record, shard_rows)
+            for mission in missions for i in range(chunks)]
+    if profile is not None:
+        batches = [profile.run((job[3], job[2]), _play_batch, job) for job in jobs]
+    elif workers > 1:
+        import concurrent.futures
+        with getattr(concurrent.futures, EXECUTORS[executor])(workers) as pool:
+            batches = list(pool.map(_play_batch, jobs))
+    else:
+        batches = [_play_batch(job) for job in jobs]
+    results = [result for batch in batches for result in batch]
+    return sorted(results, key=lambda result: (result["mission"], result["seed"]))
+
+
+def gil_enabled():
+    is_enabled = getattr(sys, "_is_gil_enabled", None)  # Python 3.13+
+    return True if is_enabled is None else is_enabled()
+
+
+def bench_executors(agent_name, missions, num_players, games, workers, agent_kwargs=None, engine="crew", pool_path=None):
+    """
+    Play the same games serially, then on `workers` threads and on `workers` processes.
+
+    Returns one row per run: executor, workers, seconds, games per minute, speedup over
+    serial, and whether the results match the serial run (they do for seeded agents).
+    """
+    rows = []
+    serial = None
+    for executor, count in (("serial", 1), ("thread", workers), ("process", workers)):
+        start = time.perf_counter()
+        results = run(agent_name, missions, num_players, games, agent_kwargs, count, engine=engine, pool_path=pool_path,
+                      executor="thread" if executor == "serial" else executor)
+        seconds = time.perf_counter() - start
+        serial = serial or (results, seconds)
+        rows.append({
+            "executor": executor,
+            "workers": count,
+            "seconds": seconds,
+            "games_per_minute": len(results) / seconds * 60,
+            "speedup": serial[1] / seconds,
+            "same_results": results == serial[0],
+        })
+    return rows
+
+
+def run_llm(missions, num_players, games, first_seed=0):
+    """First-attempt LLM success per mission via rollout.run_rollout (needs OPENAI_API_KEY)."""
+    import rollout  # Imported lazily: it builds an OpenAI client at import time
+
+    results = []
+    for mission in missions:
+        for seed in range(first_seed, first_seed + games):
+            outcome = rollout.run_rollout(num_players=num_players, num_mission=mission, seed=seed)
+            results.append({
+                "mission": mission,
+                "players": num_players,
+                "seed": seed,
+                "success": outcome["success"] and outcome["attempts"] == 1,
+            })
+    return results
+
+
+def success_rates(results):
+    """{mission: (successes, games)}"""
+    table = {}
+    for result in results:
+        wins, total = table.get(result["mission"], (0, 0))
+        table[result["mission"]] = (wins + result["success"], total + 1)
+    return table
+
+
+def report(agent_name, results, llm_results=None):
+    agent_table = success_rates(results)
+    llm_table = success_rates(llm_results or [])
+    header = f"{'Mission':>7}  {agent_name + ' success':>18}"
+    if llm_results:
+        header += f"  {'llm success':>18}"
+    lines = [header]
+    for mission in sorted(agent_table):
+        wins, total = agent_table[mission]
+        line = f"{mission:>7}  {f'{wins}/{total} ({wins / total:.0%})':>18}"
+        if llm_results:
+            if mission in llm_table:
+                llm_wins, llm_total = llm_table[mission]
+                line += f"  {f'{llm_wins}/{llm_total} ({llm_wins / llm_total:.0%})':>18}"
+            else:
+                line += f"  {'-':>18}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="ismcts")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="crew", help="crew: TheCrewGame, sim: fast SimGame")
+    parser.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--games", type=int, default=20, help="Seeds played per mission")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--pool", default=None, help="Deal pool file (deal_pool.py); seeds index into it")
+    parser.add_argument("--workers", type=int, default=1, help="Processes (or threads) used to play missions in parallel")
+    parser.add_argument("--executor", choices=sorted(EXECUTORS), default="process", help="What the workers are")
+    parser.add_argument("--bench-executors", action="store_true", help="Compare serial, thread and process runs")
+    parser.add_argument("--iterations", type=int, default=500, help="ISMCTS playouts per move")
+    parser.add_argument("--time-limit", type=float, default=None, help="ISMCTS seconds per move")
+    parser.add_argument("--playout", choices=["random", "heuristic"], default="random", help="ISMCTS playout policy")
+    parser.add_argument("--search-workers", type=int, default=1, help="ISMCTS playout processes per move")
+    parser.add_argument("--weights", default=None, help="Policy network weights (.npz, see policy.py)")
+    parser.add_argument("--temperature", type=float, default=0.0, help="Policy sampling temperature; 0 plays the best move")
+    parser.add_argument("--record", default=None, metavar="DIR", help="Write every decision to a trajectory dataset")
+    parser.add_argument("--shard-rows", type=int, default=65536, help="Decisions per trajectory shard")
+    parser.add_argument("--llm-games", type=int, default=0, help="Also run this many LLM rollouts per mission")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    agent_kwargs = {}
+    if args.agent == "ismcts":
+        agent_kwargs = {"iterations": args.iterations, "time_limit": args.time_limit, "workers": args.search_workers,
+                        "playout": args.playout}
+    elif args.agent == "policy":
+        if args.weights is None:
+            parser.error("--agent policy needs --weights")
+        agent_kwargs = {"weights": args.weights, "temperature": args.temperature, "seed": args.first_seed}
+    if args.bench_executors:
+        print(f"GIL {'enabled' if gil_enabled() else 'disabled'}, {os.cpu_count()} CPUs")
+        print(f"{'Executor':<8} {'Workers':>7} {'Seconds':>8} {'Games/min':>10} {'Speedup':>8}  Same results")
+        for row in bench_executors(args.agent, args.missions, args.players, args.games, args.workers, agent_kwargs,
+                                   args.engine, args.pool):
+            print(f"{row['executor']:<8} {row['workers']:>7} {row['seconds']:>8.2f} {row['games_per_minute']:>10,.0f} "
+                  f"{row['speedup']:>7.2f}x  {'yes' if row['same_results'] else 'no'}")
+        return
+    profile = profiling.session(args)
+    start = time.perf_counter()
+    results = run(args.agent, args.missions, args.players, args.games, agent_kwargs, args.workers, args.first_seed, args.engine, args.pool,
+                  args.executor, args.record, args.shard_rows, profile)
+    elapsed = time.perf_counter() - start
+    llm_results = run_llm(args.missions, args.players, args.llm_games, args.first_seed) if args.llm_games else None
+    print(report(args.agent, results, llm_results))
+    print(f"{len(results)} games in {elapsed:.1f}s ({len(results) / elapsed * 60:,.0f} games/minute)")
+    if profile is not None:
+        print(f"\n{profile.write(args.profile_dir)}")
+        print(f"Collapsed stacks and summary.txt in {args.profile_dir}")
+
+
+if __name__ == "__main__":
+    main()
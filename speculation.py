@@ -0,0 +1,101 @@
+"""
+Speculative prompting for the later seats of a trick.
+
+Seats act in turn_order, so without speculation a trick costs one model round trip per
+seat. Before the player to act is asked, a Speculator guesses that player's move with a
+cheap predictor (a forced move, the endgame solver, the response cache or the heuristic),
+plays it on a copy of the game, builds the prompt the next seat would then get and sends
+it in the background; with depth > 1 it keeps guessing down the trick. When a seat's real
+prompt comes up it is looked up by its exact messages and options, so a speculative answer
+is only ever used for the very request that would have been sent. Guesses that did not
+hold are counted as wasted along with the tokens their calls used.
+"""
+import copy
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from game_config import GameplayError
+from the_crew_game import quiet
+
+
+class Speculator:
+    """
+    Background model calls for predicted positions, keyed by the exact request.
+
+    call(messages, options) makes a model call and returns the SDK response.
+    """
+
+    def __init__(self, call, depth=1, workers=None):
+        self.call = call
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=workers or depth)
+        self.inflight = {}  # request key -> future
+        self.stats = {"launched": 0, "hits": 0, "wasted": 0, "wasted_tokens": 0}
+        self._lock = threading.Lock()  # Token counts arrive on worker threads
+
+    @staticmethod
+    def key(messages, options):
+        return json.dumps([messages, options], sort_keys=True)
+
+    def take(self, messages, options):
+        """The speculative call for exactly this request, or None."""
+        future = self.inflight.pop(self.key(messages, options), None)
+        if future is not None:
+            self.stats["hits"] += 1
+        return future
+
+    def launch(self, game, player_id, predict, request):
+        """
+        Guess the moves from `player_id` on and send the prompts the following seats of this
+        trick would get; speculations from earlier guesses that are not repeated are wasted.
+
+        predict(game, pid) returns a move or None (stop guessing); request(game, pid) returns
+        (messages, options), or None when that seat would not ask the model.
+        """
+        keep = {}
+        for _ in range(self.depth):
+            move = predict(game, player_id)
+            if move is None:
+                break
+            game = copy.deepcopy(game)
+            game.print = quiet  # Guessed moves stay off the real game's log
+            try:
+                game.play(move, player_id=player_id)
+            except GameplayError:
+                break
+            if not game.trick or game.failed:
+                break  # The trick is over; the next lead depends on how it was scored
+            player_id = game.whose_turn()
+            built = request(game, player_id)
+            if built is None:
+                continue
+            key = self.key(*built)
+            if key not in keep:
+                keep[key] = self.inflight.pop(key, None) or self._submit(*built)
+        self._waste(self.inflight.values())
+        self.inflight = keep
+
+    def _submit(self, messages, options):
+        self.stats["launched"] += 1
+        return self.executor.submit(self.call, messages, options)
+
+    def _waste(self, futures):
+        for future in futures:
+            self.stats["wasted"] += 1
+            future.add_done_callback(self._count_tokens)
+
+    def _count_tokens(self, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        usage = getattr(future.result(), "usage", None)
+        if usage is not None:
+            with self._lock:
+                self.stats["wasted_tokens"] += usage.prompt_tokens + usage.completion_tokens
+
+    def close(self):
+        """Drop whatever is still speculative and wait for in-flight calls, so their tokens are counted."""
+        self._waste(self.inflight.values())
+        self.inflight = {}
+        self.executor.shutdown(wait=True)
+        return self.stats
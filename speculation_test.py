@@ -0,0 +1,74 @@
+import contextlib
+import io
+from types import SimpleNamespace
+
+from bots_test import make_game
+from crew_sim import legal_moves
+from heuristic import HeuristicAgent
+from speculation import Speculator
+
+agent = HeuristicAgent(use_radio=False)
+
+
+def request(game, pid):
+    return [{"role": "user", "content": game.state(pid)}], {"max_tokens": 10}
+
+
+def call(messages, options):
+    return SimpleNamespace(content=messages[0]["content"], usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3))
+
+
+def play(game, move, pid):
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.play(move, player_id=pid)
+
+
+def test_held_predictions_are_used_and_others_wasted():
+    game = make_game(4, 1, seed=6)
+    speculator = Speculator(call, depth=3)
+    pid = game.whose_turn()
+    speculator.launch(game, pid, agent.choose_move, request)
+    assert speculator.stats["launched"] == 3  # The rest of the trick
+
+    # The prediction holds: the next seat's exact request is already answered
+    play(game, agent.choose_move(game, pid), pid)
+    pid = game.whose_turn()
+    speculative = speculator.take(*request(game, pid))
+    assert speculative is not None and speculative.result().content == game.state(pid)
+    speculator.launch(game, pid, agent.choose_move, request)
+    assert speculator.stats["launched"] == 3  # Later seats were already in flight
+
+    # It does not: nothing matches and the stale guess is wasted at the next launch
+    move = next(move for move in legal_moves(game, pid) if move != agent.choose_move(game, pid))
+    play(game, move, pid)
+    pid = game.whose_turn()
+    assert speculator.take(*request(game, pid)) is None
+    speculator.launch(game, pid, agent.choose_move, request)
+    stats = speculator.close()
+    assert stats["hits"] == 1
+    assert stats["wasted"] == 2 + 1  # The two stale guesses, then the last seat's unused one
+    assert stats["wasted_tokens"] == 10 * stats["wasted"]
+
+
+def test_no_speculation_past_the_trick():
+    game = make_game(3, 1, seed=6)
+    pid = game.whose_turn()
+    speculator = Speculator(call, depth=5)
+    speculator.launch(game, pid, agent.choose_move, request)
+    assert speculator.stats["launched"] == 2
+    assert speculator.close()["wasted"] == 2
+
+
+def test_guessed_moves_print_nothing(capsys):
+    game = make_game(3, 1, seed=6)
+    messages = []
+
+    def log(message=""):  # Functions survive deepcopy, so copies would log here too
+        messages.append(message)
+
+    game.print = log
+    speculator = Speculator(call, depth=5)  # Guesses through the end of the trick, which the engine announces
+    speculator.launch(game, game.whose_turn(), agent.choose_move, request)
+    speculator.close()
+    assert messages == [] and capsys.readouterr().out == ""
+    assert game.print is log
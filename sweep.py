@@ -0,0 +1,345 @@
+"""
+Sharded simulation sweeps through a shared directory, for runs too big for one machine.
+
+    python sweep.py plan sweeps/heuristic --agent heuristic --engine sim --players 3 4 5 --games 10000000
+    python sweep.py work sweeps/heuristic --processes 16    # on every machine that mounts sweeps/
+    python sweep.py status sweeps/heuristic
+    python sweep.py merge sweeps/heuristic
+
+`plan` writes plan.json: every (mission, player count) plays `games` seeds, split into
+shards of --shard-games consecutive seeds. Workers claim shards through lock files
+(shards/<n>.lock, created with O_EXCL, so exactly one worker gets each; this is atomic on
+local file systems and NFS), play them with simulate._play_batch and write the shard's
+partial aggregate to shards/<n>.json through a temporary file and os.replace. No queue
+service is needed: any number of `work` commands on any number of machines share the
+directory, and a worker that starts late simply finds fewer shards left.
+
+Aggregates hold integers only (games, successes, sums and histograms of tricks), so
+`merge` adds them up exactly and in any order. A shard is a pure function of the plan and
+its seeds: it is played in batches of the plan's --batch seeds, and agents that draw
+random numbers are seeded with their batch's first seed (simulate.make_agent). That makes
+reruns idempotent: a worker refreshes its lock's mtime while it plays, and a lock older
+than --stale seconds (its worker crashed or was cut off) is taken over by the next worker
+that looks; at worst a shard is played twice and written twice with the same contents. Machines' clocks must agree to well within --stale.
+"""
+import argparse
+import json
+import os
+import socket
+import time
+
+from simulate import AGENTS, ENGINES, _play_batch
+import mock_missions
+
+
+PLAN = "plan.json"
+SHARDS = "shards"
+
+
+class Aggregate:
+    """Mergeable totals for one (agent, mission, players) cell."""
+
+    FIELDS = ("games", "successes", "tricks", "tricks_squared")
+
+    def __init__(self):
+        self.games = 0
+        self.successes = 0
+        self.tricks = 0  # Tricks played, summed over games
+        self.tricks_squared = 0
+        self.won_tricks = []  # won_tricks[t]: successful games that took t tricks
+        self.lost_tricks = []  # ... and games that failed after t tricks
+
+    def add(self, result):
+        tricks = result["tricks"]
+        self.games += 1
+        self.successes += bool(result["success"])
+        self.tricks += tricks
+        self.tricks_squared += tricks * tricks
+        histogram = self.won_tricks if result["success"] else self.lost_tricks
+        if len(histogram) <= tricks:
+            histogram.extend([0] * (tricks + 1 - len(histogram)))
+        histogram[tricks] += 1
+
+    def merge(self, other):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        for mine, theirs in ((self.won_tricks, other.won_tricks), (self.lost_tricks, other.lost_tricks)):
+            mine.extend([0] * (len(theirs) - len(mine)))
+            for tricks, count in enumerate(theirs):
+                mine[tricks] += count
+        return self
+
+    def to_json(self):
+        return {**{field: getattr(self, field) for field in self.FIELDS},
+                "won_tricks": self.won_tricks, "lost_tricks": self.lost_tricks}
+
+    @classmethod
+    def from_json(cls, data):
+        aggregate = cls()
+        for field in cls.FIELDS:
+            setattr(aggregate, field, data[field])
+        aggregate.won_tricks = list(data["won_tricks"])
+        aggregate.lost_tricks = list(data["lost_tricks"])
+        return aggregate
+
+    def __eq__(self, other):
+        return self.to_json() == other.to_json()
+
+
+def plan(directory, agent, missions, player_counts, games, shard_games=100_000, first_seed=0, engine="sim",
+         agent_kwargs=None, pool_path=None, batch=1000):
+    """Write the sweep's plan (or check that the existing one is the same); returns it."""
+    if pool_path and len(player_counts) != 1:
+        raise ValueError("A deal pool is dealt for one player count")
+    sweep = {
+        "agent": agent, "agent_kwargs": agent_kwargs or {}, "engine": engine, "pool": pool_path,
+        "missions": list(missions), "players": list(player_counts),
+        "games": games, "shard_games": shard_games, "first_seed": first_seed, "batch": batch,
+    }
+    path = os.path.join(directory, PLAN)
+    if os.path.exists(path):
+        existing = load_plan(directory)
+        if existing != sweep:
+            raise ValueError(f"{path} already plans a different sweep")
+        return existing
+    os.makedirs(os.path.join(directory, SHARDS), exist_ok=True)
+    _write_json(path, sweep)
+    return sweep
+
+
+def load_plan(directory):
+    with open(os.path.join(directory, PLAN)) as f:
+        return json.load(f)
+
+
+def shard_count(sweep):
+    return len(sweep["missions"]) * len(sweep["players"]) * -(-sweep["games"] // sweep["shard_games"])
+
+
+def shard_spec(sweep, shard):
+    """(mission, players, seeds) of a shard."""
+    per_cell = -(-sweep["games"] // sweep["shard_games"])
+    cell, part = divmod(shard, per_cell)
+    mission = sweep["missions"][cell // len(sweep["players"])]
+    players = sweep["players"][cell % len(sweep["players"])]
+    start = sweep["first_seed"] + part * sweep["shard_games"]
+    return mission, players, range(start, min(start + sweep["shard_games"], sweep["first_seed"] + sweep["games"]))
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _paths(directory, shard):
+    base = os.path.join(directory, SHARDS, f"{shard:06d}")
+    return f"{base}.json", f"{base}.lock"
+
+
+def claim(directory, shard, worker, stale):
+    """True if this worker now holds the shard's lock; takes over locks idle for `stale` seconds."""
+    result, lock = _paths(directory, shard)
+    if os.path.exists(result):
+        return False
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            idle = time.time() - os.stat(lock).st_mtime
+        except FileNotFoundError:
+            return False  # Released just now; the shard is probably finished
+        if idle < stale:
+            return False
+        # Several workers may find the same stale lock: only one of them can rename it away
+        abandoned = f"{lock}.{worker.replace(os.sep, '_')}.stale"
+        try:
+            os.rename(lock, abandoned)
+        except FileNotFoundError:
+            return False
+        os.remove(abandoned)
+        return claim(directory, shard, worker, stale)
+    with os.fdopen(fd, "w") as f:
+        f.write(worker)
+    if os.path.exists(result):  # Finished between the first check and the lock
+        release(directory, shard, worker)
+        return False
+    return True
+
+
+def release(directory, shard, worker):
+    _, lock = _paths(directory, shard)
+    try:
+        with open(lock) as f:
+            if f.read() != worker:
+                return  # Taken over meanwhile; the new holder will write the same result
+        os.remove(lock)
+    except FileNotFoundError:
+        pass
+
+
+def play_shard(sweep, shard, heartbeat=None):
+    """The shard's Aggregate; heartbeat() is called between batches of seeds."""
+    mission, players, seeds = shard_spec(sweep, shard)
+    aggregate = Aggregate()
+    batch = sweep["batch"]  # Part of the plan: batches are where seeded agents start their streams
+    for start in range(seeds.start, seeds.stop, batch):
+        job = (sweep["agent"], sweep["agent_kwargs"], players, mission, range(start, min(start + batch, seeds.stop)),
+               sweep["engine"], sweep["pool"], None, 0)
+        for result in _play_batch(job):
+            aggregate.add(result)
+        if heartbeat:
+            heartbeat()
+    return aggregate
+
+
+def work(directory, worker=None, stale=600.0, heartbeat=30.0, limit=None):
+    """Claim and play shards until none is left (or `limit` were played); returns the shards played."""
+    sweep = load_plan(directory)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    played = []
+    for shard in range(shard_count(sweep)):
+        if limit is not None and len(played) >= limit:
+            break
+        if not claim(directory, shard, worker, stale):
+            continue
+        result, lock = _paths(directory, shard)
+        last_beat = time.time()
+
+        def beat():
+            nonlocal last_beat
+            if time.time() - last_beat >= heartbeat:
+                last_beat = time.time()
+                try:
+                    os.utime(lock)
+                except FileNotFoundError:
+                    pass
+
+        start = time.perf_counter()
+        try:
+            aggregate = play_shard(sweep, shard, beat)
+            mission, players, seeds = shard_spec(sweep, shard)
+            _write_json(result, {"shard": shard, "mission": mission, "players": players, "seeds": [seeds.start, seeds.stop],
+                                 "worker": worker, "seconds": time.perf_counter() - start, "aggregate": aggregate.to_json()})
+        finally:
+            release(directory, shard, worker)
+        played.append(shard)
+    return played
+
+
+def work_processes(directory, processes, **kwargs):
+    """work() in `processes` local processes; returns every shard they played."""
+    if processes <= 1:
+        return work(directory, **kwargs)
+    from concurrent.futures import ProcessPoolExecutor
+
+    base = f"{socket.gethostname()}:{os.getpid()}"
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(work, directory, f"{base}/{index}", **kwargs) for index in range(processes)]
+        return sorted(shard for future in futures for shard in future.result())
+
+
+def status(directory, stale=600.0):
+    """{"done": n, "running": n, "stale": n, "pending": n} over the plan's shards."""
+    sweep = load_plan(directory)
+    counts = {"done": 0, "running": 0, "stale": 0, "pending": 0}
+    now = time.time()
+    for shard in range(shard_count(sweep)):
+        result, lock = _paths(directory, shard)
+        if os.path.exists(result):
+            counts["done"] += 1
+            continue
+        try:
+            counts["stale" if now - os.stat(lock).st_mtime >= stale else "running"] += 1
+        except FileNotFoundError:
+            counts["pending"] += 1
+    return counts
+
+
+def merge(directory):
+    """({(mission, players): Aggregate}, missing shard numbers) over the finished shards."""
+    sweep = load_plan(directory)
+    cells = {(mission, players): Aggregate() for mission in sweep["missions"] for players in sweep["players"]}
+    missing = []
+    for shard in range(shard_count(sweep)):
+        result, _ = _paths(directory, shard)
+        try:
+            with open(result) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            missing.append(shard)
+            continue
+        cells[(data["mission"], data["players"])].merge(Aggregate.from_json(data["aggregate"]))
+    return cells, missing
+
+
+def report(sweep, cells):
+    from tournament import wilson  # Only for the report: keeps workers starting fast
+
+    lines = [f"{'Mission':>7} {'Players':>7} {'Games':>12}  {'Success (95% CI)':<22} {'Tricks':>6} {'SD':>5}"]
+    for (mission, players), aggregate in sorted(cells.items()):
+        if not aggregate.games:
+            continue
+        low, high = wilson(aggregate.successes, aggregate.games)
+        mean = aggregate.tricks / aggregate.games
+        sd = max(0.0, aggregate.tricks_squared / aggregate.games - mean * mean) ** 0.5
+        lines.append(f"{mission:>7} {players:>7} {aggregate.games:>12,}  "
+                     f"{f'{aggregate.successes / aggregate.games:.1%} ({low:.1%}-{high:.1%})':<22} {mean:>6.2f} {sd:>5.2f}")
+    return f"{sweep['agent']} on {sweep['engine']}\n" + "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("plan", help="Describe the sweep (once, before any worker starts)")
+    make.add_argument("directory")
+    make.add_argument("--agent", choices=sorted(AGENTS), default="heuristic")
+    make.add_argument("--agent-kwargs", type=json.loads, default={}, help='JSON, e.g. \'{"iterations": 200}\'')
+    make.add_argument("--engine", choices=sorted(ENGINES), default="sim")
+    make.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+    make.add_argument("--players", type=int, nargs="+", default=[3])
+    make.add_argument("--games", type=int, required=True, help="Seeds per (mission, player count)")
+    make.add_argument("--shard-games", type=int, default=100_000)
+    make.add_argument("--first-seed", type=int, default=0)
+    make.add_argument("--pool", default=None, help="Deal pool file (deal_pool.py), one player count only")
+    make.add_argument("--batch", type=int, default=1000, help="Seeds per agent and between heartbeats")
+    run = commands.add_parser("work", help="Play shards until none is left")
+    run.add_argument("directory")
+    run.add_argument("--processes", type=int, default=1)
+    run.add_argument("--stale", type=float, default=600.0, help="Seconds after which a silent worker's shard is taken over")
+    run.add_argument("--heartbeat", type=float, default=30.0, help="Seconds between lock refreshes")
+    run.add_argument("--limit", type=int, default=None, help="Shards per process before exiting")
+    show = commands.add_parser("status", help="Count finished, running, stale and pending shards")
+    show.add_argument("directory")
+    show.add_argument("--stale", type=float, default=600.0)
+    combine = commands.add_parser("merge", help="Add up the finished shards and write merged.json")
+    combine.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        sweep = plan(args.directory, args.agent, args.missions, args.players, args.games, args.shard_games, args.first_seed,
+                     args.engine, args.agent_kwargs, args.pool, args.batch)
+        print(f"{shard_count(sweep):,} shards of up to {sweep['shard_games']:,} games in {args.directory}")
+    elif args.command == "work":
+        start = time.perf_counter()
+        played = work_processes(args.directory, args.processes, stale=args.stale, heartbeat=args.heartbeat,
+                                limit=args.limit)
+        print(f"{len(played)} shards played in {time.perf_counter() - start:.1f}s")
+    elif args.command == "status":
+        counts = status(args.directory, args.stale)
+        print(", ".join(f"{count:,} {state}" for state, count in counts.items()))
+    else:
+        cells, missing = merge(args.directory)
+        sweep = load_plan(args.directory)
+        _write_json(os.path.join(args.directory, "merged.json"), {
+            "shards": shard_count(sweep) - len(missing), "missing": missing,
+            "cells": [{"mission": mission, "players": players, **aggregate.to_json()}
+                      for (mission, players), aggregate in sorted(cells.items())]})
+        print(report(sweep, cells))
+        if missing:
+            print(f"\n{len(missing)} of {shard_count(sweep)} shards not finished yet")
+
+
+if __name__ == "__main__":
+    main()
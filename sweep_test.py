@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+import pytest
+
+from simulate import run
+from sweep import Aggregate, _paths, claim, load_plan, merge, plan, shard_count, work
+
+
+def expected(missions, players, games):
+    cells = {}
+    for result in run("heuristic", missions, players, games, engine="sim"):
+        cells.setdefault((result["mission"], result["players"]), Aggregate()).add(result)
+    return cells
+
+
+@pytest.mark.parametrize("shard_games", [4, 7, 25])
+def test_merged_shards_equal_one_run(tmp_path, shard_games):
+    sweep = plan(tmp_path, "heuristic", [1, 2], [3], games=25, shard_games=shard_games)
+    assert sorted(work(tmp_path, "a")) == list(range(shard_count(sweep)))
+    cells, missing = merge(tmp_path)
+    assert missing == [] and cells == expected([1, 2], 3, 25)
+
+
+@pytest.mark.parametrize("agent", ["heuristic", "random"])
+def test_workers_share_the_queue_and_reruns_are_idempotent(tmp_path, agent):
+    plan(tmp_path, agent, [1], [3, 4], games=12, shard_games=4, batch=3)
+    first = work(tmp_path, "a", limit=2)
+    second = work(tmp_path, "b")
+    assert sorted(first + second) == list(range(6)) and not set(first) & set(second)
+
+    result, _ = _paths(tmp_path, first[0])
+    with open(result) as f:
+        before = json.load(f)
+    os.remove(result)  # As if the worker crashed after playing the shard
+    _, missing = merge(tmp_path)
+    assert missing == [first[0]]
+    assert work(tmp_path, "c") == [first[0]]
+    with open(result) as f:
+        assert json.load(f)["aggregate"] == before["aggregate"]
+    if agent == "heuristic":
+        assert merge(tmp_path)[0] == expected([1], 3, 12) | expected([1], 4, 12)
+
+
+def test_stale_locks_are_taken_over(tmp_path):
+    plan(tmp_path, "heuristic", [1], [3], games=8, shard_games=4)
+    assert claim(tmp_path, 0, "crashed", stale=60)
+    assert claim(tmp_path, 1, "alive", stale=60)
+    assert not claim(tmp_path, 0, "new", stale=60)
+    _, lock = _paths(tmp_path, 0)
+    os.utime(lock, (time.time() - 120, time.time() - 120))
+    assert work(tmp_path, "new", stale=60) == [0]
+    assert not os.path.exists(lock)
+    _, missing = merge(tmp_path)
+    assert missing == [1]
+
+
+def test_a_different_plan_is_refused(tmp_path):
+    sweep = plan(tmp_path, "heuristic", [1], [3], games=8, shard_games=4)
+    assert plan(tmp_path, "heuristic", [1], [3], games=8, shard_games=4) == sweep == load_plan(tmp_path)
+    with pytest.raises(ValueError):
+        plan(tmp_path, "heuristic", [1], [3], games=8, shard_games=2)
@@ -1,23 +1,79 @@
 import random
 import time
+from types import MappingProxyType
+from typing import NamedTuple
 
 from game_config import Game, GameplayError
 import mock_missions 
 
 
+# Shared, immutable tables: every game's hands and tasks hold these same card strings, and
+# missions are compiled once instead of being looked up and copied per game
+COLORS = ('P', 'Y', 'G', 'B')
+ROCKETS = ('R1', 'R2', 'R3', 'R4')
+DECK = tuple(f"{color}{num}" for color in COLORS for num in range(1, 10)) + ROCKETS
+CARD_INDEX = MappingProxyType({card: index for index, card in enumerate(DECK)})
+
+
+class Mission(NamedTuple):
+    tasks: tuple  # Task types, e.g. ("simple", "numbered", "arrow")
+    tokens: tuple  # Matching task tokens, e.g. ("simple task", "numbered token 1", "<")
+    condition: tuple
+
+
+MISSIONS = MappingProxyType({
+    number: Mission(tuple(mission["tasks"]), tuple(mission["tokens"]), tuple(mission.get("condition", ())))
+    for number, mission in mock_missions.missions.items()
+})
+
+
+def _input(prompt=""):
+    return input(prompt)
+
+
+def _print(*args, **kwargs):
+    print(*args, **kwargs)
+
+
+def quiet(*args, **kwargs):
+    """A print_fn that drops the engine's messages."""
+
+
 class TheCrewGame(Game):
-    COLORS = ['P', 'Y', 'G', 'B']
-    ROCKETS = ['R1', 'R2', 'R3', 'R4']
-    ARROW_TOKENS = ['<', '<<', '<<<', '<<<<']
+    COLORS = COLORS
+    ROCKETS = ROCKETS
+    ARROW_TOKENS = ('<', '<<', '<<<', '<<<<')
     OMEGA_TOKEN = 'Ω'  # New omega token
 
-    def __init__(self, num_players=4, num_mission=8, seed=None):
+    # No per-game __dict__: many paused games are kept in memory by the async runners
+    __slots__ = (
+        "deal", "seed", "input", "print", "attempts", "distress_token_usage", "task_types", "task_tokens",
+        "condition", "tasks", "task_token_map", "failed", "num_players", "hands", "jarvis_hands",
+        "played_cards", "trick", "previous_trick", "completed_tasks", "turn", "radio_used", "radio_clues",
+        "distress_signal_active", "card_pass_direction", "turn_order", "task_ordering", "assigned_tasks",
+        "deadzone", "disruption", "commanders_decision", "commanders_distribution", "commander",
+        "jarvis_dictionary", "jarvis_hidden_cards", "jarvis_revealed_cards", "jarvis_play",
+    )
+
+    def __init__(self, num_players=4, num_mission=8, seed=None, deal=None, input_fn=None, print_fn=None):
+        # deal: optional deal_pool.Deal supplying the task cards and hands instead of the random generator
+        self.deal = deal
+        # Nothing process-wide, so games can run side by side in threads: cards come from
+        # generators seeded from self.seed, setup questions go to input_fn and messages to print_fn
+        # (by default the builtins, looked up on every call so patching them still works)
+        self.seed = seed if seed is not None else time.time()
+        self.input = input_fn or _input
+        self.print = print_fn or _print
+        if hasattr(self.input, "bind"):
+            self.input.bind(self)  # Lets an input_fn read the game it answers for (see distress.AdvisedInput)
+        if deal is not None and deal.num_players != num_players:
+            raise Exception(f"Deal was generated for {deal.num_players} players, not {num_players}.")
       # Ask the user to select a mission number
-        if num_mission not in mock_missions.missions:
+        if num_mission not in MISSIONS:
             raise Exception("Invalid mission number selected.")
         
-        # Get the mission details from the mock_missions file
-        mission = mock_missions.missions[num_mission]
+        # Get the mission details from the compiled mock_missions table
+        mission = MISSIONS[num_mission]
         
 
         # Initialize attempt counter and distress token counter
@@ -25,9 +81,9 @@ class TheCrewGame(Game):
         self.distress_token_usage = 0  # Tracks how many times the distress token was used
 
         # Get the predefined task types (simple, numbered, arrow, omega)
-        self.task_types = mission["tasks"]  # e.g., ["simple", "numbered", "arrow"]
-        self.task_tokens = mission["tokens"]  # e.g., ["simple task", "numbered token", "<"]
-        self.condition = mission.get("condition", [])
+        self.task_types = mission.tasks  # e.g., ("simple", "numbered", "arrow")
+        self.task_tokens = mission.tokens  # e.g., ("simple task", "numbered token", "<")
+        self.condition = mission.condition
         self.tasks = []
         # Generate the actual task cards (e.g., "P7", "B3") based on task types
         self._generate_task_cards()
@@ -35,8 +91,6 @@ class TheCrewGame(Game):
         if not (2 <= num_players <= 5):
             raise Exception("Number of players must be between 2 and 5.")
         
-        random.seed(seed if seed is not None else time.time())
-
         self.failed = False
         self.num_players = num_players
         
@@ -75,13 +129,13 @@ class TheCrewGame(Game):
 
         # Handle the deadzone condition
         if "deadzone" in self.condition:
-            print("\nThe is a special mission in which you are not allowed the information about the radio card being highest, lowest, or only will be hidden. This is DEADZONE mission!")
+            self.print("\nThe is a special mission in which you are not allowed the information about the radio card being highest, lowest, or only will be hidden. This is DEADZONE mission!")
             self.deadzone = True
         else:
             self.deadzone = False
 
         if "disruption" in self.condition:
-            print("\nThe is a special mission in which all radio communication is DISRUPTED")
+            self.print("\nThe is a special mission in which all radio communication is DISRUPTED")
             self.disruption = True
         else:
             self.disruption = False
@@ -106,18 +160,18 @@ class TheCrewGame(Game):
     def _apply_special_conditions(self):
         """Reapply any special conditions like commander's decision, etc., for the new attempt."""
         if "commanders_decision" in self.condition:
-            self._commander_decision()  # Apply commander's decision condition
+            self._commanders_decision()  # Apply commander's decision condition
         
         if "commanders_distribution" in self.condition:
-            self._commander_distribution()  # Apply commander's distribution condition
+            self._commanders_distribution()  # Apply commander's distribution condition
 
     def _commanders_decision(self):
         """
         This method allows the commander to decide who will take on all the tasks in the mission.
         The commander will ask each player if they want to take on all tasks.
         """
-        print("\nThe is a special mission in which commander will decide one player who will get all the tasks.")
-        print("\nThe commander will now ask the players if they want to take on all tasks.")
+        self.print("\nThe is a special mission in which commander will decide one player who will get all the tasks.")
+        self.print("\nThe commander will now ask the players if they want to take on all tasks.")
 
         # Get the commander (the player with R4)
         commander = None
@@ -130,23 +184,23 @@ class TheCrewGame(Game):
         for player_id in self.turn_order:
             if player_id == commander:
                 continue  # Skip the commander since they are asking
-            response = input(f"state just for following question: {self.hands[player_id]} Question: Player {player_id + 1}, do you want to take on all tasks for this mission? (yes/no): ").strip().lower()
+            response = self.input(f"state just for following question: {self.hands[player_id]} Question: Player {player_id + 1}, do you want to take on all tasks for this mission? (yes/no): ").strip().lower()
             while response not in ["yes", "no"]:
-                response = input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
+                response = self.input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
             if response == 'yes':
                 self.assigned_tasks = {task: player_id for task in self.tasks}
-                print(f"Player {player_id + 1} will take on all tasks!")
+                self.print(f"Player {player_id + 1} will take on all tasks!")
                 return
                 
         # If no one takes on all tasks, the commander decides who will take on all tasks
-        print(f"\nCommander (Player {commander + 1}) decides who will take on all tasks.")
+        self.print(f"\nCommander (Player {commander + 1}) decides who will take on all tasks.")
 
         # If the commander decides to assign all tasks to another player, ask the commander to choose a player
-        target_player = int(input(f"Commander, which player do you want to assign all tasks to other than yourself which is {commander + 1}? (1-{self.num_players}): ").strip()) - 1
+        target_player = int(self.input(f"Commander, which player do you want to assign all tasks to other than yourself which is {commander + 1}? (1-{self.num_players}): ").strip()) - 1
         while target_player < 0 or target_player >= self.num_players or target_player == commander:
-            target_player = int(input(f"Invalid input. Choose a valid player (1-{self.num_players}): ").strip()) - 1
+            target_player = int(self.input(f"Invalid input. Choose a valid player (1-{self.num_players}): ").strip()) - 1
         self.assigned_tasks = {task: target_player for task in self.tasks}
-        print(f"Player {target_player + 1} will take on all tasks!")
+        self.print(f"Player {target_player + 1} will take on all tasks!")
     
 
     def _commanders_distribution(self):
@@ -155,8 +209,8 @@ class TheCrewGame(Game):
         The commander asks each player if they want a task, and then the commander assigns tasks.
         Tasks are distributed equally, with the possibility of one player getting one more task than others.
         """
-        print("\nThe is a special mission in which commander will distribute the tasks.")
-        print("\nThe commander will now distribute the tasks.")
+        self.print("\nThe is a special mission in which commander will distribute the tasks.")
+        self.print("\nThe commander will now distribute the tasks.")
 
         # Get the commander (the player with R4)
         commander = None
@@ -174,7 +228,7 @@ class TheCrewGame(Game):
 
         # Assign tasks one by one, ensuring equal distribution
         for task in self.tasks:
-            print(f"\nCommander (Player {commander + 1}), it's time to distribute task: {task}")
+            self.print(f"\nCommander (Player {commander + 1}), it's time to distribute task: {task}")
 
             # Ask each player if they want the task
             task_assigned = False
@@ -182,76 +236,82 @@ class TheCrewGame(Game):
 
             for player_id in self.turn_order:
                 if player_task_count[player_id] < tasks_per_player or (player_task_count[player_id] == tasks_per_player and extra_tasks > 0):
-                    response = input(f"Player {player_id + 1}, do you want task {task}? (yes/no): ").strip().lower()
+                    response = self.input(f"Player {player_id + 1}, do you want task {task}? (yes/no): ").strip().lower()
                     while response not in ["yes", "no"]:
-                        response = input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
+                        response = self.input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
                     responses[player_id] = response
                 else:
-                    print(f"Player {player_id + 1} cannot take more tasks.")
+                    self.print(f"Player {player_id + 1} cannot take more tasks.")
 
             # Now the commander decides who to give the task to
             eligible_players = [player_id for player_id in self.turn_order if responses.get(player_id) == "yes" and player_task_count[player_id] < tasks_per_player + (1 if extra_tasks > 0 else 0)]
             
             if eligible_players:
                 # Commander decides who to assign the task to
-                print(f"Eligible players for task {task}: {', '.join([str(player_id + 1) for player_id in eligible_players])}")
-                target_player = int(input(f"Commander, who do you want to give task {task} to? (Choose from: {', '.join([str(player_id + 1) for player_id in eligible_players])}): ").strip()) - 1
+                self.print(f"Eligible players for task {task}: {', '.join([str(player_id + 1) for player_id in eligible_players])}")
+                target_player = int(self.input(f"Commander, who do you want to give task {task} to? (Choose from: {', '.join([str(player_id + 1) for player_id in eligible_players])}): ").strip()) - 1
                 
                 # Check if the target player is eligible
                 while target_player not in eligible_players:
-                    target_player = int(input(f"Invalid input. Choose a valid player from: {', '.join([str(player_id + 1) for player_id in eligible_players])}: ").strip()) - 1
+                    target_player = int(self.input(f"Invalid input. Choose a valid player from: {', '.join([str(player_id + 1) for player_id in eligible_players])}: ").strip()) - 1
                 
                 self.assigned_tasks[task] = target_player
                 player_task_count[target_player] += 1
                 if player_task_count[target_player] > tasks_per_player:
                     extra_tasks -= 1
                 task_assigned = True
-                print(f"Task {task} assigned to Player {target_player + 1}.")
+                self.print(f"Task {task} assigned to Player {target_player + 1}.")
             else:
                 # If no player said yes, the commander can assign the task to themselves or another player
-                print(f"No player has volunteered for task {task}. Commander (Player {commander + 1}), do you want to take it?")
-                response = input(f"Commander, do you want to take on task {task}? (yes/no): ").strip().lower()
+                self.print(f"No player has volunteered for task {task}. Commander (Player {commander + 1}), do you want to take it?")
+                response = self.input(f"Commander, do you want to take on task {task}? (yes/no): ").strip().lower()
                 while response not in ["yes", "no"]:
-                    response = input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
+                    response = self.input("Invalid input. Please respond with 'yes' or 'no': ").strip().lower()
 
                 if response == "yes":
                     self.assigned_tasks[task] = commander
                     player_task_count[commander] += 1
-                    print(f"Commander (Player {commander + 1}) will take on task {task}!")
+                    self.print(f"Commander (Player {commander + 1}) will take on task {task}!")
                 else:
                     # If the commander decides not to take the task, assign it to another player
-                    target_player = int(input(f"Commander, which player do you want to assign task {task} to? (1-{self.num_players}): ").strip()) - 1
+                    target_player = int(self.input(f"Commander, which player do you want to assign task {task} to? (1-{self.num_players}): ").strip()) - 1
                     while target_player < 0 or target_player >= self.num_players or target_player == commander:
-                        target_player = int(input(f"Invalid input. Choose a valid player (1-{self.num_players}): ").strip()) - 1
+                        target_player = int(self.input(f"Invalid input. Choose a valid player (1-{self.num_players}): ").strip()) - 1
                     self.assigned_tasks[task] = target_player
                     player_task_count[target_player] += 1
-                    print(f"Task {task} assigned to Player {target_player + 1}.")
+                    self.print(f"Task {task} assigned to Player {target_player + 1}.")
 
-        print("\nTask distribution completed.")
+        self.print("\nTask distribution completed.")
 
 
     def _generate_task_cards(self):
         """This function generates the task cards based on the predefined task types (simple, numbered, etc.)."""
-        all_cards = [f"{color}{num}" for color in self.COLORS for num in range(1, 10)] + self.ROCKETS
+        if self.deal is not None:
+            self.tasks = self.deal.tasks(len(self.task_types))
+            self.task_token_map = {task: token for task, token in zip(self.tasks, self.task_tokens)}
+            return
+
+        rng = random.Random(self.seed)  # Tasks first, then _deal_cards reseeds, as SimGame.from_seed expects
+        all_cards = list(DECK)
         
         selected_cards = []  # List to store the generated task cards
 
         # For each task type, pick random cards from the deck
         for task_type in self.task_types:
             if task_type == "simple":
-                card = random.choice(all_cards)
+                card = rng.choice(all_cards)
                 selected_cards.append(card)
                 all_cards.remove(card)  # Remove the card from the deck once it’s picked
             elif task_type == "numbered":
-                card = random.choice(all_cards)
+                card = rng.choice(all_cards)
                 selected_cards.append(card)
                 all_cards.remove(card)
             elif task_type == "arrow":
-                card = random.choice(all_cards)
+                card = rng.choice(all_cards)
                 selected_cards.append(card)
                 all_cards.remove(card)
             elif task_type == "omega":
-                card = random.choice(all_cards)
+                card = rng.choice(all_cards)
                 selected_cards.append(card)
                 all_cards.remove(card)
         
@@ -263,26 +323,26 @@ class TheCrewGame(Game):
 
     def _prompt_task_transfer(self):
         """Prompt players to transfer their task card to another player."""
-        transfer_choice = input("Do any players want to transfer their task card to another player? (yes/no): ").strip().lower()
+        transfer_choice = self.input("Do any players want to transfer their task card to another player? (yes/no): ").strip().lower()
         
         if transfer_choice != "yes":
-            print("No task card transfer will be made.")
+            self.print("No task card transfer will be made.")
             return
 
         # Keep asking players until one decides to transfer their task
         for player_id in range(self.num_players):
-            print(f"\nPlayer {player_id + 1}'s assigned task: {self.task_ordering[player_id]}")
-            transfer_task = input(f"Player {player_id + 1}, do you want to transfer your task? (yes/no): ").strip().lower()
+            self.print(f"\nPlayer {player_id + 1}'s assigned task: {self.task_ordering[player_id]}")
+            transfer_task = self.input(f"Player {player_id + 1}, do you want to transfer your task? (yes/no): ").strip().lower()
             
             if transfer_task == "yes":
                 # Ask who they want to give the task to
-                target_player = int(input(f"Player {player_id + 1}, which player do you want to transfer your task to? (1-{self.num_players}): ").strip()) - 1
+                target_player = int(self.input(f"Player {player_id + 1}, which player do you want to transfer your task to? (1-{self.num_players}): ").strip()) - 1
                 while target_player == player_id or target_player < 0 or target_player >= self.num_players:
-                    target_player = int(input(f"Invalid input. Choose a valid target player (1-{self.num_players}): ").strip()) - 1
+                    target_player = int(self.input(f"Invalid input. Choose a valid target player (1-{self.num_players}): ").strip()) - 1
 
                 # Perform the transfer
                 task_to_transfer = self.task_ordering[player_id]
-                print(f"Player {player_id + 1} is transferring task {task_to_transfer} to Player {target_player + 1}.")
+                self.print(f"Player {player_id + 1} is transferring task {task_to_transfer} to Player {target_player + 1}.")
                 self.assigned_tasks[task_to_transfer] = target_player
                 
                 # After transferring, print the updated task assignments and stop asking
@@ -290,17 +350,21 @@ class TheCrewGame(Game):
                 return  # Stop asking other players once a transfer has been made
 
         # If no player transfers, print message and proceed
-        print("No task transfer was made.")
+        self.print("No task transfer was made.")
 
     def _print_updated_task_assignments(self):
         """Print the updated task assignments after a transfer."""
-        print("\nUpdated Task Assignments:")
+        self.print("\nUpdated Task Assignments:")
         for task, player in self.assigned_tasks.items():
-            print(f"{task} → Player {player + 1}")
+            self.print(f"{task} → Player {player + 1}")
 
     def _deal_cards(self):
-        deck = [f"{color}{num}" for color in self.COLORS for num in range(1, 10)] + self.ROCKETS
-        random.shuffle(deck)
+        if self.deal is not None:
+            return self.deal.hands(self.attempts)
+
+        # The first attempt shuffles with the game's seed; restarts get their own stream per attempt
+        deck = list(DECK)
+        random.Random(self.seed if self.attempts == 1 else f"{self.seed}:{self.attempts}").shuffle(deck)
         
         if self.num_players == 2:
             # Remove the 4 rocket cards for JARVIS (JARVIS will not get rocket cards)
@@ -330,7 +394,7 @@ class TheCrewGame(Game):
     def _jarvis_turn_setup(self):
         """Setup JARVIS's turn, task assignment, and reveal cards logic for 2-player game."""
         # Automatically add JARVIS as the third player and give them tasks
-        print("\nJARVIS is now added as the third player.")
+        self.print("\nJARVIS is now added as the third player.")
         
         # When the game starts, JARVIS can only use 7 revealed cards
         self.jarvis_revealed_cards = self.jarvis_hands['face_up']
@@ -345,28 +409,28 @@ class TheCrewGame(Game):
             if 'R4' in hand:
                 commander = player_id
                 break
-        print(f"\n🚀 Player {commander + 1} holds R4 and is the commander.")
+        self.print(f"\n🚀 Player {commander + 1} holds R4 and is the commander.")
         self.commander = commander
 
 
     def _print_initial_hands(self):
-        print("\n🃏 Initial Hands:")
+        self.print("\n🃏 Initial Hands:")
         for player, hand in self.hands.items():
-            print(f"Player {player + 1}: {sorted(hand)}")
+            self.print(f"Player {player + 1}: {sorted(hand)}")
 
         if self.num_players == 2 and self.jarvis_hands is not None:
-            print("\nJARVIS' Cards (7 face-up and 7 face-down):")
-            print(f"Face-up: {sorted(self.jarvis_hands['face_up'])}")
-            print(f"Face-down: {'[Hidden]' * len(self.jarvis_hands['face_down'])}")
+            self.print("\nJARVIS' Cards (7 face-up and 7 face-down):")
+            self.print(f"Face-up: {sorted(self.jarvis_hands['face_up'])}")
+            self.print(f"Face-down: {'[Hidden]' * len(self.jarvis_hands['face_down'])}")
 
 
 
 
     def _print_updated_hands(self):
-        print("\n🃏 Updated Hands:")
+        self.print("\n🃏 Updated Hands:")
         for player, hand in self.hands.items():
-            print(f"Player {player + 1}: {sorted(hand)}")
-        print()
+            self.print(f"Player {player + 1}: {sorted(hand)}")
+        self.print()
 
 
     def _get_turn_order_starting_with_r4_holder(self):
@@ -374,13 +438,13 @@ class TheCrewGame(Game):
             # In a 2-player game with JARVIS, the commander is the player with R4
             for player_id, hand in self.hands.items():
                 if 'R4' in hand:
-                    print(f"\n🚀 Player {player_id + 1} holds R4 and will start the game.\n")
+                    self.print(f"\n🚀 Player {player_id + 1} holds R4 and will start the game.\n")
                     return [player_id, 2, (player_id + 1) % 2]  # Human player, JARVIS, and the other human
         else:
             # Regular turn order for 3-5 players
             for player_id, hand in self.hands.items():
                 if 'R4' in hand:
-                    print(f"\n🚀 Player {player_id + 1} holds R4 and will start the game.\n")
+                    self.print(f"\n🚀 Player {player_id + 1} holds R4 and will start the game.\n")
                     return [(player_id + i) % self.num_players for i in range(self.num_players)]
 
         return list(range(self.num_players))
@@ -391,23 +455,23 @@ class TheCrewGame(Game):
         # Ask if players want to use the distress signal
         distress_signal_choice = "no"
         if self.num_players != 2:
-            distress_signal_choice = input("Do you want to send a distress signal? (yes/no): ").strip().lower()
+            distress_signal_choice = self.input("Do you want to send a distress signal? (yes/no): ").strip().lower()
         if distress_signal_choice != "yes":
-            print("No distress signal sent.")
+            self.print("No distress signal sent.")
             return
 
         self.distress_signal_active = True
-        print("Distress signal sent! Now choose the direction to pass the cards.")
+        self.print("Distress signal sent! Now choose the direction to pass the cards.")
         
         # Ask for direction: clockwise or anticlockwise
-        self.card_pass_direction = input("Do you want to pass cards clockwise or anticlockwise? (cw/ccw): ").strip().lower()
+        self.card_pass_direction = self.input("Do you want to pass cards clockwise or anticlockwise? (cw/ccw): ").strip().lower()
         if self.card_pass_direction not in ['cw', 'ccw']:
-            print("Invalid direction chosen. Defaulting to clockwise.")
+            self.print("Invalid direction chosen. Defaulting to clockwise.")
             self.card_pass_direction = 'cw'
         
         self.distress_signal_active = True
         self.distress_token_usage += 1  # Increment distress token usage
-        print(f"Distress signal sent! Attempts increased due to distress token usage.")
+        self.print(f"Distress signal sent! Attempts increased due to distress token usage.")
 
         self._pass_cards()
     
@@ -415,12 +479,12 @@ class TheCrewGame(Game):
     def _pass_cards(self):
         """Handles the logic for passing cards."""
         for i in range(self.num_players):
-            print(f"Player {i+1}, your hand: {sorted(self.hands[i])}")
-            pass_card = input(f"Player {i+1}, choose a card to pass (cannot be a rocket card): ").strip().upper()
+            self.print(f"Player {i+1}, your hand: {sorted(self.hands[i])}")
+            pass_card = self.input(f"Player {i+1}, choose a card to pass (cannot be a rocket card): ").strip().upper()
             
             while pass_card not in self.hands[i] or pass_card in self.ROCKETS:
-                print(f"Invalid card choice. Please select a valid card that is not a rocket.")
-                pass_card = input(f"Player {i+1}, choose a card to pass (cannot be a rocket card): ").strip().upper()
+                self.print(f"Invalid card choice. Please select a valid card that is not a rocket.")
+                pass_card = self.input(f"Player {i+1}, choose a card to pass (cannot be a rocket card): ").strip().upper()
 
             # Remove the card from the current player's hand
             self.hands[i].remove(pass_card)
@@ -433,9 +497,9 @@ class TheCrewGame(Game):
 
             # Add the card to the next player's hand
             self.hands[next_player].append(pass_card)
-            print(f"Player {i+1} passed {pass_card} to Player {next_player+1}.")
+            self.print(f"Player {i+1} passed {pass_card} to Player {next_player+1}.")
             
-        print("Card passing complete. Game can now begin.")
+        self.print("Card passing complete. Game can now begin.")
         self._print_updated_hands()
 
 
@@ -446,46 +510,44 @@ class TheCrewGame(Game):
     def whose_turn(self):
         return self.turn_order[0]
 
+    def _restart_mission(self):
+        """Start a new attempt: reshuffle, redeal and set the attempt up the same way __init__ does."""
+        self.failed = False
+        self.attempts += 1  # Increment attempt count due to mission failure
+        self.completed_tasks = []  # Reset completed tasks
+        self.tasks = self.task_ordering.copy()  # Reset tasks
+
+        # Reshuffle and redistribute cards for a new attempt
+        result = self._deal_cards()
+        self.hands = result[0]
+        self.jarvis_hands = result[1]
+        if self.jarvis_hands:
+            self.hands[2] = self.jarvis_hands['face_up']
+
+        self._print_initial_hands()
+        self.played_cards = []
+        self.trick = []
+        self.previous_trick = []
+        self.radio_used = [False] * self.num_players
+        self.radio_clues = {}
+        self.turn_order = self._get_turn_order_starting_with_r4_holder()
+
+        self.activate_distress_signal()  # Reactivate any conditions (e.g., distress signal)
+        if self.num_players == 2:
+            self._jarvis_turn_setup()
+        # Reapply special conditions like commander’s decision or distribution
+        self._apply_special_conditions()
+
     def is_over(self):
         if self.failed:
-            print(f"Mission failed! Restarting mission... (Attempt #{self.attempts + 1})")
-            # Restart the mission, increment attempts, and reset necessary state
-            self.failed = False
-            self.completed_tasks = []  # Reset completed tasks
-            self.tasks = self.task_ordering.copy()  # Reset tasks
-            self.activate_distress_signal()  # Reactivate any conditions (e.g., distress signal)
-            self.attempts += 1  # Increment attempt count due to mission failure
-             # Reshuffle and redistribute cards for a new attempt
-            result = self._deal_cards()
-            self.hands = result[0]
-            self.jarvis_hands = result[1]
-            
-            self._print_initial_hands()
-            self.played_cards = []
-            self.trick = []
-            self.completed_tasks = []  # Now tracking actual cards
-            # Reapply special conditions like commander’s decision or distribution
-            self._apply_special_conditions()
+            self.print(f"Mission failed! Restarting mission... (Attempt #{self.attempts + 1})")
+            self._restart_mission()
             return False  # Mission is not over yet, game continues
         
         # Check if any player ran out of cards
         if not any(self.hands.values()) and set(self.completed_tasks) != set(self.task_ordering):
-            print("❌ A player ran out of cards before completing all tasks. Mission failed!")
-            self.completed_tasks = []  # Reset completed tasks
-            self.tasks = self.task_ordering.copy()  # Reset tasks
-            self.activate_distress_signal()  # Reactivate any conditions (e.g., distress signal)
-            self.attempts += 1  # Increment attempt count due to mission failure
-             # Reshuffle and redistribute cards for a new attempt
-            result = self._deal_cards()
-            self.hands = result[0]
-            self.jarvis_hands = result[1]
-            
-            self._print_initial_hands()
-            self.played_cards = []
-            self.trick = []
-            self.completed_tasks = []  # Now tracking actual cards
-            # Reapply special conditions like commander’s decision or distribution
-            self._apply_special_conditions()
+            self.print("❌ A player ran out of cards before completing all tasks. Mission failed!")
+            self._restart_mission()
             return False  # Game continues, mission is failed, it will restart
 
         # Mission is completed if all tasks are completed
@@ -588,6 +650,7 @@ class TheCrewGame(Game):
         self.jarvis_revealed_cards.remove(move)
         self.hands[2] = self.jarvis_revealed_cards
         self.trick.append((2, move))  # JARVIS is player 2
+        self.played_cards.append((2, move))
         self.turn_order = self.turn_order[1:]
         revealed_card = self.jarvis_dictionary[move]
         self.jarvis_dictionary.pop(move)
@@ -596,7 +659,7 @@ class TheCrewGame(Game):
             self.jarvis_revealed_cards.append(revealed_card)
             self.jarvis_dictionary[revealed_card] = ''
             self.hands[2] = self.jarvis_revealed_cards
-            print(f"JARVIS reveals a new card: {revealed_card}")
+            self.print(f"JARVIS reveals a new card: {revealed_card}")
             
         # Process the trick if it's complete
         if len(self.trick) == self.num_players + 1:  # +1 for JARVIS
@@ -629,7 +692,7 @@ class TheCrewGame(Game):
             clue_type_input, clue_card = move_parts[1], move_parts[2]
             # Validate the clue type input (it should be "highest", "lowest", or "only")
             if self.deadzone:
-                print(f"📡 Player {player_id + 1} used their radio to reveal they have {clue_card}.")
+                self.print(f"📡 Player {player_id + 1} used their radio to reveal they have {clue_card}.")
                 self.radio_clues[player_id] = (clue_card, "deadzone")
             else:
                 # Validate the clue type input (it should be "highest", "lowest", or "only")
@@ -646,7 +709,7 @@ class TheCrewGame(Game):
                 # Store the clue with the chosen type
                 self.radio_clues[player_id] = (clue_card, clue_type_input)
                 self.radio_used[player_id] = True
-                print(f"📡 Player {player_id + 1} used their radio to reveal they have {clue_card} ({clue_type_input} card)!")
+                self.print(f"📡 Player {player_id + 1} used their radio to reveal they have {clue_card} ({clue_type_input} card)!")
             return
         move = move.upper()
         # Follow-suit enforcement, including rockets
@@ -659,6 +722,7 @@ class TheCrewGame(Game):
         
         self.hands[player_id].remove(move)
         self.trick.append((player_id, move))
+        self.played_cards.append((player_id, move))  # Full card history so bots can infer voids
         self.turn_order = self.turn_order[1:]
 
         # Process the trick using the shared method if the right number of cards are played
@@ -684,7 +748,7 @@ class TheCrewGame(Game):
         lead_suit = lead_card[0]
         winner, winning_card = max(self.trick, key=lambda x: card_strength(x[1], lead_suit))
 
-        print(f"🏆 Player {winner + 1} wins the trick with {winning_card}!")
+        self.print(f"🏆 Player {winner + 1} wins the trick with {winning_card}!")
         self.previous_trick = self.trick.copy()
 
         # Adjust turn order based on game mode
@@ -700,26 +764,26 @@ class TheCrewGame(Game):
 
                 # For simple tasks, ensure no numbered tasks are pending
                 if self.task_token_map[card] == "simple task" and remaining_numbered_tasks:
-                    print(f"❌ Cannot complete simple task {card} while numbered tasks remain. Mission failed!")
+                    self.print(f"❌ Cannot complete simple task {card} while numbered tasks remain. Mission failed!")
                     self.failed = True
                     return  # Return to prevent further trick processing
 
                 # For arrow tasks, ensure no numbered tasks are pending
                 if self.task_token_map[card] in self.ARROW_TOKENS and remaining_numbered_tasks:
-                    print(f"❌ Cannot complete arrow task {card} while numbered tasks remain. Mission failed!")
+                    self.print(f"❌ Cannot complete arrow task {card} while numbered tasks remain. Mission failed!")
                     self.failed = True
                     return  # Return to prevent further trick processing
 
                 # For omega task, ensure it is completed last
                 if self.task_token_map[card] == self.OMEGA_TOKEN:
                     if len(self.completed_tasks) != len(self.task_ordering) - 1:
-                        print(f"❌ Omega task {card} must be completed last. Mission failed!")
+                        self.print(f"❌ Omega task {card} must be completed last. Mission failed!")
                         self.failed = True
                         return  # Return to prevent further trick processing
 
                 # For simple tasks, don't need order checks beyond numbered tasks
                 if self.task_token_map[card] == "simple task":
-                    print(f"✅ Simple task {card} completed by Player {player + 1}!")
+                    self.print(f"✅ Simple task {card} completed by Player {player + 1}!")
                     self.completed_tasks.append(card)
                     self.tasks.remove(card)
                     continue
@@ -729,16 +793,16 @@ class TheCrewGame(Game):
                 expected_player = self.assigned_tasks[expected_card]
 
                 if card != expected_card:
-                    print(f"❌ Task {card} was completed out of order. Mission failed!")
+                    self.print(f"❌ Task {card} was completed out of order. Mission failed!")
                     self.failed = True
                     return  # Return to prevent further trick processing
 
                 if winner != expected_player:
-                    print(f"❌ Task {card} was won by Player {winner + 1}, but was assigned to Player {expected_player + 1}. Mission failed!")
+                    self.print(f"❌ Task {card} was won by Player {winner + 1}, but was assigned to Player {expected_player + 1}. Mission failed!")
                     self.failed = True
                     return  # Return to prevent further trick processing
 
-                print(f"✅ Task {card} completed by Player {player + 1} in correct order and by assigned player!")
+                self.print(f"✅ Task {card} completed by Player {player + 1} in correct order and by assigned player!")
                 self.completed_tasks.append(card)
                 self.tasks.remove(card)
 
@@ -747,8 +811,8 @@ class TheCrewGame(Game):
 
         # Check if mission is completed or failed and handle accordingly
         if self.is_over():  # If the mission is over, print the score and restart if necessary
-            print(f"Mission completed in {self.attempts} attempts.")
-            print(f"Final Score: {self.attempts + self.distress_token_usage} attempts taken")
+            self.print(f"Mission completed in {self.attempts} attempts.")
+            self.print(f"Final Score: {self.attempts + self.distress_token_usage} attempts taken")
             return  # End the game once the mission is completed
 
     def state(self, player_id: int | None = None) -> str:  
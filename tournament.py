@@ -0,0 +1,543 @@
+"""
+Tournament harness: every agent plays the same pre-generated deals.
+
+    python tournament.py --agents heuristic random ismcts:iterations=200 --games 50 --workers 8
+    python tournament.py --agents llm heuristic --missions 1 2 3 --cap llm=2 --dir runs/llm-vs-heuristic
+    python tournament.py --agents llm heuristic --players 3 4 --games 400 --target-width 0.15 --budget 2000
+
+A seed set is generated once per (mission, player count) and saved in the tournament
+directory together with one JSON line per finished game, so rerunning the same command
+resumes an interrupted tournament without replaying anything. Agents are given as
+name[:key=value,...] specs; names come from simulate.AGENTS plus "llm" (rollout.run_rollout).
+A bot spec with distress=N (e.g. heuristic:distress=64) answers the distress-signal
+questions with distress.DistressAdvisor playing N simulations per candidate pass, and one
+with commander=N settles commander missions with commander.CommanderOptimizer on N deals.
+Games are played on TheCrewGame with restarts, so attempts and distress-token usage are
+counted exactly as run_rollout reports them. With --pool, deals come from a deal_pool.py
+file (deal seed % len(pool)) shared by every worker; keep one pool per directory. If the
+pool has a deal_index.py index for a mission, --exclude-lost applies its verdicts per
+attempt: an attempt that started exactly where the index's solver did (the pool deal's
+first hands, no distress pass, the default task assignment) on a deal proven lost is a
+forced failure and is not charged, and a game made only of such attempts is left out of
+the report. Attempts with other hands or another setup count as played.
+
+With --target-width the tournament is sequential: --games becomes the most deals a cell
+may use, and each (agent, mission, players) cell stops as soon as its success-rate
+interval is that narrow, so the budget goes to the cells that are still uncertain.
+"""
+import argparse
+import ast
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crew_sim import SimGame, legal_moves
+from commander import CommanderInput, CommanderOptimizer
+from deal_index import DealIndex, index_path
+from deal_pool import open_pool
+from distress import AdvisedInput, DistressAdvisor
+from game_config import GameplayError
+from simulate import AGENTS, SetupResponder, make_agent
+from the_crew_game import TheCrewGame, quiet
+import mock_missions
+
+
+MAX_ATTEMPTS = 10  # TheCrewGame.is_over gives up after this many attempts
+Z = 1.96  # 95% normal quantile used for every interval in the report
+
+
+def parse_agent(spec):
+    """'ismcts:iterations=200,playout=heuristic' -> ('ismcts', {'iterations': 200, 'playout': 'heuristic'})"""
+    name, _, options = spec.partition(":")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        try:
+            kwargs[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            kwargs[key] = value
+    if name != "llm" and name not in AGENTS:
+        raise ValueError(f"Unknown agent {name!r}; choose from llm, {', '.join(sorted(AGENTS))}")
+    return name, kwargs
+
+
+def make_seeds(num_mission, num_players, games, base_seed=0):
+    """
+    The deal set for one (mission, player count): `games` distinct seeds.
+
+    The sequence only depends on its arguments and is prefix-stable, so a tournament can
+    later be extended with more games without changing the deals already played.
+    """
+    rng = random.Random(f"{base_seed}:{num_mission}:{num_players}")
+    seeds = []
+    seen = set()
+    while len(seeds) < games:
+        seed = rng.randrange(2**31)
+        if seed not in seen:
+            seen.add(seed)
+            seeds.append(seed)
+    return seeds
+
+
+def play_match(agent, num_players, num_mission, seed, deal=None, advisor=None, optimizer=None):
+    """
+    Play a mission to the end with `agent` in every seat, restarting after failed attempts.
+
+    Setup questions (distress signal, task transfers, commander prompts) are answered by
+    simulate.SetupResponder, the distress-signal ones by a distress.DistressAdvisor and the
+    commander's by a commander.CommanderOptimizer when given.
+    Returns the same outcome fields as rollout.run_rollout.
+    """
+    input_fn = SetupResponder()
+    if optimizer is not None:
+        input_fn = CommanderInput(optimizer, input_fn)
+    if advisor is not None:
+        input_fn = AdvisedInput(advisor, input_fn, num_mission)
+    game = TheCrewGame(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal,
+                       input_fn=input_fn, print_fn=quiet)
+    indexed = SimGame.from_deal(num_mission, deal) if deal is not None else None
+    indexed_attempts = []  # Attempts that started at the position deal_index.py solves for this deal
+    checked = 0
+    try:
+        while not game.is_over():
+            if indexed is not None and game.attempts != checked:
+                checked = game.attempts
+                if _starts_at(game, indexed):
+                    indexed_attempts.append(checked)
+            pid = game.whose_turn()
+            if not legal_moves(game, pid):
+                game.failed = True  # The player to act is out of cards, so this attempt is lost
+                continue
+            game.play(agent.choose_move(game, pid), player_id=pid)
+    except GameplayError:
+        pass  # Attempt limit reached
+    success = set(game.completed_tasks) == set(game.task_ordering)
+    attempts = min(game.attempts, MAX_ATTEMPTS)
+    return {
+        "success": success,
+        "attempts": attempts,
+        "distress_token_usage": game.distress_token_usage,
+        "score": attempts + game.distress_token_usage,
+        "indexed_attempts": [attempt for attempt in indexed_attempts if attempt <= attempts],
+    }
+
+
+def _starts_at(game, sim):
+    """Whether the attempt `game` is starting has the hands, task assignment and turn order of `sim`."""
+    return ({pid: sorted(hand) for pid, hand in game.hands.items()} == {pid: sorted(hand) for pid, hand in sim.hands.items()}
+            and list(game.task_ordering) == list(sim.task_ordering)
+            and dict(game.assigned_tasks) == dict(sim.assigned_tasks)
+            and list(game.turn_order) == list(sim.turn_order)
+            and (game.num_players != 2 or dict(game.jarvis_dictionary) == sim.jarvis_dictionary))
+
+
+def play_llm_match(num_players, num_mission, seed, deal=None):
+    """rollout.run_rollout on the same deal the bots get for this seed."""
+    import rollout  # Imported lazily: it builds an OpenAI client at import time
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            outcome = rollout.run_rollout(num_players=num_players, num_mission=num_mission, seed=seed, deal=deal)
+        except rollout.LLMUnavailable as e:
+            outcome = {"success": False, "error": str(e)}
+    if outcome.get("error"):
+        # An unfinished game says nothing about attempts; it still counts as a failure
+        outcome.update(attempts=None, distress_token_usage=None, score=None)
+    return outcome
+
+
+def _play_chunk(args):
+    spec, num_players, num_mission, seeds, pool_path = args
+    name, kwargs = parse_agent(spec)
+    simulations = kwargs.pop("distress", None)
+    advisor = DistressAdvisor(simulations) if simulations else None
+    deals = kwargs.pop("commander", None)
+    optimizer = CommanderOptimizer(deals) if deals else None
+    pool = open_pool(pool_path) if pool_path else None
+    results = []
+    try:
+        for seed in seeds:
+            start = time.perf_counter()
+            deal = pool.deal(seed % len(pool)) if pool else None
+            if name == "llm":
+                outcome = play_llm_match(num_players, num_mission, seed, deal)
+            else:
+                # A fresh agent seeded by the deal, so a game replays the same however the seeds are chunked
+                agent = make_agent(name, kwargs, seed)
+                try:
+                    outcome = play_match(agent, num_players, num_mission, seed, deal, advisor, optimizer)
+                finally:
+                    if hasattr(agent, "close"):
+                        agent.close()
+            results.append({
+                "agent": spec,
+                "mission": num_mission,
+                "players": num_players,
+                "seed": seed,
+                **outcome,
+                "seconds": round(time.perf_counter() - start, 4),
+            })
+    finally:
+        if advisor is not None:
+            advisor.close()
+    return results
+
+
+class Tournament:
+    """
+    A resumable tournament stored in `directory`.
+
+    seeds.json holds the deal sets, results.jsonl one line per finished game. Games are
+    keyed by (agent spec, mission, players, seed); finished keys are never replayed.
+    """
+
+    def __init__(self, directory, agents, missions, player_counts, games, base_seed=0, pool_path=None):
+        self.directory = directory
+        self.pool_path = pool_path
+        self.agents = list(agents)
+        self.missions = list(missions)
+        self.player_counts = list(player_counts)
+        self.games = games
+        self.base_seed = base_seed
+        os.makedirs(directory, exist_ok=True)
+        self.seeds_path = os.path.join(directory, "seeds.json")
+        self.results_path = os.path.join(directory, "results.jsonl")
+        self.seeds = self._load_seeds()
+        self.results = self._load_results()
+
+    def _load_seeds(self):
+        stored = {}
+        if os.path.exists(self.seeds_path):
+            with open(self.seeds_path) as f:
+                stored = json.load(f)
+        changed = False
+        for mission in self.missions:
+            for players in self.player_counts:
+                key = f"{mission}/{players}"
+                if len(stored.get(key, ())) < self.games:
+                    fresh = make_seeds(mission, players, self.games, self.base_seed)
+                    if stored.get(key) and fresh[:len(stored[key])] != stored[key]:
+                        raise ValueError(f"{self.seeds_path} was generated with a different base seed")
+                    stored[key] = fresh
+                    changed = True
+        if changed:
+            with open(self.seeds_path, "w") as f:
+                json.dump(stored, f, indent=1)
+        return stored
+
+    def _load_results(self):
+        results = {}
+        if not os.path.exists(self.results_path):
+            return results
+        with open(self.results_path, "rb+") as f:
+            data = f.read()
+            # Cut a half-written last line from an interrupted run; that game is simply replayed
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        for line in data[:end].decode().splitlines():
+            if line.strip():
+                result = json.loads(line)
+                results[self.key(result)] = result
+        return results
+
+    @staticmethod
+    def key(result):
+        return (result["agent"], result["mission"], result["players"], result["seed"])
+
+    def seed_set(self, mission, players):
+        return self.seeds[f"{mission}/{players}"][:self.games]
+
+    def pending(self, chunk_size=4):
+        """Unplayed games as (agent, players, mission, seeds) chunks."""
+        jobs = []
+        for agent, mission, players in self.cells():
+            jobs += self._chunks(agent, mission, players, self._unplayed(agent, mission, players), chunk_size)
+        return jobs
+
+    def cells(self):
+        return [(agent, mission, players) for agent in self.agents for mission in self.missions for players in self.player_counts]
+
+    def _unplayed(self, agent, mission, players):
+        return [seed for seed in self.seed_set(mission, players) if (agent, mission, players, seed) not in self.results]
+
+    def _chunks(self, agent, mission, players, seeds, chunk_size):
+        size = 1 if parse_agent(agent)[0] == "llm" else chunk_size
+        return [(agent, players, mission, seeds[i:i + size], self.pool_path) for i in range(0, len(seeds), size)]
+
+    def record(self, results):
+        with open(self.results_path, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+                self.results[self.key(result)] = result
+
+    def run(self, workers=1, caps=None, chunk_size=4, progress=None):
+        """
+        Play every pending game on a pool of `workers` processes.
+
+        caps maps an agent spec (or bare agent name) to the most chunks of that agent
+        allowed in flight at once, e.g. {"llm": 2} to stay under API rate limits.
+        """
+        if workers <= 1:
+            self._execute(self.pending(chunk_size), None, 1, caps, progress)
+            return
+        with ProcessPoolExecutor(workers) as pool:
+            self._execute(self.pending(chunk_size), pool, workers, caps, progress)
+
+    def run_adaptive(self, target_width, budget=None, workers=1, caps=None, chunk_size=4, min_games=10, progress=None):
+        """
+        Sequential evaluation: play each cell only until its success-rate interval is narrow enough.
+
+        Every (agent, mission, players) cell first gets `min_games` deals. After that, each
+        round stops the cells whose Wilson interval is at most `target_width` wide (or that
+        have used all `self.games` deals) and spends the next round, at most `budget` games
+        in total, on the cells whose intervals are still widest. Deals are taken from the
+        same seed sets in order, so the stored results double as a normal tournament.
+        Returns {cell: (games, interval width)} for the cells still open when it stopped.
+        """
+        caps = caps or {}
+        budget = math.inf if budget is None else budget
+        round_size = max(1, workers) * chunk_size
+        pool = ProcessPoolExecutor(workers) if workers > 1 else None
+        played = 0
+        try:
+            while True:
+                widths = self.widths()
+                open_cells = sorted((cell for cell, (games, width) in widths.items()
+                                     if width > target_width and games < self.games),
+                                    key=lambda cell: -widths[cell][1])
+                if not open_cells or played >= budget:
+                    return {cell: widths[cell] for cell in open_cells}
+
+                # Cells below min_games come first, then the widest intervals get a chunk each
+                starved = [cell for cell in open_cells if widths[cell][0] < min_games]
+                jobs = []
+                allowance = min(round_size, budget - played)
+                for cell in starved or open_cells:
+                    want = max(min_games - widths[cell][0], chunk_size) if starved else chunk_size
+                    seeds = self._unplayed(*cell)[:min(want, allowance)]
+                    jobs += self._chunks(*cell, seeds, chunk_size)
+                    allowance -= len(seeds)
+                    if allowance <= 0:
+                        break
+                played += sum(len(job[3]) for job in jobs)
+                self._execute(jobs, pool, workers, caps, progress)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def widths(self):
+        """{cell: (games played, width of the success-rate interval)}"""
+        widths = {}
+        for cell, results in self.table().items():
+            low, high = wilson(sum(r["success"] for r in results), len(results))
+            widths[cell] = (len(results), high - low)
+        return widths
+
+    def _execute(self, queue, pool, workers, caps, progress):
+        queue = list(queue)
+        if pool is None:
+            for job in queue:
+                self.record(_play_chunk(job))
+                if progress:
+                    progress(len(self.results))
+            return
+
+        caps = caps or {}
+
+        def cap(agent):
+            return caps.get(agent, caps.get(parse_agent(agent)[0], workers))
+
+        running = {}  # future -> agent spec
+        while queue or running:
+            in_flight = {}
+            for agent in running.values():
+                in_flight[agent] = in_flight.get(agent, 0) + 1
+            for job in list(queue):
+                if len(running) >= workers:
+                    break
+                if in_flight.get(job[0], 0) < cap(job[0]):
+                    queue.remove(job)
+                    running[pool.submit(_play_chunk, job)] = job[0]
+                    in_flight[job[0]] = in_flight.get(job[0], 0) + 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                self.record(future.result())
+            if progress:
+                progress(len(self.results))
+
+    def table(self):
+        """{(agent, mission, players): [result, ...]} restricted to this tournament's seed sets."""
+        table = {}
+        for agent, mission, players in self.cells():
+            table[(agent, mission, players)] = [
+                self.results[(agent, mission, players, seed)] for seed in self.seed_set(mission, players)
+                if (agent, mission, players, seed) in self.results]
+        return table
+
+
+def wilson(wins, total, z=Z):
+    """Wilson score interval for a success rate."""
+    if total == 0:
+        return 0.0, 1.0
+    p = wins / total
+    center = (p + z * z / (2 * total)) / (1 + z * z / total)
+    half = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / (1 + z * z / total)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(values, z=Z):
+    """(mean, low, high) with a normal-approximation interval."""
+    n = len(values)
+    if n == 0:
+        return None
+    mean = sum(values) / n
+    if n == 1:
+        return mean, -math.inf, math.inf
+    sd = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    half = z * sd / math.sqrt(n)
+    return mean, mean - half, mean + half
+
+
+def paired_difference(results_a, results_b, field="success"):
+    """
+    Mean of field(a) - field(b) over the deals both agents finished, with its interval.
+
+    Pairing by seed removes the deal-to-deal variance, which dominates in this game.
+    Returns (mean, low, high, pairs) or None when there are no common deals.
+    """
+    by_deal = {(r["mission"], r["players"], r["seed"]): r[field] for r in results_a if r[field] is not None}
+    diffs = [float(by_deal[(r["mission"], r["players"], r["seed"])]) - float(r[field])
+             for r in results_b
+             if r[field] is not None and (r["mission"], r["players"], r["seed"]) in by_deal]
+    interval = mean_interval(diffs)
+    return interval + (len(diffs),) if interval else None
+
+
+def _fmt_mean(values):
+    values = [v for v in values if v is not None]
+    return f"{sum(values) / len(values):.2f}" if values else "-"
+
+
+def lost_deals(tournament):
+    """
+    (mission, players, seed) of the deals a deal_index.py index proves lost. The proof is for
+    the pool deal's first hands with the default setup answers, so it only covers attempts
+    that play_match saw start exactly there (a result's "indexed_attempts").
+    """
+    lost = set()
+    if not tournament.pool_path:
+        return lost
+    for mission in tournament.missions:
+        path = index_path(tournament.pool_path, mission)
+        if not os.path.exists(path):
+            continue
+        index = DealIndex(path)
+        for players in tournament.player_counts:
+            if players == index.num_players:
+                lost.update((mission, players, seed) for seed in tournament.seed_set(mission, players) if index.lost(seed))
+        index.close()
+    return lost
+
+
+def forced_failures(result, lost):
+    """The failed attempts of a game that started at a position its deal index proves lost."""
+    if (result["mission"], result["players"], result["seed"]) not in lost:
+        return 0
+    return sum(attempt < result["attempts"] or not result["success"] for attempt in result.get("indexed_attempts", ()))
+
+
+def report(tournament, exclude_lost=False):
+    table = tournament.table()
+    excluded = uncharged = 0
+    if exclude_lost:
+        lost = lost_deals(tournament)
+        for cell, results in table.items():
+            kept = []
+            for r in results:
+                forced = forced_failures(r, lost)
+                if forced and forced == r["attempts"]:
+                    excluded += 1  # Every attempt was a proven loss
+                elif forced:
+                    uncharged += forced
+                    kept.append(dict(r, attempts=r["attempts"] - forced, score=r["score"] - forced))
+                else:
+                    kept.append(r)
+            table[cell] = kept
+    lines = [f"{'Agent':<28} {'Mission':>7} {'Players':>7} {'Games':>5}  {'Success (95% CI)':<22} "
+             f"{'Attempts':>8} {'Distress':>8} {'Score':>6}"]
+    for (agent, mission, players), results in table.items():
+        if not results:
+            continue
+        wins = sum(r["success"] for r in results)
+        low, high = wilson(wins, len(results))
+        lines.append(
+            f"{agent:<28} {mission:>7} {players:>7} {len(results):>5}  "
+            f"{f'{wins / len(results):.0%} ({low:.0%}-{high:.0%})':<22} "
+            f"{_fmt_mean(r['attempts'] for r in results):>8} "
+            f"{_fmt_mean(r['distress_token_usage'] for r in results):>8} "
+            f"{_fmt_mean(r['score'] for r in results):>6}")
+
+    agents = tournament.agents
+    if len(agents) > 1:
+        lines.append("")
+        lines.append("Paired differences over identical deals (A - B, 95% CI):")
+        everything = {agent: [r for (a, _, _), rs in table.items() if a == agent for r in rs] for agent in agents}
+        for i, a in enumerate(agents):
+            for b in agents[i + 1:]:
+                for field in ("success", "score"):
+                    diff = paired_difference(everything[a], everything[b], field)
+                    if diff is None:
+                        continue
+                    mean, low, high, pairs = diff
+                    lines.append(f"  {a} vs {b}  {field:<7} {mean:+.3f} ({low:+.3f} to {high:+.3f}), {pairs} deals")
+    if exclude_lost:
+        lines.append("")
+        lines.append(f"{excluded} games on provably lost deals excluded, "
+                     f"{uncharged} forced failures on them not charged in other games")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", nargs="+", default=["heuristic", "random"], help="Agent specs, e.g. ismcts:iterations=200")
+    parser.add_argument("--missions", type=int, nargs="+", default=sorted(mock_missions.missions))
+    parser.add_argument("--players", type=int, nargs="+", default=[3])
+    parser.add_argument("--games", type=int, default=20, help="Deals per (mission, player count)")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cap", nargs="*", default=[], help="Per-agent concurrency caps, e.g. llm=2")
+    parser.add_argument("--chunk", type=int, default=4, help="Games per job for bot agents")
+    parser.add_argument("--dir", default="tournament", help="Where seeds and results are stored")
+    parser.add_argument("--pool", default=None, help="Deal pool file (deal_pool.py) shared by all workers")
+    parser.add_argument("--target-width", type=float, default=None, help="Stop each cell once its 95%% interval is this wide")
+    parser.add_argument("--budget", type=int, default=None, help="Most new games to play in sequential mode")
+    parser.add_argument("--min-games", type=int, default=10, help="Games every cell plays before it may stop")
+    parser.add_argument("--exclude-lost", action="store_true", help="Don't charge attempts the pool's deal index proves lost")
+    args = parser.parse_args()
+
+    for spec in args.agents:
+        parse_agent(spec)
+    caps = {agent: int(limit) for agent, _, limit in (cap.rpartition("=") for cap in args.cap)}
+    tournament = Tournament(args.dir, args.agents, args.missions, args.players, args.games, args.base_seed, args.pool)
+    total = len(args.agents) * len(args.missions) * len(args.players) * args.games
+    print(f"{sum(map(len, tournament.table().values()))} of {total} games already stored")
+    if args.target_width is None:
+        tournament.run(args.workers, caps, args.chunk)
+        print(report(tournament, args.exclude_lost))
+        return
+    still_open = tournament.run_adaptive(args.target_width, args.budget, args.workers, caps, args.chunk, args.min_games)
+    print(report(tournament, args.exclude_lost))
+    print(f"\n{len(tournament.cells()) - len(still_open)} of {len(tournament.cells())} cells reached width {args.target_width}")
+    for (agent, mission, players), (games, width) in sorted(still_open.items()):
+        print(f"  still open: {agent} mission {mission}, {players} players: width {width:.2f} after {games} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from heuristic import HeuristicAgent
+from tournament import Tournament, make_seeds, paired_difference, play_match, report, wilson
+
+
+def test_seed_sets_are_prefix_stable_and_distinct():
+    seeds = make_seeds(3, 4, 50)
+    assert len(set(seeds)) == 50
+    assert make_seeds(3, 4, 20) == seeds[:20]
+    assert make_seeds(3, 5, 20) != seeds[:20]
+
+
+@pytest.mark.parametrize("num_players, num_mission", [(2, 2), (3, 8), (4, 9)])
+def test_play_match_survives_restarts(num_players, num_mission):
+    # Weak play fails attempts, which exercises TheCrewGame's restart path (JARVIS and commander setup included)
+    for seed in range(4):
+        outcome = play_match(HeuristicAgent(), num_players, num_mission, seed)
+        assert 1 <= outcome["attempts"] <= 10
+        assert outcome["score"] == outcome["attempts"] + outcome["distress_token_usage"]
+
+
+def test_tournament_resumes_without_replaying(tmp_path):
+    tournament = Tournament(tmp_path, ["heuristic", "random"], [1, 6], [3], games=5)
+    tournament.run(chunk_size=2)
+    with open(tmp_path / "results.jsonl") as f:
+        first_run = f.readlines()
+    assert len(first_run) == 20
+
+    # Drop two games and leave a half-written line, as if the run had been interrupted
+    with open(tmp_path / "results.jsonl", "w") as f:
+        f.writelines(first_run[:-2])
+        f.write('{"agent": "rand')
+    resumed = Tournament(tmp_path, ["heuristic", "random"], [1, 6], [3], games=5)
+    assert len(resumed.pending()) == 1  # The two missing games share one chunk
+    resumed.run(chunk_size=2)
+    replayed = [json.loads(line) for line in open(tmp_path / "results.jsonl").readlines()[-2:]]
+    assert [Tournament.key(r) for r in replayed] == [Tournament.key(json.loads(line)) for line in first_run[-2:]]
+    # Agents are seeded per deal, so even random play replays the same games in other chunks
+    assert [{**r, "seconds": 0} for r in replayed] == [{**json.loads(line), "seconds": 0} for line in first_run[-2:]]
+    assert "heuristic vs random" in report(resumed)
+
+
+def test_paired_difference_and_wilson():
+    a = [{"mission": 1, "players": 3, "seed": s, "success": True} for s in range(10)]
+    b = [{"mission": 1, "players": 3, "seed": s, "success": s < 5} for s in range(10)]
+    mean, low, high, pairs = paired_difference(a, b)
+    assert pairs == 10 and mean == 0.5 and low < 0.5 < high
+    low, high = wilson(5, 10)
+    assert 0.2 < low < 0.5 < high < 0.8
+
+
+def test_adaptive_run_stops_settled_cells_and_respects_budget(tmp_path):
+    # Mission 6 is (almost) always won and mission 10 always lost, so they settle quickly
+    tournament = Tournament(tmp_path, ["heuristic"], [1, 6, 10], [3], games=200)
+    still_open = tournament.run_adaptive(target_width=0.25, budget=120, chunk_size=4, min_games=8)
+    widths = tournament.widths()
+    played = sum(games for games, _ in widths.values())
+    assert played <= 120
+    for cell, (games, width) in widths.items():
+        assert games >= 8
+        assert (width <= 0.25) == (cell not in still_open)
+    assert widths[("heuristic", 6, 3)][0] < 20
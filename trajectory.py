@@ -0,0 +1,472 @@
+"""
+Columnar trajectory datasets for training: one row per decision, written in shards.
+
+    python simulate.py --agent heuristic --engine sim --games 100000 --workers 8 --record data/heuristic
+    python trajectory.py info data/heuristic
+    python crew.py replay data/heuristic --game 12
+
+A row holds what the acting player could see (hand, who played which card, the current
+trick, tasks and who owns them, radio clues), the legal-move mask, the chosen move and the
+acting agent, plus how the trick the move belonged to came out and the final scores() of
+the game. Cards are dictionary-encoded as indexes into DECK (sets of cards as 40-bit
+masks) and moves as indexes into MOVES (cards, then every radio clue).
+
+Rows are buffered in compact arrays and written every `shard_rows` rows (at a game
+boundary) as one shard: a directory of plain .npy column files that readers memory-map,
+or with compress=True a single deflated .npz read one shard at a time. Shards appear
+atomically, so a dataset can be read while it is still being written. Writing needs no
+NumPy; TrajectoryDataset.iter_shards and iter_batches do (column and game do not).
+"""
+import argparse
+import ast
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from array import array
+
+from crew_sim import trick_size
+from deal_pool import MAX_TASKS
+from move_protocol import legal_move_strings
+from the_crew_game import CARD_INDEX, DECK
+
+
+VERSION = 1
+SEATS = 5  # Most seats in a trick or at the table
+CLUE_TYPES = ("highest", "lowest", "only", "deadzone")
+# Every radio string the engines accept, so rows can hold any move an agent made; the legal
+# mask only sets the clues move_protocol.radio_moves offers (true clue types, no rockets)
+MOVES = DECK + tuple(f"radio {clue} {card}" for card in DECK for clue in CLUE_TYPES)
+MOVE_INDEX = {move: index for index, move in enumerate(MOVES)}
+LEGAL_BYTES = (len(MOVES) + 7) // 8
+
+# dtype name -> (array typecode, .npy descr)
+_BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+DTYPES = {
+    "bool": ("B", "|b1"),
+    "int8": ("b", "|i1"),
+    "uint8": ("B", "|u1"),
+    "int16": ("h", _BYTE_ORDER + "i2"),
+    "int32": ("i", _BYTE_ORDER + "i4"),
+    "int64": ("q", _BYTE_ORDER + "i8"),
+    "uint64": ("Q", _BYTE_ORDER + "u8"),
+    "float32": ("f", _BYTE_ORDER + "f4"),
+}
+
+# name -> (dtype, per-row shape)
+ROW_COLUMNS = {
+    "game": ("int32", ()),  # Row of this shard's game table
+    "attempt": ("int8", ()),
+    "turn": ("int16", ()),
+    "player": ("int8", ()),
+    "agent": ("int8", ()),  # Index into the shard's agent names
+    "hand": ("uint64", ()),  # Card mask
+    "owner_played": ("int8", (len(DECK),)),  # Per card: who played it this attempt, -1 if nobody yet
+    "trick_cards": ("int8", (SEATS,)),  # Current trick in play order, -1 padded
+    "trick_players": ("int8", (SEATS,)),
+    "task_cards": ("int8", (MAX_TASKS,)),  # In task_ordering, -1 padded
+    "task_players": ("int8", (MAX_TASKS,)),
+    "tasks_done": ("uint8", ()),  # Bit i: task_cards[i] is completed
+    "clue_cards": ("int8", (SEATS,)),  # Per player: radio clue card, -1 if none
+    "clue_types": ("int8", (SEATS,)),  # Index into CLUE_TYPES, -1 if none
+    "legal": ("uint8", (LEGAL_BYTES,)),  # Move mask, little-endian bit order
+    "move": ("int16", ()),
+    "trick_winner": ("int8", ()),  # -1 if the trick was never finished
+    "trick_tasks": ("int8", ()),  # Tasks completed by that trick
+    "failed": ("bool", ()),  # The attempt failed on that trick
+    "score": ("float32", ()),  # Final scores() entry for the player (team score for JARVIS)
+}
+GAME_COLUMNS = {
+    "seed": ("int64", ()),
+    "mission": ("int8", ()),
+    "players": ("int8", ()),
+    "agent": ("int8", ()),
+    "success": ("bool", ()),
+    "attempts": ("int8", ()),
+    "first_row": ("int32", ()),
+    "rows": ("int32", ()),
+}
+
+
+def encode_move(move):
+    """Index of a move string in MOVES (card codes and clue words in any case)."""
+    parts = move.split()
+    if len(parts) == 3 and parts[0].lower() == "radio":
+        return MOVE_INDEX[f"radio {parts[1].lower()} {parts[2].upper()}"]
+    return MOVE_INDEX[move.strip().upper()]
+
+
+def decode_move(index):
+    return MOVES[index]
+
+
+def card_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << CARD_INDEX[card.upper()]
+    return mask
+
+
+def mask_cards(mask):
+    """The cards in a card mask, in DECK order."""
+    return [card for index, card in enumerate(DECK) if mask >> index & 1]
+
+
+def legal_moves_in(mask_bytes):
+    """The moves set in a row's legal mask (bytes, or a NumPy uint8 row)."""
+    bits = int.from_bytes(bytes(mask_bytes), "little")
+    return [move for index, move in enumerate(MOVES) if bits >> index & 1]
+
+
+def trick_winner(trick):
+    """Seat that wins a finished trick of (player, card), as TheCrewGame._process_trick decides."""
+    lead_suit = trick[0][1][0]
+
+    def strength(entry):
+        card = entry[1]
+        if card[0] == 'R':
+            return (2, int(card[1:]))
+        if card[0] == lead_suit:
+            return (1, int(card[1:]))
+        return (0, 0)
+
+    return max(trick, key=strength)[0]
+
+
+def _padded(values, size):
+    return list(values) + [-1] * (size - len(values))
+
+
+def observe(game, player_id, move=None):
+    """One row (without outcome columns) for `player_id` choosing `move` in `game`; without a move, only what they see."""
+    owner_played = [-1] * len(DECK)
+    for pid, card in game.played_cards:
+        owner_played[CARD_INDEX[card]] = pid
+    clue_cards, clue_types = [-1] * SEATS, [-1] * SEATS
+    for pid, (card, clue) in game.radio_clues.items():
+        clue_cards[pid] = CARD_INDEX[card.upper()]
+        clue_types[pid] = CLUE_TYPES.index(clue)
+    tasks = game.task_ordering
+    legal = 0
+    for legal_move in legal_move_strings(game, player_id):
+        legal |= 1 << MOVE_INDEX[legal_move]
+    row = {
+        "attempt": getattr(game, "attempts", 1),
+        "turn": game.turn,
+        "player": player_id,
+        "hand": card_mask(game.hands[player_id]),
+        "owner_played": owner_played,
+        "trick_cards": _padded([CARD_INDEX[card] for _, card in game.trick], SEATS),
+        "trick_players": _padded([pid for pid, _ in game.trick], SEATS),
+        "task_cards": _padded([CARD_INDEX[task] for task in tasks], MAX_TASKS),
+        "task_players": _padded([game.assigned_tasks[task] for task in tasks], MAX_TASKS),
+        "tasks_done": sum(1 << slot for slot, task in enumerate(tasks) if task in game.completed_tasks),
+        "clue_cards": clue_cards,
+        "clue_types": clue_types,
+        "legal": list(legal.to_bytes(LEGAL_BYTES, "little")),
+    }
+    if move is not None:
+        row["move"] = encode_move(move)
+    return row
+
+
+class GameRecorder:
+    """Records one game's decisions; get one from TrajectoryWriter.start_game()."""
+
+    def __init__(self, writer, game, agent, seed, mission):
+        self.writer = writer
+        self.agent = agent
+        self.seed = seed
+        self.mission = mission
+        self.rows = []
+        self.pending = []  # Rows of the trick in progress
+        self.trick = []  # (player, card) of the trick in progress
+        self.attempt = getattr(game, "attempts", 1)
+        self.completed_before = len(game.completed_tasks)
+
+    def play(self, game, move, player_id):
+        """game.play(move, player_id) and record the decision; illegal moves raise and are not recorded."""
+        if getattr(game, "attempts", 1) != self.attempt:
+            self._close_trick(-1, 0, True)  # The mission was restarted mid-trick
+            self.attempt = game.attempts
+            self.completed_before = len(game.completed_tasks)
+        row = observe(game, player_id, move)
+        game.play(move, player_id=player_id)
+        self.pending.append(row)
+        if move.lower().startswith("radio"):
+            return
+        self.trick.append((player_id, move.upper()))
+        if len(self.trick) == trick_size(game.num_players):
+            self._close_trick(trick_winner(self.trick), len(game.completed_tasks) - self.completed_before, game.failed)
+            self.completed_before = len(game.completed_tasks)
+
+    def _close_trick(self, winner, tasks, failed):
+        for row in self.pending:
+            row.update(trick_winner=winner, trick_tasks=tasks, failed=failed)
+        self.rows += self.pending
+        self.pending = []
+        self.trick = []
+
+    def finish(self, game):
+        """Add the final scores and hand the game's rows to the writer."""
+        self._close_trick(-1, 0, game.failed)
+        team = game.scores()
+        for row in self.rows:
+            row["score"] = team.get(row["player"], min(team.values()))
+        success = not game.failed and set(game.completed_tasks) == set(game.task_ordering)
+        self.writer._add_game(self, {
+            "seed": self.seed,
+            "mission": self.mission,
+            "players": game.num_players,
+            "success": success,
+            "attempts": getattr(game, "attempts", 1),
+        })
+
+
+def _npy_header(descr, shape):
+    header = repr({"descr": descr, "fortran_order": False, "shape": tuple(shape)}).encode("latin1")
+    # Magic, version 1.0, little-endian header length; the whole preamble is padded to 64 bytes
+    length = len(header) + 1
+    padding = -(10 + length) % 64
+    header += b" " * padding + b"\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header
+
+
+def read_npy_header(data):
+    """(descr, shape, data offset) of a .npy file's first bytes."""
+    if data[:6] != b"\x93NUMPY":
+        raise ValueError("Not a .npy file")
+    length = int.from_bytes(data[8:10], "little")
+    header = ast.literal_eval(data[10:10 + length].decode("latin1"))
+    return header["descr"], header["shape"], 10 + length
+
+
+class TrajectoryWriter:
+    """
+    Buffers decision rows and writes a shard every `shard_rows` rows.
+
+    `prefix` keeps shard names apart when several processes write into one directory. A
+    shard never replaces one already there: recording into a directory again continues at
+    the next free number, and a shard's temporary file is removed if writing it fails.
+    """
+
+    def __init__(self, directory, shard_rows=65536, prefix="", compress=False):
+        self.directory = directory
+        self.shard_rows = shard_rows
+        self.prefix = prefix
+        self.compress = compress
+        self.shards = 0
+        self.rows_written = 0
+        self._number = 0  # Next shard number to try
+        os.makedirs(directory, exist_ok=True)
+        self._reset()
+
+    def _reset(self):
+        self.columns = {name: array(DTYPES[dtype][0]) for name, (dtype, _) in ROW_COLUMNS.items()}
+        self.games = {name: array(DTYPES[dtype][0]) for name, (dtype, _) in GAME_COLUMNS.items()}
+        self.agents = []
+        self.rows = 0
+
+    def start_game(self, game, agent, seed, mission):
+        """A GameRecorder for a freshly dealt game; call its finish() when the game is over."""
+        return GameRecorder(self, game, agent, seed, mission)
+
+    def _add_game(self, recorder, game_row):
+        if recorder.agent not in self.agents:
+            self.agents.append(recorder.agent)
+        agent = self.agents.index(recorder.agent)
+        game_index = len(self.games["seed"])
+        for name, value in dict(game_row, agent=agent, first_row=self.rows, rows=len(recorder.rows)).items():
+            self.games[name].append(int(value))
+        for row in recorder.rows:
+            row.update(game=game_index, agent=agent)
+            for name, (_, shape) in ROW_COLUMNS.items():
+                if shape:
+                    self.columns[name].extend(row[name])
+                else:
+                    self.columns[name].append(row[name])
+        self.rows += len(recorder.rows)
+        if self.rows >= self.shard_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered games as one shard (nothing if the buffer is empty)."""
+        if not self.rows:
+            return
+        files = {}
+        for column, (dtype, shape) in ROW_COLUMNS.items():
+            files[column] = (DTYPES[dtype][1], (self.rows, *shape), self.columns[column])
+        games = len(self.games["seed"])
+        for column, (dtype, shape) in GAME_COLUMNS.items():
+            files[f"game_{column}"] = (DTYPES[dtype][1], (games, *shape), self.games[column])
+        meta = {"version": VERSION, "rows": self.rows, "games": games, "agents": self.agents,
+                "format": "npz" if self.compress else "npy"}
+
+        # Unique temporary names, so writers sharing a prefix never write into each other's files
+        if self.compress:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".shard-{self.prefix}", suffix=".npz.tmp")
+            os.close(fd)
+        else:
+            tmp_path = tempfile.mkdtemp(dir=self.directory, prefix=f".shard-{self.prefix}", suffix=".tmp")
+        try:
+            if self.compress:
+                with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                    for column, (descr, shape, values) in files.items():
+                        archive.writestr(f"{column}.npy", _npy_header(descr, shape) + values.tobytes())
+                    archive.writestr("meta.json", json.dumps(meta))
+            else:
+                for column, (descr, shape, values) in files.items():
+                    with open(os.path.join(tmp_path, f"{column}.npy"), "wb") as f:
+                        f.write(_npy_header(descr, shape))
+                        values.tofile(f)
+                with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                    json.dump(meta, f)
+            self._publish(tmp_path)
+        except BaseException:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.shards += 1
+        self.rows_written += self.rows
+        self._reset()
+
+    def _publish(self, tmp_path):
+        """Give a finished temporary shard the first free shard name, never replacing an existing shard."""
+        suffix = ".npz" if self.compress else ""
+        while True:
+            path = os.path.join(self.directory, f"shard-{self.prefix}{self._number:05d}{suffix}")
+            self._number += 1
+            try:
+                if self.compress:
+                    os.link(tmp_path, path)  # Unlike os.replace, fails if the name is taken
+                    os.remove(tmp_path)
+                elif not os.path.lexists(path):
+                    os.rename(tmp_path, path)  # Fails on a non-empty directory of the same name
+                else:
+                    continue
+                return path
+            except OSError as error:
+                if error.errno not in (errno.EEXIST, errno.ENOTEMPTY, errno.ENOTDIR):
+                    raise
+
+    def close(self):
+        self.flush()
+
+
+class TrajectoryDataset:
+    """
+    Reads the shards in a directory without loading the whole dataset.
+
+    iter_shards() yields (meta, {column: array}) with .npy columns memory-mapped (game
+    table columns are named game_<column>); iter_batches() streams fixed-size row batches
+    across shard boundaries. "game" and "agent" codes are local to their shard.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.shards = []
+        for entry in sorted(os.listdir(directory)):
+            path = os.path.join(directory, entry)
+            if entry.startswith("shard-") and entry.endswith(".npz"):
+                with zipfile.ZipFile(path) as archive:
+                    self.shards.append((path, json.loads(archive.read("meta.json"))))
+            elif entry.startswith("shard-") and os.path.isdir(path):
+                with open(os.path.join(path, "meta.json")) as f:
+                    self.shards.append((path, json.load(f)))
+
+    def __len__(self):
+        return sum(meta["rows"] for _, meta in self.shards)
+
+    @property
+    def games(self):
+        return sum(meta["games"] for _, meta in self.shards)
+
+    def column(self, shard, name):
+        """One column of a shard as a flat array.array, read without NumPy."""
+        path, meta = self.shards[shard]
+        if meta["format"] == "npz":
+            with zipfile.ZipFile(path) as archive:
+                data = archive.read(f"{name}.npy")
+        else:
+            with open(os.path.join(path, f"{name}.npy"), "rb") as f:
+                data = f.read()
+        descr, _, offset = read_npy_header(data)
+        typecode = next(code for code, npy_descr in DTYPES.values() if npy_descr == descr)
+        return array(typecode, data[offset:])
+
+    def game(self, index):
+        """The index-th game across shards: its game-table entries plus its (player, move) decisions."""
+        for shard, (_, meta) in enumerate(self.shards):
+            if index >= meta["games"]:
+                index -= meta["games"]
+                continue
+            game = {name: self.column(shard, f"game_{name}")[index] for name in GAME_COLUMNS}
+            rows = slice(game["first_row"], game["first_row"] + game["rows"])
+            game["agent"] = meta["agents"][game["agent"]]
+            game["success"] = bool(game["success"])
+            game["moves"] = [(player, MOVES[move]) for player, move in
+                             zip(self.column(shard, "player")[rows], self.column(shard, "move")[rows])]
+            return game
+        raise IndexError("game index out of range")
+
+    def iter_shards(self, columns=None):
+        import numpy as np
+
+        for path, meta in self.shards:
+            if meta["format"] == "npz":
+                archive = np.load(path)  # Members are only read when accessed
+                names = columns or [name for name in archive.files if name != "meta.json"]
+                yield meta, {name: archive[name] for name in names}
+                archive.close()
+            else:
+                names = columns or [entry[:-4] for entry in sorted(os.listdir(path)) if entry.endswith(".npy")]
+                yield meta, {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+
+    def iter_batches(self, batch_rows, columns=None):
+        """Row-column batches of exactly `batch_rows` rows (the last may be shorter)."""
+        import numpy as np
+
+        columns = columns or list(ROW_COLUMNS)
+        carry = None
+        for meta, arrays in self.iter_shards(columns):
+            start = 0
+            if carry is not None:
+                need = batch_rows - len(carry[columns[0]])
+                carry = {name: np.concatenate([carry[name], arrays[name][:need]]) for name in columns}
+                start = min(need, meta["rows"])
+                if len(carry[columns[0]]) < batch_rows:
+                    continue
+                yield carry
+                carry = None
+            while start + batch_rows <= meta["rows"]:
+                yield {name: arrays[name][start:start + batch_rows] for name in columns}
+                start += batch_rows
+            if start < meta["rows"]:
+                carry = {name: np.array(arrays[name][start:]) for name in columns}
+        if carry is not None:
+            yield carry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="Summarise a dataset directory")
+    info.add_argument("directory")
+    args = parser.parse_args()
+
+    dataset = TrajectoryDataset(args.directory)
+    agents = sorted({agent for _, meta in dataset.shards for agent in meta["agents"]})
+    size = 0
+    for root, _, names in os.walk(args.directory):
+        size += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    print(f"{len(dataset.shards)} shards, {dataset.games} games, {len(dataset)} decisions, "
+          f"{size / 1e6:.1f} MB ({size / max(1, len(dataset)):.0f} bytes/decision); agents: {', '.join(agents)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import os
+import zipfile
+from array import array
+
+import pytest
+
+from simulate import RandomAgent, play_sim_game, run
+from the_crew_game import DECK
+from trajectory import (LEGAL_BYTES, MOVES, ROW_COLUMNS, TrajectoryDataset, TrajectoryWriter, decode_move, encode_move,
+                        legal_moves_in, mask_cards, read_npy_header)
+
+
+def test_moves_round_trip():
+    assert len(MOVES) == len(set(MOVES)) == 40 + 40 * 4
+    assert decode_move(encode_move("radio Highest b9")) == "radio highest B9"
+    assert MOVES[encode_move("r4")] == "R4"
+    assert mask_cards(1 << 0 | 1 << 39) == [DECK[0], DECK[39]]
+
+
+def test_recorded_rows_match_the_decisions(tmp_path):
+    results = run("random", [1, 4], 3, 6, engine="sim", record=tmp_path, shard_rows=40, workers=2)
+    shards = sorted(entry for entry in os.listdir(tmp_path) if entry.startswith("shard-"))
+    assert len(shards) > 4  # Small shards, several per worker job
+    games = 0
+    for shard in shards:
+        with open(tmp_path / shard / "meta.json") as f:
+            meta = json.load(f)
+        assert meta["agents"] == ["random"]
+        with open(tmp_path / shard / "legal.npy", "rb") as f:
+            data = f.read()
+        descr, shape, offset = read_npy_header(data)
+        assert descr == "|u1" and shape == (meta["rows"], LEGAL_BYTES) and offset % 64 == 0
+        assert len(data) == offset + meta["rows"] * LEGAL_BYTES
+        with open(tmp_path / shard / "game_rows.npy", "rb") as f:
+            data = f.read()
+        game_rows = array("i", data[read_npy_header(data)[2]:])
+        assert len(game_rows) == meta["games"] and sum(game_rows) == meta["rows"]
+        games += meta["games"]
+    assert games == len(results)
+
+
+def test_compressed_shards_are_single_archives(tmp_path):
+    writer = TrajectoryWriter(tmp_path, shard_rows=10 ** 6, prefix="x-", compress=True)
+    for seed in range(3):
+        play_sim_game(RandomAgent(seed), 4, 2, seed, writer=writer)
+    writer.close()
+    assert os.listdir(tmp_path) == ["shard-x-00000.npz"]
+    with zipfile.ZipFile(tmp_path / "shard-x-00000.npz") as archive:
+        meta = json.loads(archive.read("meta.json"))
+        assert meta["games"] == 3 and meta["format"] == "npz"
+        assert read_npy_header(archive.read("move.npy"))[1] == (meta["rows"],)
+
+
+def test_recording_twice_into_one_directory_keeps_both_runs(tmp_path):
+    first = run("random", [2], 3, 4, engine="sim", record=tmp_path)
+    second = run("random", [2], 3, 4, engine="sim", record=tmp_path)
+    assert sorted(os.listdir(tmp_path)) == ["shard-random-m2-p3-s0-sim-00000", "shard-random-m2-p3-s0-sim-00001"]
+    assert TrajectoryDataset(tmp_path).games == len(first) + len(second)
+
+    for _ in range(2):
+        writer = TrajectoryWriter(tmp_path / "npz", prefix="x-", compress=True)
+        play_sim_game(RandomAgent(0), 3, 2, 0, writer=writer)
+        writer.close()
+    assert sorted(os.listdir(tmp_path / "npz")) == ["shard-x-00000.npz", "shard-x-00001.npz"]
+
+
+def test_dataset_reads_back_legal_moves_and_outcomes(tmp_path):
+    np = pytest.importorskip("numpy")
+    results = run("random", [1, 2], 3, 5, engine="crew", record=tmp_path, shard_rows=50)
+    dataset = TrajectoryDataset(tmp_path)
+    assert dataset.games == len(results)
+
+    for meta, arrays in dataset.iter_shards():
+        legal = np.unpackbits(arrays["legal"], axis=1, bitorder="little")
+        assert legal[np.arange(meta["rows"]), arrays["move"]].all()  # Random agents only play legal cards
+        assert (arrays["trick_winner"] >= -1).all() and (arrays["trick_winner"] < 3).all()
+        successes = arrays["game_success"][arrays["game"]]
+        assert (arrays["score"] == successes).all()
+        assert arrays["game_rows"].sum() == meta["rows"]
+
+    batches = list(dataset.iter_batches(32, ["move", "player"]))
+    assert sum(len(batch["move"]) for batch in batches) == len(dataset)
+    assert all(len(batch["move"]) == 32 for batch in batches[:-1])
+    _, arrays = next(dataset.iter_shards(["legal", "move"]))
+    assert MOVES[arrays["move"][0]] in legal_moves_in(arrays["legal"][0])
+
+
+def test_columns_cover_the_schema(tmp_path):
+    run("random", [1], 3, 2, engine="sim", record=tmp_path)
+    shard = next(tmp_path.glob("shard-*"))
+    assert {path.stem for path in shard.glob("*.npy")} >= set(ROW_COLUMNS)